@@ -0,0 +1,215 @@
+"""
+Accela Citizen Access (ACA) source adapter - plain HTTP, no browser
+One session per search: the ASP.NET hidden fields (__VIEWSTATE,
+__EVENTVALIDATION, ...) from each response are posted back with the next
+request, so a search is GET form -> POST search -> export or pager postbacks.
+- fast path: the results grid's "Download results" export (one CSV, every row)
+- otherwise: follow the grid pager ("Next >") postbacks until the last page
+Rows are parsed with lxml and mapped onto the county CSV columns.
+"""
+import re
+import csv
+import io
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+import http_client
+
+MAX_PAGES = 100  # safety stop for pager loops
+
+SEARCH_PATH = 'Cap/CapHome.aspx?module={module}&TabName={module}'
+
+# Suffixes of the standard ACA general-search controls
+START_DATE_SUFFIX = 'txtGSStartDate'
+END_DATE_SUFFIX = 'txtGSEndDate'
+SEARCH_BUTTON_SUFFIX = 'btnNewSearch'
+
+# Results grid header text -> county CSV column
+HEADER_FIELDS = {
+    'date': 'issue_date',
+    'issued date': 'issue_date',
+    'record number': 'permit_number',
+    'permit number': 'permit_number',
+    'record #': 'permit_number',
+    'record type': 'work_type',
+    'permit type': 'work_type',
+    'address': 'address',
+    'project name': 'description',
+    'description': 'description',
+    'status': 'status',
+    'contractor': 'contractor',
+    'licensed professional': 'contractor',
+    'job value': 'valuation',
+    'valuation': 'valuation',
+}
+
+_POSTBACK_RE = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+
+
+class AccelaError(Exception):
+    """The portal did not look like an ACA search page"""
+
+
+def parse_postback(href):
+    """(event target, argument) from a javascript:__doPostBack(...) link, or None"""
+    match = _POSTBACK_RE.search(href or '')
+    return match.groups() if match else None
+
+
+def form_fields(doc):
+    """Every named input of the ASP.NET form (hidden state + current values)"""
+    fields = {}
+    for element in doc.xpath('//form//input[@name]'):
+        input_type = (element.get('type') or 'text').lower()
+        if input_type in ('submit', 'button', 'image', 'file'):
+            continue
+        if input_type in ('checkbox', 'radio') and element.get('checked') is None:
+            continue
+        fields[element.get('name')] = element.get('value') or ''
+    for element in doc.xpath('//form//select[@name]'):
+        selected = element.xpath('.//option[@selected]/@value') or element.xpath('.//option[1]/@value')
+        fields[element.get('name')] = selected[0] if selected else ''
+    return fields
+
+
+def _name_ending(doc, suffix):
+    names = doc.xpath(f'//*[@name][substring(@name, string-length(@name) - {len(suffix) - 1}) = "{suffix}"]/@name')
+    return names[0] if names else None
+
+
+def _event_ending(doc, suffix):
+    """Postback (target, argument) of a LinkButton/submit whose id or name ends with suffix"""
+    for element in doc.xpath('//a[@href]|//input[@name]'):
+        if not (element.get('id') or element.get('name') or '').endswith(suffix):
+            continue
+        if element.tag == 'input':
+            return element.get('name'), ''
+        return parse_postback(element.get('href'))
+    return None
+
+
+def _form_url(doc, page_url):
+    action = doc.xpath('//form/@action')
+    return urljoin(page_url, action[0]) if action else page_url
+
+
+def _normalize(record):
+    permit = {}
+    for header, value in record.items():
+        field = HEADER_FIELDS.get(header.strip().lower().rstrip(':'))
+        if field and not permit.get(field):
+            permit[field] = value.strip()
+    return permit
+
+
+def parse_grid(doc):
+    """Permit dicts from the results grid of one page"""
+    grids = doc.xpath('//table[contains(@id, "gdvPermitList")]') or doc.xpath('//table[contains(@class, "ACA_GridView")]')
+    if not grids:
+        return []
+    grid = grids[0]
+
+    header_row = grid.xpath('.//tr[contains(@class, "ACA_TabRow_Header")]') or grid.xpath('.//tr[th]')
+    if not header_row:
+        return []
+    headers = [cell.text_content().strip() for cell in header_row[0].xpath('./th|./td')]
+
+    permits = []
+    for row in grid.xpath('.//tr[contains(@class, "ACA_TabRow_Odd") or contains(@class, "ACA_TabRow_Even")]'):
+        cells = [cell.text_content().strip() for cell in row.xpath('./td')]
+        permit = _normalize(dict(zip(headers, cells)))
+        if permit.get('permit_number'):
+            permits.append(permit)
+    return permits
+
+
+def parse_export(content):
+    """Permit dicts from the "Download results" CSV (raw bytes, usually with a BOM)"""
+    reader = csv.DictReader(io.StringIO(content.decode('utf-8-sig', errors='replace')))
+    return [permit for permit in (_normalize(row) for row in reader) if permit.get('permit_number')]
+
+
+class AccelaPortal:
+    """One ACA agency (e.g. https://aca-prod.accela.com/BEXAR/) searched by date range"""
+
+    def __init__(self, base_url, module='Building', session=None, timeout=30):
+        self.base_url = base_url if base_url.endswith('/') else base_url + '/'
+        self.module = module
+        # Private session: ASP.NET state lives in its cookies
+        self.session = session or http_client.new_session()
+        self.timeout = timeout
+        self.requests_made = 0
+
+    @property
+    def search_url(self):
+        return urljoin(self.base_url, SEARCH_PATH.format(module=self.module))
+
+    def _fetch(self, method, url, **kwargs):
+        self.requests_made += 1
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _postback(self, url, doc, target, argument='', extra=None):
+        """Replay the form with the page's current __VIEWSTATE and fire one event"""
+        fields = form_fields(doc)
+        fields.update(extra or {})
+        fields['__EVENTTARGET'] = target
+        fields['__EVENTARGUMENT'] = argument
+        return self._fetch('POST', url, data=fields)
+
+    def _export(self, url, doc):
+        """Rows from the grid's CSV export, or None when the portal doesn't offer it"""
+        links = doc.xpath('//a[contains(@id, "btnExport") or contains(normalize-space(.), "Download results")]/@href')
+        postback = parse_postback(links[0]) if links else None
+        if not postback:
+            return None
+
+        response = self._postback(url, doc, *postback)
+        content_type = response.headers.get('Content-Type', '')
+        if 'csv' not in content_type and 'attachment' not in response.headers.get('Content-Disposition', ''):
+            # Most agencies answer the postback with a page that redirects to the export handler
+            match = re.search(r"""['"]([^'"]*Export2CSV\.ashx[^'"]*)['"]""", response.text)
+            if not match:
+                return None
+            response = self._fetch('GET', urljoin(response.url, match.group(1).replace('&amp;', '&')))
+        return parse_export(response.content)
+
+    def _pages(self, url, doc):
+        """Grid rows from every results page, following the pager postbacks"""
+        permits = parse_grid(doc)
+        for _ in range(MAX_PAGES - 1):
+            next_links = doc.xpath('//a[contains(normalize-space(.), "Next")][contains(@href, "__doPostBack")]/@href')
+            postback = parse_postback(next_links[0]) if next_links else None
+            if not postback:
+                break
+            response = self._postback(url, doc, *postback)
+            doc = lxml_html.fromstring(response.content)
+            page = parse_grid(doc)
+            if not page:
+                break
+            permits.extend(page)
+        return permits
+
+    def search(self, start_date, end_date, date_format='%m/%d/%Y'):
+        """All permits in [start_date, end_date]; export when available, else paged grid"""
+        response = self._fetch('GET', self.search_url)
+        doc = lxml_html.fromstring(response.content)
+
+        start_field = _name_ending(doc, START_DATE_SUFFIX)
+        end_field = _name_ending(doc, END_DATE_SUFFIX)
+        search_event = _event_ending(doc, SEARCH_BUTTON_SUFFIX)
+        if not (start_field and end_field and search_event):
+            raise AccelaError(f"No general search form at {self.search_url}")
+
+        url = _form_url(doc, response.url)
+        response = self._postback(url, doc, *search_event, extra={
+            start_field: start_date.strftime(date_format),
+            end_field: end_date.strftime(date_format),
+        })
+        doc = lxml_html.fromstring(response.content)
+        url = _form_url(doc, response.url)
+
+        permits = self._export(url, doc)
+        if permits is None:
+            permits = self._pages(url, doc)
+        return permits
@@ -1,19 +1,79 @@
 """
 AI-powered lead scoring system using HuggingFace models
+transformers/torch (or ONNX Runtime) are only imported when the model is
+first needed, so constructing a LeadScorer is cheap
 """
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
 from typing import Dict, List
+from pathlib import Path
+import contextlib
 import re
+import hashlib
+import sqlite3
+from scoring_engine import ai_profile, score_permits, score_component, HEURISTIC_URGENCY
+
+# Urgency backends: 'torch' (HF pipeline), 'onnx' (int8-quantized ONNX Runtime), 'heuristic' (no model)
+BACKENDS = ('torch', 'onnx', 'heuristic')
+
+
+class UrgencyCache:
+    """Persistent urgency scores keyed by sha256(model name + text)"""
+    
+    # SQLite's default host-parameter limit is 999
+    CHUNK_SIZE = 900
+    
+    def __init__(self, path: str, model_name: str):
+        self.path = path
+        self.model_name = model_name
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS urgency_cache (key TEXT PRIMARY KEY, score REAL NOT NULL)'
+            )
+    
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+    
+    def get_many(self, texts: List[str]) -> Dict[str, float]:
+        """Cached scores for the texts that have one"""
+        keys = {self._key(text): text for text in texts}
+        found = {}
+        key_list = list(keys)
+        with sqlite3.connect(self.path) as conn:
+            for start in range(0, len(key_list), self.CHUNK_SIZE):
+                chunk = key_list[start:start + self.CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT key, score FROM urgency_cache WHERE key IN ({placeholders})', chunk
+                ).fetchall()
+                found.update((keys[key], score) for key, score in rows)
+        return found
+    
+    def put_many(self, scores: Dict[str, float]):
+        """Store scores in one transaction"""
+        if not scores:
+            return
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO urgency_cache (key, score) VALUES (?, ?)',
+                [(self._key(text), score) for text, score in scores.items()]
+            )
 
 
 class LeadScorer:
     """Score building permits for contractor lead quality"""
     
-    def __init__(self, model_name='distilbert-base-uncased-finetuned-sst-2-english'):
-        """Initialize the AI model for scoring"""
-        print(f"Loading model: {model_name}")
-        self.sentiment_analyzer = pipeline('sentiment-analysis', model=model_name)
+    def __init__(self, model_name='distilbert-base-uncased-finetuned-sst-2-english',
+                 batch_size: int = 32, cache_path: str = 'urgency_cache.db',
+                 backend: str = 'torch', onnx_dir: str = 'models/onnx-int8'):
+        """Initialize the scorer - the model itself loads on first use"""
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown scorer backend: {backend} (expected one of {BACKENDS})")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_path = cache_path
+        self.backend = backend
+        self.onnx_dir = Path(onnx_dir)
+        self._analyzer = None
+        self._cache = None
         
         # High-value permit types
         self.high_value_types = [
@@ -26,80 +86,120 @@ class LeadScorer:
             'downtown', 'green hills', 'brentwood', 'franklin',
             'murfreesboro', 'gallatin', 'hendersonville'
         ]
+        
+        # Keyword tables compiled once for batch scoring
+        self.profile = ai_profile(self.high_value_types, self.premium_areas)
+    
+    @property
+    def sentiment_analyzer(self):
+        """HF sentiment pipeline, loaded on first use"""
+        if self._analyzer is None and self.backend != 'heuristic':
+            self._analyzer = self._load_model()
+        return self._analyzer
+    
+    @property
+    def cache(self):
+        """Urgency cache - keyed per backend since quantized scores differ slightly"""
+        if self._cache is None:
+            # Settle the backend first - a failed ONNX import falls back to torch
+            self.sentiment_analyzer
+            cache_model = self.model_name if self.backend == 'torch' else f"{self.model_name}:onnx-int8"
+            self._cache = UrgencyCache(self.cache_path, cache_model)
+        return self._cache
+    
+    def _load_model(self):
+        """Load the pipeline for the configured backend, falling back if its packages are missing"""
+        if self.backend == 'onnx':
+            try:
+                return self._load_onnx_model()
+            except ImportError as e:
+                print(f"ONNX backend unavailable ({e}) - falling back to torch")
+                self.backend = 'torch'
+        
+        try:
+            from transformers import pipeline
+        except ImportError as e:
+            print(f"transformers unavailable ({e}) - using heuristic urgency scores")
+            self.backend = 'heuristic'
+            return None
+        
+        print(f"Loading model: {self.model_name}")
+        return pipeline('sentiment-analysis', model=self.model_name)
+    
+    def _load_onnx_model(self):
+        """int8 dynamic-quantized ONNX Runtime pipeline (exported and quantized once into onnx_dir)"""
+        from transformers import AutoTokenizer, pipeline
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        
+        quantized = self.onnx_dir / 'model_quantized.onnx'
+        if not quantized.exists():
+            print(f"Exporting {self.model_name} to ONNX + int8 quantization (one time)...")
+            model = ORTModelForSequenceClassification.from_pretrained(self.model_name, export=True)
+            model.save_pretrained(self.onnx_dir)
+            AutoTokenizer.from_pretrained(self.model_name).save_pretrained(self.onnx_dir)
+            quantizer = ORTQuantizer.from_pretrained(model)
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=self.onnx_dir, quantization_config=qconfig)
+        
+        print(f"Loading ONNX model: {quantized}")
+        model = ORTModelForSequenceClassification.from_pretrained(self.onnx_dir, file_name=quantized.name)
+        tokenizer = AutoTokenizer.from_pretrained(self.onnx_dir)
+        return pipeline('sentiment-analysis', model=model, tokenizer=tokenizer)
     
     def score_permit(self, permit: Dict) -> Dict:
         """
         Score a single permit on multiple factors
         Returns permit dict with added 'score' and 'score_breakdown' fields
         """
-        scores = {
-            'size_score': self._score_job_size(permit),
-            'location_score': self._score_location(permit),
-            'urgency_score': self._score_urgency(permit),
-            'type_score': self._score_permit_type(permit)
-        }
-        
-        # Weighted total score (0-100)
-        total_score = (
-            scores['size_score'] * 0.35 +
-            scores['location_score'] * 0.25 +
-            scores['urgency_score'] * 0.20 +
-            scores['type_score'] * 0.20
-        )
-        
-        permit['score'] = round(total_score, 2)
-        permit['score_breakdown'] = scores
-        
-        return permit
+        return self._score([permit])[0]
     
     def score_batch(self, permits: List[Dict]) -> List[Dict]:
         """Score multiple permits and return sorted by score"""
-        scored_permits = [self.score_permit(permit) for permit in permits]
+        scored_permits = self._score(permits)
         return sorted(scored_permits, key=lambda x: x['score'], reverse=True)
     
-    def _score_job_size(self, permit: Dict) -> float:
-        """Score based on estimated project value (0-100)"""
-        value = permit.get('estimated_value', 0)
-        
-        if value == 0:
-            return 30  # Unknown value gets neutral score
-        elif value < 10000:
-            return 20
-        elif value < 50000:
-            return 40
-        elif value < 100000:
-            return 60
-        elif value < 250000:
-            return 80
-        else:
-            return 100  # $250k+ projects
-    
-    def _score_location(self, permit: Dict) -> float:
-        """Score based on location desirability (0-100)"""
-        address = permit.get('address', '').lower()
-        county = permit.get('county', '').lower()
-        
-        score = 50  # Base score
-        
-        # Check for premium areas
-        for area in self.premium_areas:
-            if area in address or area in county:
-                score = 85
-                break
-        
-        # Bonus for specific desirable counties
-        if 'williamson' in county:
-            score += 15
-        elif 'davidson' in county:
-            score += 10
-        
-        return min(score, 100)
+    def _score(self, permits: List[Dict]) -> List[Dict]:
+        """
+        Size/location/type are computed vectorized by the scoring engine;
+        urgency comes from the sentiment model.
+        Weighted total: size 35%, location 25%, urgency 20%, type 20%
+        """
+        urgency = self.score_urgency_batch(permits)
+        return score_permits(self.profile, permits, provided={'urgency_score': urgency})
     
     def _score_urgency(self, permit: Dict) -> float:
         """
         Score urgency using AI sentiment analysis on description
         Higher sentiment = more exciting/urgent project
         """
+        return self.score_urgency_batch([permit])[0]
+    
+    def score_urgency_batch(self, permits: List[Dict]) -> List[float]:
+        """
+        Urgency for a whole batch: each distinct text is scored once, cached
+        results are reused, and only the misses go through the model in
+        batches of self.batch_size
+        """
+        # Loading the model settles the backend (None: packages missing, heuristic)
+        if self.backend == 'heuristic' or self.sentiment_analyzer is None:
+            return score_component(HEURISTIC_URGENCY, permits)
+        
+        texts = [self._urgency_text(permit) for permit in permits]
+        unique = list({text for text in texts if text})
+        
+        scores = self.cache.get_many(unique)
+        misses = [text for text in unique if text not in scores]
+        if misses:
+            fresh = self._run_model(misses)
+            self.cache.put_many(fresh)
+            scores.update(fresh)
+        
+        # Neutral score for missing data or texts the model failed on
+        return [scores.get(text, 50) if text else 50 for text in texts]
+    
+    def _urgency_text(self, permit: Dict) -> str:
+        """Model input for a permit ('' when there is too little text)"""
         description = permit.get('work_description', '')
         permit_type = permit.get('permit_type', '')
         
@@ -107,49 +207,36 @@ class LeadScorer:
         text = f"{permit_type} {description}".strip()
         
         if not text or len(text) < 10:
-            return 50  # Neutral score for missing data
+            return ''
         
+        # Truncate to model max length
+        return text[:512]
+    
+    def _inference_context(self):
+        """torch.inference_mode() for the torch backend (no autograd bookkeeping)"""
+        if self.backend == 'torch':
+            import torch
+            return torch.inference_mode()
+        return contextlib.nullcontext()
+    
+    def _run_model(self, texts: List[str]) -> Dict[str, float]:
+        """Batched sentiment inference -> {text: urgency score}"""
         try:
-            # Truncate to model max length
-            text = text[:512]
-            
-            # Get sentiment score
-            result = self.sentiment_analyzer(text)[0]
-            
+            with self._inference_context():
+                results = self.sentiment_analyzer(texts, batch_size=self.batch_size, truncation=True)
+        except Exception as e:
+            print(f"Error in sentiment analysis: {e}")
+            return {}
+        
+        scores = {}
+        for text, result in zip(texts, results):
             # Convert to 0-100 scale
             if result['label'] == 'POSITIVE':
                 score = 50 + (result['score'] * 50)  # 50-100
             else:
                 score = 50 - (result['score'] * 30)  # 20-50
-            
-            return round(score, 2)
-        
-        except Exception as e:
-            print(f"Error in sentiment analysis: {e}")
-            return 50
-    
-    def _score_permit_type(self, permit: Dict) -> float:
-        """Score based on permit type profitability (0-100)"""
-        permit_type = permit.get('permit_type', '').lower()
-        
-        # Check for high-value types
-        for high_value in self.high_value_types:
-            if high_value in permit_type:
-                return 90
-        
-        # Medium value types
-        medium_value = ['repair', 'alteration', 'replacement', 'install']
-        for medium in medium_value:
-            if medium in permit_type:
-                return 60
-        
-        # Low value
-        low_value = ['fence', 'sign', 'demolition', 'pool']
-        for low in low_value:
-            if low in permit_type:
-                return 30
-        
-        return 50  # Unknown type
+            scores[text] = round(score, 2)
+        return scores
     
     def get_top_leads(self, permits: List[Dict], n: int = 10) -> List[Dict]:
         """Get top N scored leads"""
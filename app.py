@@ -16,6 +16,9 @@ import io
 from firebase_backend import FirebaseBackend
 from stripe_payment import StripePayment
 from email_service import EmailService
+import permit_index
+import permit_archive
+from pdf_reports import send_pdf
 import config
 from auth import login_required
 
@@ -25,6 +28,9 @@ app = Flask(__name__)
 app.secret_key = config.SECRET_KEY
 CORS(app)
 
+# Merge the archive's small per-run parts in the background
+permit_archive.start_compactor()
+
 @app.before_request
 def before_request():
     print(f"DEBUG: REQUEST RECEIVED - {request.method} {request.path}")
@@ -132,32 +138,8 @@ def dashboard():
     subscriptions = firebase.get_user_subscriptions(user_id) if firebase and hasattr(firebase, 'get_user_subscriptions') else [{'county': 'Nashville-Davidson'}, {'county': 'Bexar'}]
     user_counties = [sub.get('county', '').lower().replace(' ', '_') for sub in subscriptions]
     
-    # Pull all user permits
-    master = []
-    data_dir = Path('scraped_permits')
-    if data_dir.exists():
-        for csv_file in data_dir.glob('*.csv'):
-            city_name = csv_file.name.split('_')[0]
-            city_map = {
-                'sanantonio': 'bexar',
-                'nashville': 'davidson',
-                'austin': 'travis',
-                'hamilton': 'hamilton'
-            }
-            city_slug = city_map.get(city_name, city_name)
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        row['city'] = city_slug
-                        if 'pull_time' not in row:
-                            row['pull_time'] = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        master.append(row)
-            except Exception as e:
-                print(f"Error reading {csv_file}: {e}")
-    
-    # Filter by subscribed counties
-    user_permits = [p for p in master if p.get('city', '').lower() in user_counties]
+    # Pull subscribed counties from the permit index (scraped data only, no demo rows)
+    user_permits = permit_index.query_permits(cities=user_counties, include_mock=False)
     
     return render_template('dashboard.html', user=user, user_permits=user_permits)
 
@@ -257,14 +239,8 @@ def download_pdf(date):
     if not leads:
         return "No leads for this date", 404
     
-    pdf_buffer = email_service.generate_leads_pdf(leads, date)
-    
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'contractor_leads_{date}.pdf'
-    )
+    # Same date's PDF is rendered once and served from the cache (ETag = content hash)
+    return send_pdf('leads', leads, date, f'contractor_leads_{date}.pdf')
 
 
 @app.route('/download_all_permits')
@@ -274,57 +250,8 @@ def download_all_permits():
     import csv
     from io import StringIO
     
-    # Pull master list from scraped_permits directory (same logic as admin route)
-    master = []
-    data_dir = Path('scraped_permits')
-    if data_dir.exists():
-        for csv_file in data_dir.glob('*.csv'):
-            city_name = csv_file.name.split('_')[0]  # Extract city from filename
-            # Map city names to slugs
-            city_map = {
-                'sanantonio': 'bexar',
-                'nashville': 'davidson',
-                'austin': 'travis',
-                'hamilton': 'hamilton'
-            }
-            city_slug = city_map.get(city_name, city_name)
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        row['city'] = city_slug
-                        # Add pull_time if not present (use file modification time)
-                        if 'pull_time' not in row:
-                            row['pull_time'] = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        master.append(row)
-            except Exception as e:
-                print(f"Error reading {csv_file}: {e}")
-    
-    # Also load from data/permits.csv if it exists (for mock data)
-    permits_file = Path('data/permits.csv')
-    if permits_file.exists():
-        try:
-            with open(permits_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Map county to city slug for consistency
-                    county = row.get('county', '')
-                    city_map = {
-                        'Nashville-Davidson': 'davidson',
-                        'Bexar': 'bexar', 
-                        'Hamilton': 'hamilton',
-                        'Austin-Travis': 'travis'
-                    }
-                    row['city'] = city_map.get(county, county.lower().replace(' ', '_'))
-                    # Add pull_time if not present
-                    if 'pull_time' not in row:
-                        row['pull_time'] = row.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                    master.append(row)
-        except Exception as e:
-            print(f"Error reading permits.csv: {e}")
-    
-    # Sort by pull_time (most recent first)
-    master.sort(key=lambda x: x.get('pull_time', ''), reverse=True)
+    # Pull master list from the permit index (most recent first)
+    master = permit_index.query_permits()
     
     if not master:
         return "No permits available", 404
@@ -333,7 +260,7 @@ def download_all_permits():
     output = StringIO()
     if master:
         fieldnames = master[0].keys()
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(master)
     
@@ -354,61 +281,8 @@ def download_permit(permit_number):
     import csv
     from io import StringIO
     
-    # Pull master list from scraped_permits directory (same logic as admin route)
-    master = []
-    data_dir = Path('scraped_permits')
-    if data_dir.exists():
-        for csv_file in data_dir.glob('*.csv'):
-            city_name = csv_file.name.split('_')[0]  # Extract city from filename
-            # Map city names to slugs
-            city_map = {
-                'sanantonio': 'bexar',
-                'nashville': 'davidson',
-                'austin': 'travis',
-                'hamilton': 'hamilton'
-            }
-            city_slug = city_map.get(city_name, city_name)
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        row['city'] = city_slug
-                        # Add pull_time if not present (use file modification time)
-                        if 'pull_time' not in row:
-                            row['pull_time'] = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        master.append(row)
-            except Exception as e:
-                print(f"Error reading {csv_file}: {e}")
-    
-    # Also load from data/permits.csv if it exists (for mock data)
-    permits_file = Path('data/permits.csv')
-    if permits_file.exists():
-        try:
-            with open(permits_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Map county to city slug for consistency
-                    county = row.get('county', '')
-                    city_map = {
-                        'Nashville-Davidson': 'davidson',
-                        'Bexar': 'bexar', 
-                        'Hamilton': 'hamilton',
-                        'Austin-Travis': 'travis'
-                    }
-                    row['city'] = city_map.get(county, county.lower().replace(' ', '_'))
-                    # Add pull_time if not present
-                    if 'pull_time' not in row:
-                        row['pull_time'] = row.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                    master.append(row)
-        except Exception as e:
-            print(f"Error reading permits.csv: {e}")
-    
     # Find the specific permit
-    permit = None
-    for p in master:
-        if p.get('permit_number') == permit_number:
-            permit = p
-            break
+    permit = permit_index.get_permit(permit_number)
     
     if not permit:
         return "Permit not found", 404
@@ -473,61 +347,11 @@ def library():
     subscriptions = firebase.get_user_subscriptions(user_id) if firebase and hasattr(firebase, 'get_user_subscriptions') else [{'county': 'Nashville-Davidson'}, {'county': 'Bexar'}]
     user_counties = [sub.get('county', '').lower().replace(' ', '_') for sub in subscriptions]
     
-    # 1. Pull master list from scraped_permits directory
-    master = []
-    data_dir = Path('scraped_permits')
-    if data_dir.exists():
-        for csv_file in data_dir.glob('*.csv'):
-            city_name = csv_file.name.split('_')[0]  # Extract city from filename
-            # Map city names to slugs
-            city_map = {
-                'sanantonio': 'bexar',
-                'nashville': 'davidson',
-                'austin': 'travis',
-                'hamilton': 'hamilton'
-            }
-            city_slug = city_map.get(city_name, city_name)
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        row['city'] = city_slug
-                        # Add pull_time if not present (use file modification time)
-                        if 'pull_time' not in row:
-                            row['pull_time'] = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        master.append(row)
-            except Exception as e:
-                print(f"Error reading {csv_file}: {e}")
-    
-    # Also load from data/permits.csv if it exists (for mock data)
-    permits_file = Path('data/permits.csv')
-    if permits_file.exists():
-        try:
-            with open(permits_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Map county to city slug
-                    county = row.get('county', '')
-                    city_map = {
-                        'Nashville-Davidson': 'davidson',
-                        'Bexar': 'bexar', 
-                        'Hamilton': 'hamilton',
-                        'Austin-Travis': 'travis'
-                    }
-                    row['city'] = city_map.get(county, county.lower().replace(' ', '_'))
-                    # Add pull_time if not present
-                    if 'pull_time' not in row:
-                        row['pull_time'] = row.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                    master.append(row)
-        except Exception as e:
-            print(f"Error reading permits.csv: {e}")
-    
-    # 2. Pull only what they bought (filter by subscribed counties)
-    user_permits = [p for p in master if p.get('city', '').lower() in user_counties]
-    
-    # Sort both by pull_time (most recent first)
-    master.sort(key=lambda x: x.get('pull_time', ''), reverse=True)
-    user_permits.sort(key=lambda x: x.get('pull_time', ''), reverse=True)
+    # 1. Pull master list from the permit index (sorted by pull_time, most recent first)
+    master = permit_index.query_permits()
+    
+    # 2. Pull only what they bought (indexed query by subscribed counties)
+    user_permits = permit_index.query_permits(cities=user_counties)
     
     return render_template('library.html', master=master, user_permits=user_permits, user=user)
 @app.route('/admin')
@@ -546,64 +370,14 @@ def admin():
     
     user = {'email': session.get('email', 'unknown@example.com')}  # Mock user object
     
-    # Pull master list from scraped_permits directory
-    master = []
-    data_dir = Path('scraped_permits')
-    if data_dir.exists():
-        for csv_file in data_dir.glob('*.csv'):
-            city_name = csv_file.name.split('_')[0]  # Extract city from filename
-            # Map city names to slugs
-            city_map = {
-                'sanantonio': 'bexar',
-                'nashville': 'davidson',
-                'austin': 'travis',
-                'hamilton': 'hamilton'
-            }
-            city_slug = city_map.get(city_name, city_name)
-            try:
-                with open(csv_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        row['city'] = city_slug
-                        # Add pull_time if not present (use file modification time)
-                        if 'pull_time' not in row:
-                            row['pull_time'] = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        master.append(row)
-            except Exception as e:
-                print(f"Error reading {csv_file}: {e}")
-    
-    # Also load from data/permits.csv if it exists (for mock data)
-    permits_file = Path('data/permits.csv')
-    if permits_file.exists():
-        try:
-            with open(permits_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Map county to city slug for consistency
-                    county = row.get('county', '')
-                    city_map = {
-                        'Nashville-Davidson': 'davidson',
-                        'Bexar': 'bexar', 
-                        'Hamilton': 'hamilton',
-                        'Austin-Travis': 'travis'
-                    }
-                    row['city'] = city_map.get(county, county.lower().replace(' ', '_'))
-                    # Add pull_time if not present
-                    if 'pull_time' not in row:
-                        row['pull_time'] = row.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                    master.append(row)
-        except Exception as e:
-            print(f"Error reading permits.csv: {e}")
-    
-    # Sort by pull_time (most recent first)
-    master.sort(key=lambda x: x.get('pull_time', ''), reverse=True)
-    
-    # Get unique cities for filtering
-    cities = sorted(list(set(p.get('city', '') for p in master if p.get('city'))))
-    
-    # Calculate total value
-    total_value = sum(int(p.get('estimated_value', 0) or 0) for p in master)
+    # Pull master list from the permit index (most recent first)
+    master = permit_index.query_permits()
+    
+    # Unique cities for filtering and total value come straight from the index
+    cities, total_value = permit_index.summary()
     
+    return render_template('admin.html', master=master, cities=cities, total_value=total_value, user=user)
+
 @app.route('/admin/test-deploy', methods=['POST'])
 @login_required
 def test_deploy():
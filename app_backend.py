@@ -9,6 +9,7 @@ import hmac
 import hashlib
 import csv
 import database
+import permit_store
 import auth
 
 app = Flask(__name__)
@@ -29,19 +30,12 @@ STRIPE_URLS = {
     }
 }
 
-def load_leads():
-    db_path = os.path.join(os.path.dirname(__file__), 'leads_db', 'current_leads.json')
-    if os.path.exists(db_path):
-        with open(db_path, 'r') as f:
-            data = json.load(f)
-            leads_data = data.get('leads', {})
-            for state in leads_data.values():
-                for county_leads in state.values():
-                    for lead in county_leads:
-                        if lead.get('score') == 90:
-                            lead['score'] = random.randint(75, 98)
-            return leads_data
-    return {}
+def display_score(lead):
+    """Placeholder scores (90) are spread over 75-98, stable per permit"""
+    score = lead.get('score') or 0
+    if score == 90:
+        score = random.Random(lead.get('permit_number')).randint(75, 98)
+    return score
 
 def blur_address(address):
     suffixes = ['Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Drive', 'Dr', 'Lane', 'Ln', 
@@ -72,11 +66,13 @@ def blur_address(address):
         else:
             return f'<span class="blur">[Address Locked]</span>'
 
-LEADS = load_leads()
+# Pooled per-thread connection, released at the end of each request
+database.init_app(app)
 
 # Initialize database on startup
 with app.app_context():
     database.init_database()
+    permit_store.init_store()
 
 @app.route('/')
 def index():
@@ -417,15 +413,15 @@ def county_detail(state, county):
     if user:
         has_access = database.has_access_to_county(user['id'], state, county)
     
-    # Get leads for this county
-    leads = LEADS.get(state, {}).get(county, [])
+    # Get leads for this county (indexed query, only the page we render)
+    lead_count = permit_store.count_leads(state, county)
     
-    if not leads:
+    if not lead_count:
         return "<h1>No leads found</h1>", 404
     
     # Prepare lead data
     leads_html = ""
-    display_leads = leads[:50]  # Show first 50 leads
+    display_leads = permit_store.get_county_leads(state, county, limit=50)  # Show first 50 leads
     
     for lead in display_leads:
         address = lead.get('address', 'N/A')
@@ -434,7 +430,7 @@ def county_detail(state, county):
         
         permit_type = lead.get('permit_type', 'N/A')
         date = lead.get('date', 'N/A')
-        score = lead.get('score', 0)
+        score = display_score(lead)
         value = lead.get('estimated_value', 'N/A')
         
         leads_html += f"""
@@ -513,7 +509,7 @@ def county_detail(state, county):
         <div class="header">
             <a href="/" class="back-link">← Back to Markets</a>
             <h1>{county_display}</h1>
-            <p class="lead-count">{len(leads):,} active leads</p>
+            <p class="lead-count">{lead_count:,} active leads</p>
         </div>
         {banner}
         <div class="leads-grid">
@@ -556,7 +552,7 @@ def dashboard():
     return render_template('dashboard.html', permits=permits, counties=[f"{sub['state_key']}_{sub['county_key']}" for sub in subscriptions])
 
 if __name__ == '__main__':
-    total_leads = sum(len(county_leads) for state_leads in LEADS.values() for county_leads in state_leads.values())
+    total_leads = permit_store.count_leads()
     print(f"\n🚀 Contractor Leads Backend")
     print(f"📊 {total_leads:,} leads loaded")
     print(f"🔐 Authentication enabled")
@@ -0,0 +1,88 @@
+"""
+ArcGIS REST client - streams features from a FeatureServer/MapServer layer
+Pushes filters into the where clause, projects columns and pages by OBJECTID batches
+"""
+import http_client
+from datetime import datetime
+
+# Metro Nashville Codes - Building Permits layer
+NASHVILLE_BUILDING_PERMITS = "https://maps.nashville.gov/arcgis/rest/services/Codes/BuildingPermits/MapServer/0"
+
+
+def since_clause(date_field, since):
+    """Build a standardized-SQL where clause for records on/after a datetime"""
+    return f"{date_field} >= TIMESTAMP '{since.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+
+def epoch_ms_to_datetime(value):
+    """ArcGIS returns dates as epoch milliseconds"""
+    return datetime.fromtimestamp(value / 1000) if value else None
+
+
+class ArcGISLayer:
+    """A single FeatureServer/MapServer layer"""
+
+    def __init__(self, layer_url, session=None, timeout=30):
+        self.layer_url = layer_url.rstrip('/')
+        self.session = session or http_client.session_for(layer_url)
+        self.timeout = timeout
+        self._metadata = None
+
+    def _request(self, path, params, method='GET'):
+        """Call the layer REST endpoint and surface ArcGIS JSON errors"""
+        url = f"{self.layer_url}{path}"
+        params = dict(params, f='json')
+        if method == 'POST':
+            response = self.session.post(url, data=params, timeout=self.timeout)
+        else:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        # ArcGIS reports query errors with HTTP 200 and an 'error' body
+        if 'error' in data:
+            error = data['error']
+            raise RuntimeError(f"ArcGIS error {error.get('code')}: {error.get('message')}")
+        return data
+
+    def metadata(self):
+        """Layer description (maxRecordCount, objectIdField, ...) - cached per instance"""
+        if self._metadata is None:
+            self._metadata = self._request('', {})
+        return self._metadata
+
+    @property
+    def max_record_count(self):
+        return self.metadata().get('maxRecordCount') or 1000
+
+    def object_ids(self, where='1=1'):
+        """Return (objectIdFieldName, sorted OBJECTIDs) matching the where clause"""
+        data = self._request('/query', {'where': where, 'returnIdsOnly': 'true'})
+        return data.get('objectIdFieldName', 'OBJECTID'), sorted(data.get('objectIds') or [])
+
+    def iter_features(self, where='1=1', out_fields=('*',), batch_size=None):
+        """
+        Yield attribute dicts for every feature matching the where clause
+
+        Pages by OBJECTID batches (returnIdsOnly + objectIds) instead of
+        resultOffset, so there is no 1000-row ceiling and no reliance on
+        server-side pagination support.
+        """
+        id_field, ids = self.object_ids(where)
+        if not ids:
+            return
+
+        batch_size = min(batch_size or self.max_record_count, self.max_record_count)
+        fields = list(out_fields)
+        if fields != ['*'] and id_field not in fields:
+            fields.append(id_field)
+
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            # POST keeps long objectIds lists out of the URL
+            data = self._request('/query', {
+                'objectIds': ','.join(str(oid) for oid in batch),
+                'outFields': ','.join(fields),
+                'returnGeometry': 'false',
+            }, method='POST')
+            for feature in data.get('features', []):
+                yield feature.get('attributes', {})
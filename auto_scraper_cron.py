@@ -20,6 +20,7 @@ from subscription_manager import (
     cleanup_old_seen_permits, save_to_archive
 )
 from email_service import send_permit_email
+import database
 import json
 
 
@@ -48,6 +49,8 @@ def scrape_and_feed():
     
     print(f"   🚀 Starting scrape at {datetime.now().strftime('%H:%M:%S')}")
     
+    database.init_database()
+    
     # Get all active subscribers grouped by city
     subscribers = get_active_subscribers()
     
@@ -115,15 +118,11 @@ def scrape_and_feed():
                     csv_file = save_fresh_dump(city, user_id, new_permits)
                     
                     if csv_file:
-                        # Send email
-                        send_permit_email(
-                            to_email=email,
-                            city=city,
-                            permit_count=len(new_permits),
-                            csv_file=csv_file
-                        )
+                        # Queue email - email_dispatcher.py delivers it
+                        send_permit_email(email, city, len(new_permits), csv_file,
+                                          dedupe_key=f"fresh_permits:{user_id}:{Path(csv_file).name}")
                         
-                        print(f"   📧 Sent to {email}")
+                        print(f"   📥 Queued email for {email}")
                 
                 except Exception as e:
                     print(f"   ❌ Error feeding {email}: {e}")
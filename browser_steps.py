@@ -0,0 +1,183 @@
+"""
+Declarative Selenium steps with explicit waits (replaces fixed time.sleep calls)
+Scrapers describe a portal as a list of steps in config.yaml:
+
+    steps:
+      - {action: open, url: "{base_url}"}
+      - {action: click, by: partial_link_text, selector: search_link}
+      - {action: fill, selector: from_date, value: "{from_date}"}
+      - {action: click, selector: submit}
+      - {action: wait_rows, target: "table tr", min_rows: 2, optional: true}
+
+Every step waits on a DOM condition (element clickable/present, network idle,
+result row count stable) instead of sleeping, and its latency is recorded.
+- selector: name of an entry in the county's `selectors`; target: literal locator
+- by: css (default), xpath, id, name, tag, link_text, partial_link_text
+- values and urls are formatted with the run context (county config + dates)
+- optional: true turns a timeout into a skipped step instead of an error
+"""
+import os
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+STEP_TIMEOUT = float(os.getenv('SELENIUM_STEP_TIMEOUT', 15))
+IDLE_QUIET_SECONDS = float(os.getenv('SELENIUM_IDLE_QUIET_SECONDS', 0.5))  # no new requests for this long
+POLL_SECONDS = 0.1
+
+BY = {
+    'css': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+    'id': By.ID,
+    'name': By.NAME,
+    'tag': By.TAG_NAME,
+    'link_text': By.LINK_TEXT,
+    'partial_link_text': By.PARTIAL_LINK_TEXT,
+}
+
+# readyState, jQuery ajax in flight, ASP.NET UpdatePanel postback (Accela), resources requested so far
+# The resource timing buffer stops at 150 entries, so requests are counted by a
+# PerformanceObserver installed once per page (buffer enlarged where that is unsupported)
+_ACTIVITY_JS = """
+var postback = false;
+try { postback = Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack(); } catch (e) {}
+if (!window.__stepResources) {
+    window.__stepResources = {count: performance.getEntriesByType('resource').length, observed: false};
+    try {
+        new PerformanceObserver(function (list) {
+            window.__stepResources.count += list.getEntries().length;
+        }).observe({type: 'resource'});
+        window.__stepResources.observed = true;
+    } catch (e) {
+        try { performance.setResourceTimingBufferSize(100000); } catch (e2) {}
+    }
+}
+return [document.readyState,
+        window.jQuery ? jQuery.active : 0,
+        postback,
+        window.__stepResources.observed ? window.__stepResources.count
+                                        : performance.getEntriesByType('resource').length];
+"""
+
+_SET_VALUE_JS = """
+arguments[0].value = arguments[1];
+arguments[0].dispatchEvent(new Event('input', {bubbles: true}));
+arguments[0].dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+
+class StepError(Exception):
+    """A required step timed out or failed"""
+
+
+def wait_for_idle(driver, timeout=None, quiet=None):
+    """Page loaded, no ajax/postback in flight and no new requests for `quiet` seconds"""
+    timeout = STEP_TIMEOUT if timeout is None else timeout
+    quiet = IDLE_QUIET_SECONDS if quiet is None else quiet
+    deadline = time.monotonic() + timeout
+    last_count, stable_since = None, time.monotonic()
+
+    while True:
+        ready, ajax, postback, count = driver.execute_script(_ACTIVITY_JS)
+        now = time.monotonic()
+        if count != last_count or ready != 'complete' or ajax or postback:
+            last_count, stable_since = count, now
+        elif now - stable_since >= quiet:
+            return
+        if now >= deadline:
+            raise TimeoutException(f"page not idle after {timeout:g}s")
+        time.sleep(POLL_SECONDS)
+
+
+def wait_for_rows(driver, by, target, min_rows=1, timeout=None, quiet=None):
+    """Wait until at least min_rows elements match and the count stops changing; returns the count"""
+    timeout = STEP_TIMEOUT if timeout is None else timeout
+    quiet = IDLE_QUIET_SECONDS if quiet is None else quiet
+    deadline = time.monotonic() + timeout
+    last_count, stable_since = None, time.monotonic()
+
+    while True:
+        count = len(driver.find_elements(by, target))
+        now = time.monotonic()
+        if count != last_count:
+            last_count, stable_since = count, now
+        elif count >= min_rows and now - stable_since >= quiet:
+            return count
+        if now >= deadline:
+            raise TimeoutException(f"{target}: {count} rows after {timeout:g}s (wanted {min_rows})")
+        time.sleep(POLL_SECONDS)
+
+
+def _locator(step, selectors):
+    by = BY[step.get('by', 'css')]
+    if 'selector' in step:
+        return by, selectors[step['selector']]
+    return by, step['target']
+
+
+def _step_name(step):
+    return f"{step['action']} {step.get('selector') or step.get('target') or step.get('url', '')}".strip()
+
+
+def run_step(driver, step, context, timeout):
+    """Execute one step, waiting on its DOM condition"""
+    action = step['action']
+    timeout = step.get('timeout', timeout)
+    wait = WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS)
+    selectors = context.get('selectors') or {}
+
+    if action == 'open':
+        driver.get(step['url'].format(**context))
+        wait_for_idle(driver, timeout)
+    elif action == 'click':
+        wait.until(EC.element_to_be_clickable(_locator(step, selectors))).click()
+        if step.get('idle', True):
+            wait_for_idle(driver, timeout)
+    elif action == 'fill':
+        element = wait.until(EC.visibility_of_element_located(_locator(step, selectors)))
+        element.clear()
+        element.send_keys(str(step['value']).format(**context))
+    elif action == 'set_value':
+        # For date pickers that ignore typed input
+        element = wait.until(EC.presence_of_element_located(_locator(step, selectors)))
+        driver.execute_script(_SET_VALUE_JS, element, str(step['value']).format(**context))
+    elif action == 'wait':
+        wait.until(EC.presence_of_element_located(_locator(step, selectors)))
+    elif action == 'wait_idle':
+        wait_for_idle(driver, timeout, step.get('quiet'))
+    elif action == 'wait_rows':
+        by, target = _locator(step, selectors)
+        wait_for_rows(driver, by, target, step.get('min_rows', 1), timeout, step.get('quiet'))
+    else:
+        raise StepError(f"Unknown step action: {action}")
+
+
+def run_steps(driver, steps, context=None, timeout=None):
+    """
+    Run steps in order; returns [{'step', 'seconds', 'ok'}] for latency logging
+    Raises StepError when a required step times out.
+    """
+    context = context or {}
+    timeout = STEP_TIMEOUT if timeout is None else timeout
+    timings = []
+
+    for step in steps:
+        name = _step_name(step)
+        started = time.monotonic()
+        ok = True
+        try:
+            run_step(driver, step, context, timeout)
+        except TimeoutException as e:
+            if not step.get('optional'):
+                raise StepError(f"Step '{name}' timed out after {time.monotonic() - started:.1f}s: {e.msg or e}") from e
+            ok = False
+        timings.append({'step': name, 'seconds': time.monotonic() - started, 'ok': ok})
+
+    return timings
+
+
+def format_timings(timings):
+    """One-line summary: 'open {base_url} 1.2s, click search_link 0.4s, ...'"""
+    return ', '.join(f"{t['step']} {t['seconds']:.1f}s{'' if t['ok'] else ' (timed out)'}" for t in timings)
@@ -42,6 +42,18 @@ SMTP_USERNAME = os.getenv('SMTP_USERNAME')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
 FROM_EMAIL = os.getenv('FROM_EMAIL')
 
+# Bulk delivery: worker threads, messages per SMTP connection before reconnecting
+SMTP_WORKERS = int(os.getenv('SMTP_WORKERS', 8))
+SMTP_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MESSAGES_PER_CONNECTION', 100))
+# Messages/second per SMTP provider (SMTP_RATE_PER_SECOND overrides for the configured host)
+SMTP_PROVIDER_RATES = {
+    'smtp.gmail.com': 1,
+    'smtp.sendgrid.net': 50,
+    'smtp.mailgun.org': 20,
+    'email-smtp.us-east-1.amazonaws.com': 14,
+}
+SMTP_RATE_PER_SECOND = float(os.getenv('SMTP_RATE_PER_SECOND', SMTP_PROVIDER_RATES.get(SMTP_HOST, 5)))
+
 # Flask
 SECRET_KEY = os.getenv('SECRET_KEY')
 FLASK_ENV = os.getenv('FLASK_ENV', 'development')
@@ -49,6 +61,10 @@ PORT = int(os.getenv('PORT', 8003))
 
 # AI Model
 HF_MODEL_NAME = os.getenv('HF_MODEL_NAME', 'distilbert-base-uncased-finetuned-sst-2-english')
+HF_BATCH_SIZE = int(os.getenv('HF_BATCH_SIZE', 32))
+URGENCY_CACHE_PATH = os.getenv('URGENCY_CACHE_PATH', 'urgency_cache.db')
+SCORER_BACKEND = os.getenv('SCORER_BACKEND', 'torch')  # torch | onnx | heuristic
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', 'models/onnx-int8')
 
 # Scraping
 SCRAPE_TIME = os.getenv('SCRAPE_TIME', '02:00')
@@ -10,15 +10,16 @@ Usage:
 - python county_permits_scraper.py [--sort]  # --sort to generate sorted versions
 - Or schedule with cron: 0 6 * * * /usr/bin/python3 /path/to/county_permits_scraper.py
 
-Output: CSV files in data/ directory with timestamp and optional sorted versions
+Output: gzip CSV parts in data/archive/county=<slug>/date=<day>/ (see permit_archive.py)
+and, with --sort, latest sorted views in data/
 """
 
 import os
 import sys
-import time
 import random
 import logging
 import argparse
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 import csv
@@ -27,15 +28,12 @@ import yaml
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+import http_cache
+import html_parse
+from driver_pool import DriverPool
+from fetch_engine import FetchTask, run_concurrent
+from browser_steps import run_steps, format_timings
+import permit_archive
 
 # Setup logging
 logging.basicConfig(
@@ -50,6 +48,11 @@ class CountyPermitScraper:
         self.user_agents = self.config['global']['user_agents']
         self.delays = self.config['global']['delays']
         self.csv_headers = self.config['global']['csv_headers']
+        self.workers = int(os.getenv('COUNTY_WORKERS', self.config['global'].get('workers', 3)))
+        self.cycle_deadline = float(self.config['global'].get('cycle_deadline', 1800))
+        self.pool = None
+        self.closed = False  # set by close(); stragglers get no new pool
+        self._pool_lock = threading.Lock()
         self.setup_directories()
 
     def load_config(self, config_path):
@@ -65,248 +68,160 @@ class CountyPermitScraper:
         Path('logs').mkdir(exist_ok=True)
 
     def get_driver(self):
-        """Setup Chrome driver with options."""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(f"--user-agent={random.choice(self.user_agents)}")
-        chrome_options.add_argument("--window-size=1920,1080")
-
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": random.choice(self.user_agents)})
-        return driver
-
-    def scrape_bexar(self):
-        """Scrape Bexar County (San Antonio) permits."""
-        county_config = self.config['counties']['bexar']
+        """Check out a browser from the shared pool (hand it back with release_driver)."""
+        with self._pool_lock:
+            if self.closed:
+                raise RuntimeError("Scraper is closed (cycle deadline hit)")
+            if self.pool is None:
+                self.pool = DriverPool(size=self.workers, user_agents=self.user_agents)
+            pool = self.pool
+        return pool.acquire()
+
+    def release_driver(self, driver):
+        """Return a browser to the pool for the next county."""
+        pool = self.pool
+        if pool is None:
+            driver.quit()  # pool already closed (cycle deadline hit)
+        else:
+            pool.release(driver)
+
+    def close(self):
+        """Quit every pooled browser; get_driver() raises until the next run_all()."""
+        with self._pool_lock:
+            self.closed = True
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.close()
+
+    def results_html(self, driver):
+        """Rendered results page; recorded to http_cache in record mode for offline parser work"""
+        html = driver.page_source
+        if http_cache.MODE == 'record':
+            http_cache.save_page(driver.current_url, html)
+        return html
+
+    def scrape_county(self, slug, county_name, parse_results):
+        """Run a county's config.yaml steps in a pooled browser and save the parsed results."""
+        county_config = self.config['counties'][slug]
         driver = self.get_driver()
 
         try:
-            logging.info("Starting Bexar County scrape")
-            driver.get(county_config['base_url'])
-
-            # Navigate to search permits
-            search_link = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, county_config['selectors']['search_link']))
-            )
-            search_link.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
+            logging.info(f"Starting {county_name} scrape")
 
-            # Set date range to last 7 days
+            # Search the last 7 days
             today = datetime.now()
             week_ago = today - timedelta(days=7)
+            context = dict(
+                county_config,
+                from_date=week_ago.strftime(county_config['date_format']),
+                to_date=today.strftime(county_config['date_format'])
+            )
 
-            from_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['from_date'])
-            from_date_input.clear()
-            from_date_input.send_keys(week_ago.strftime(county_config['date_format']))
-
-            to_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['to_date'])
-            to_date_input.clear()
-            to_date_input.send_keys(today.strftime(county_config['date_format']))
-
-            # Submit search
-            submit_btn = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['submit'])
-            submit_btn.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
+            timings = run_steps(driver, county_config['steps'], context)
+            logging.info(f"{county_name} steps: {format_timings(timings)}")
 
-            # Parse results
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            permits = self.parse_accela_results(soup, 'Bexar County')
+            html = self.results_html(driver)
+            permits = parse_results(html, county_name)
 
-            self.save_to_csv(permits, 'bexar')
-            logging.info(f"Scraped {len(permits)} permits from Bexar County")
+            self.save_to_csv(permits, slug)
+            logging.info(f"Scraped {len(permits)} permits from {county_name}")
 
         except Exception as e:
-            logging.error(f"Error scraping Bexar County: {e}")
+            logging.error(f"Error scraping {county_name}: {e}")
         finally:
-            driver.quit()
-
-    def scrape_hamilton(self):
-        """Scrape Hamilton County (Chattanooga) permits."""
-        county_config = self.config['counties']['hamilton']
-        driver = self.get_driver()
+            self.release_driver(driver)
 
+    def scrape_accela(self, slug, county_name):
+        """Search an Accela portal over plain HTTP (export or paged grid); True if permits were saved."""
+        county_config = self.config['counties'][slug]
         try:
-            logging.info("Starting Hamilton County scrape")
-            driver.get(county_config['base_url'])
-
-            search_link = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, county_config['selectors']['search_link']))
-            )
-            search_link.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
+            # accela_client needs lxml; without it the browser steps still work
+            from accela_client import AccelaPortal
+        except ImportError as e:
+            logging.warning(f"Accela HTTP search unavailable for {county_name} ({e}), using browser")
+            return False
+        portal = AccelaPortal(county_config.get('base_url') or county_config['fallback_url'],
+                              module=county_config.get('accela_module', 'Building'))
 
+        try:
             today = datetime.now()
-            week_ago = today - timedelta(days=7)
-
-            from_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['from_date'])
-            from_date_input.clear()
-            from_date_input.send_keys(week_ago.strftime(county_config['date_format']))
-
-            to_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['to_date'])
-            to_date_input.clear()
-            to_date_input.send_keys(today.strftime(county_config['date_format']))
+            permits = portal.search(today - timedelta(days=7), today, county_config['date_format'])
+        except Exception as e:
+            logging.warning(f"Accela HTTP search failed for {county_name}, falling back to browser: {e}")
+            return False
 
-            submit_btn = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['submit'])
-            submit_btn.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
+        if not permits:
+            logging.info(f"Accela HTTP search found nothing for {county_name}, falling back to browser")
+            return False
 
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            permits = self.parse_accela_results(soup, 'Hamilton County')
+        permits = [{header: permit.get(header, '') for header in self.csv_headers} for permit in permits]
+        self.save_to_csv(permits, slug)
+        logging.info(f"Scraped {len(permits)} permits from {county_name} in {portal.requests_made} requests")
+        return True
 
-            self.save_to_csv(permits, 'hamilton')
-            logging.info(f"Scraped {len(permits)} permits from Hamilton County")
+    def scrape_bexar(self):
+        """Scrape Bexar County (San Antonio) permits."""
+        if not self.scrape_accela('bexar', 'Bexar County'):
+            self.scrape_county('bexar', 'Bexar County', self.parse_accela_results)
 
-        except Exception as e:
-            logging.error(f"Error scraping Hamilton County: {e}")
-        finally:
-            driver.quit()
+    def scrape_hamilton(self):
+        """Scrape Hamilton County (Chattanooga) permits."""
+        if not self.scrape_accela('hamilton', 'Hamilton County'):
+            self.scrape_county('hamilton', 'Hamilton County', self.parse_accela_results)
 
     def scrape_davidson(self):
         """Scrape Davidson County (Nashville) permits."""
-        county_config = self.config['counties']['davidson']
-        driver = self.get_driver()
-
-        try:
-            logging.info("Starting Davidson County scrape")
-            driver.get(county_config['base_url'])
-            time.sleep(5)  # Wait for JS to load
-
-            # Click Advanced Search
-            advanced_search = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.LINK_TEXT, county_config['selectors']['advanced_search_link']))
-            )
-            advanced_search.click()
-            time.sleep(3)
-
-            # Select "Issued" status
-            issued_radio = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['status_issued'])
-            issued_radio.click()
-
-            # Set issued date range to last 7 days
-            today = datetime.now()
-            week_ago = today - timedelta(days=7)
-
-            # Use JavaScript to set the date values
-            driver.execute_script(f"document.getElementById('issuedDateFrom').value = '{week_ago.strftime('%m/%d/%Y')}';")
-            driver.execute_script(f"document.getElementById('issuedDateTo').value = '{today.strftime('%m/%d/%Y')}';")
-            time.sleep(2)  # Wait for date processing
-            time.sleep(1)  # Wait for date picker to close
-
-            # Click outside to close any date pickers
-            driver.find_element(By.TAG_NAME, 'body').click()
-            time.sleep(1)
-
-            # Submit search
-            search_btn = driver.find_element(By.XPATH, f"//button[text()='{county_config['selectors']['search_button']}']")
-            search_btn.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
-
-            # Parse results
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            permits = self.parse_nashville_results(soup, 'Davidson County')
-
-            self.save_to_csv(permits, 'davidson')
-            logging.info(f"Scraped {len(permits)} permits from Davidson County")
-
-        except Exception as e:
-            logging.error(f"Error scraping Davidson County: {e}")
-        finally:
-            driver.quit()
+        self.scrape_county('davidson', 'Davidson County', self.parse_nashville_results)
 
     def scrape_travis(self):
         """Scrape Travis County (Austin) permits."""
-        county_config = self.config['counties']['travis']
-        driver = self.get_driver()
-
-        try:
-            logging.info("Starting Travis County scrape")
-            driver.get(county_config['fallback_url'])
-
-            search_link = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, county_config['selectors']['search_link']))
-            )
-            search_link.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
-
-            today = datetime.now()
-            week_ago = today - timedelta(days=7)
-
-            from_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['from_date'])
-            from_date_input.clear()
-            from_date_input.send_keys(week_ago.strftime(county_config['date_format']))
-
-            to_date_input = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['to_date'])
-            to_date_input.clear()
-            to_date_input.send_keys(today.strftime(county_config['date_format']))
-
-            submit_btn = driver.find_element(By.CSS_SELECTOR, county_config['selectors']['submit'])
-            submit_btn.click()
-            time.sleep(random.uniform(*self.delays['between_actions']))
-
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            permits = self.parse_accela_results(soup, 'Travis County')
+        if not self.scrape_accela('travis', 'Travis County'):
+            self.scrape_county('travis', 'Travis County', self.parse_accela_results)
 
-            self.save_to_csv(permits, 'travis')
-            logging.info(f"Scraped {len(permits)} permits from Travis County")
-
-        except Exception as e:
-            logging.error(f"Error scraping Travis County: {e}")
-        finally:
-            driver.quit()
-
-    def parse_accela_results(self, soup, county_name):
-        """Parse Accela search results."""
+    def parse_accela_results(self, html, county_name):
+        """Parse Accela search results (the results grid, else the first table)."""
         permits = []
 
-        table = soup.find('table')
-        if table:
-            rows = table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 6:
-                    permit = {
-                        'permit_number': cols[0].get_text().strip(),
-                        'issue_date': cols[1].get_text().strip(),
-                        'address': cols[2].get_text().strip(),
-                        'work_type': cols[3].get_text().strip(),
-                        'contractor': cols[4].get_text().strip() if len(cols) > 4 else '',
-                        'valuation': cols[5].get_text().strip() if len(cols) > 5 else ''
-                    }
-                    permits.append(permit)
+        rows = (html_parse.table_rows(html, table='gdvPermitList', cells=('td',), min_cells=6)
+                or html_parse.table_rows(html, cells=('td',), min_cells=6, first_table_only=True))
+        for cols in rows:
+            permit = {
+                'permit_number': cols[0],
+                'issue_date': cols[1],
+                'address': cols[2],
+                'work_type': cols[3],
+                'contractor': cols[4],
+                'valuation': cols[5]
+            }
+            permits.append(permit)
 
         return permits
 
-    def parse_nashville_results(self, soup, county_name):
+    def parse_nashville_results(self, html, county_name):
         """Parse Nashville ePermits search results."""
         permits = []
 
         # Look for results in various formats
         # First try table format
-        table = soup.find('table')
-        if table:
-            rows = table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) >= 4:
-                    permit = {
-                        'permit_number': cols[0].get_text().strip(),
-                        'issue_date': cols[1].get_text().strip() if len(cols) > 1 else '',
-                        'address': cols[2].get_text().strip() if len(cols) > 2 else '',
-                        'work_type': cols[3].get_text().strip() if len(cols) > 3 else '',
-                        'contractor': cols[4].get_text().strip() if len(cols) > 4 else '',
-                        'valuation': cols[5].get_text().strip() if len(cols) > 5 else ''
-                    }
-                    permits.append(permit)
+        for cols in html_parse.table_rows(html, cells=('td',), min_cells=4, first_table_only=True):
+            permit = {
+                'permit_number': cols[0],
+                'issue_date': cols[1],
+                'address': cols[2],
+                'work_type': cols[3],
+                'contractor': cols[4] if len(cols) > 4 else '',
+                'valuation': cols[5] if len(cols) > 5 else ''
+            }
+            permits.append(permit)
 
         # If no table, look for divs or other structures
         if not permits:
             # Look for permit cards or list items
-            permit_elements = soup.find_all(['div', 'li'], class_=re.compile(r'permit|result|record'))
+            doc = html_parse.document(html)
+            class_pattern = re.compile(r'permit|result|record')
+            permit_elements = html_parse.find_by_class(doc, class_pattern, ('div', 'li'))
             for elem in permit_elements:
-                permit_text = elem.get_text()
+                permit_text = html_parse.text(elem)
                 # Try to extract permit info from text
                 # This is a fallback - Nashville's format may be different
                 lines = permit_text.split('\n')
@@ -345,31 +260,25 @@ class CountyPermitScraper:
         return permits
 
     def save_to_csv(self, permits, county_slug, generate_sorted=False):
-        """Save permits to CSV file with timestamp."""
+        """Add permits to the county's archive partition for today."""
         if not permits:
             return
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_filename = f"data/{county_slug}_permits_{timestamp}.csv"
-
         # Sort by issue date descending (newest first)
         try:
             permits.sort(key=lambda x: datetime.strptime(x['issue_date'], "%m/%d/%Y"), reverse=True)
         except ValueError:
             logging.warning(f"Could not sort permits for {county_slug} by date")
 
-        with open(base_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=self.csv_headers)
-            writer.writeheader()
-            writer.writerows(permits)
-
-        logging.info(f"Saved {len(permits)} permits to {base_filename}")
+        rows = [{field: permit.get(field, '') for field in self.csv_headers} for permit in permits]
+        path = permit_archive.append(rows, county_slug)
+        logging.info(f"Saved {len(permits)} permits to {path}")
 
         if generate_sorted:
-            self.generate_sorted_versions(permits, county_slug, timestamp)
+            self.generate_sorted_versions(rows, county_slug)
 
-    def generate_sorted_versions(self, permits, county_slug, timestamp):
-        """Generate sorted versions of the CSV."""
+    def generate_sorted_versions(self, permits, county_slug):
+        """Write sorted views of the latest pull (overwritten each run, not accumulated)."""
         sort_keys = {
             'date': lambda x: datetime.strptime(x['issue_date'], "%m/%d/%Y") if x['issue_date'] else datetime.min,
             'valuation': lambda x: float(re.sub(r'[^\d.]', '', x['valuation'])) if x['valuation'] else 0,
@@ -380,27 +289,48 @@ class CountyPermitScraper:
 
         for sort_name, sort_func in sort_keys.items():
             sorted_permits = sorted(permits, key=sort_func, reverse=(sort_name in ['date', 'valuation']))
-            filename = f"data/{county_slug}_permits_{timestamp}_sorted_{sort_name}.csv"
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            filename = f"data/{county_slug}_permits_sorted_{sort_name}.csv"
+            tmp_filename = f"{filename}.tmp"
+            with open(tmp_filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=self.csv_headers)
                 writer.writeheader()
                 writer.writerows(sorted_permits)
+            os.replace(tmp_filename, filename)
             logging.info(f"Saved sorted {sort_name} version to {filename}")
 
     def run_all(self, generate_sorted=False):
-        """Run scrapers for all counties."""
+        """Run scrapers for all counties in parallel, sharing one browser pool."""
         logging.info("Starting full scrape cycle")
+        with self._pool_lock:
+            self.closed = False
+
+        scrapers = {
+            'bexar': self.scrape_bexar,
+            'hamilton': self.scrape_hamilton,
+            'davidson': self.scrape_davidson,
+            'travis': self.scrape_travis,
+        }
+        # Counties on the same portal (Accela) are capped by the per-host limit
+        # and their start times staggered by the between_counties delay
+        tasks = []
+        per_host = {}
+        for slug, scrape in scrapers.items():
+            county_config = self.config['counties'][slug]
+            url = county_config.get('base_url') or county_config.get('fallback_url')
+            host = urlparse(url).netloc
+            stagger = sum(random.uniform(*self.delays['between_counties']) for _ in range(per_host.get(host, 0)))
+            per_host[host] = per_host.get(host, 0) + 1
+            tasks.append(FetchTask(slug, scrape, host=host, start_after=stagger))
 
-        self.scrape_bexar()
-        time.sleep(random.uniform(*self.delays['between_counties']))
-
-        self.scrape_hamilton()
-        time.sleep(random.uniform(*self.delays['between_counties']))
-
-        self.scrape_davidson()
-        time.sleep(random.uniform(*self.delays['between_counties']))
-
-        self.scrape_travis()
+        try:
+            for slug, _, error, elapsed in run_concurrent(tasks, max_workers=self.workers,
+                                                          deadline=self.cycle_deadline):
+                if error:
+                    logging.error(f"{slug} scrape failed after {elapsed:.0f}s: {error}")
+                else:
+                    logging.info(f"{slug} scrape finished in {elapsed:.0f}s")
+        finally:
+            self.close()
 
         logging.info("Completed full scrape cycle")
 
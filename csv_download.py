@@ -0,0 +1,171 @@
+"""
+Streaming CSV downloads - parse rows while the file arrives
+Conditional GET (ETag/If-Modified-Since) skips unchanged files, an on-disk
+spool copy allows HTTP Range resume after a dropped connection
+"""
+import csv
+import io
+import os
+import fcntl
+from pathlib import Path
+import http_client
+from source_state import get_state, set_state
+
+# San Antonio OpenGov - Accela submitted permits extract
+SAN_ANTONIO_PERMITS_CSV = 'https://data.sanantonio.gov/dataset/05012dcb-ba1b-4ade-b5f3-7403bc7f52eb/resource/fbb7202e-c6c1-475b-849e-c5c2cfb65833/download/accelasubmitpermitsextract.csv'
+
+SPOOL_DIR = Path(os.getenv('CSV_SPOOL_DIR', Path(__file__).parent / 'leads_db' / 'downloads'))
+CHUNK_SIZE = int(os.getenv('CSV_CHUNK_SIZE', 64 * 1024))
+
+
+class _ChunkStream(io.RawIOBase):
+    """File-like wrapper over an iterator of byte chunks"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class CSVSource:
+    """A remote CSV file streamed row by row, with validators kept between runs"""
+
+    def __init__(self, url, name, session=None, timeout=60):
+        self.url = url
+        self.session = session or http_client.session_for(url)
+        self.timeout = timeout
+        self.path = SPOOL_DIR / f"{name}.csv"
+        self.part_path = SPOOL_DIR / f"{name}.csv.part"
+        self.lock_path = SPOOL_DIR / f"{name}.lock"
+        # Per consumer: validators and watermark belong to whoever reads this spool
+        self.state_key = f"csv:{name}:{url}"
+        self.not_modified = False
+        self.complete = False
+        self.pending_watermark = None
+
+    def _state(self):
+        return get_state(self.state_key, {})
+
+    def _update_state(self, **values):
+        state = self._state()
+        state.update(values)
+        set_state(self.state_key, state)
+
+    @property
+    def watermark(self):
+        """Last ingested date (ISO string) committed by the caller"""
+        return self._state().get('watermark')
+
+    def _read_file(self, path):
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _open(self, headers):
+        # identity encoding keeps Range offsets in step with the bytes on disk
+        headers = dict(headers, **{'Accept-Encoding': 'identity'})
+        return self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+
+    def _iter_chunks(self, skip_unchanged):
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        # One reader of a spool at a time - concurrent runs of the same consumer queue up
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield from self._download_chunks(skip_unchanged)
+
+    def _download_chunks(self, skip_unchanged):
+        state = self._state()
+
+        resume_from = self.part_path.stat().st_size if self.part_path.exists() else 0
+        partial_validator = state.get('partial_etag') or state.get('partial_last_modified')
+        headers = {}
+        if resume_from and partial_validator:
+            headers = {'Range': f"bytes={resume_from}-", 'If-Range': partial_validator}
+        elif self.path.exists():
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+
+        response = self._open(headers)
+        if response.status_code == 416:
+            # Spool is stale or already complete - start over
+            response.close()
+            resume_from = 0
+            response = self._open({})
+
+        with response:
+            if response.status_code == 304:
+                self.not_modified = True
+                print(f"   ♻️  {self.path.name} unchanged since last download")
+                if not (skip_unchanged and state.get('ingested')):
+                    yield from self._read_file(self.path)
+                self.complete = True
+                return
+
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+
+            if response.status_code == 206:
+                print(f"   ⏩ Resuming {self.path.name} at {resume_from:,} bytes")
+                yield from self._read_file(self.part_path)
+                mode = 'ab'
+            else:
+                mode = 'wb'
+                self._update_state(partial_etag=etag, partial_last_modified=last_modified)
+
+            with open(self.part_path, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    yield chunk
+
+        os.replace(self.part_path, self.path)
+        self._update_state(etag=etag, last_modified=last_modified, ingested=False,
+                           partial_etag=None, partial_last_modified=None)
+        self.complete = True
+
+    def iter_rows(self, skip_unchanged=False):
+        """
+        Yield CSV rows as dicts while the download streams in
+
+        With skip_unchanged, a 304 for a file that was already ingested yields
+        nothing. Stopping early leaves the spool in place to resume next time.
+        """
+        self.not_modified = False
+        self.complete = False
+        raw = io.BufferedReader(_ChunkStream(self._iter_chunks(skip_unchanged)), CHUNK_SIZE)
+        text = io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline='')
+        yield from csv.DictReader(text)
+
+    def commit(self, watermark=None):
+        """
+        Mark the file as ingested and store the newest date seen
+
+        Ignored unless the last iter_rows() read the whole file - rows are not
+        date ordered, so a partial read cannot advance the watermark.
+        """
+        if not self.complete:
+            return
+        watermark = watermark or self.pending_watermark
+        values = {'ingested': True}
+        if watermark and watermark > (self.watermark or ''):
+            values['watermark'] = watermark
+        self._update_state(**values)
+        self.pending_watermark = None
@@ -4,27 +4,91 @@ Handles user accounts, subscriptions, and payments
 """
 
 import os
+import json
 import sqlite3
 import hashlib
 import secrets
+import threading
 from datetime import datetime, timedelta
 from contextlib import contextmanager
 
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'contractor_leads.db')
 
+# Connection tuning
+DB_BUSY_TIMEOUT = float(os.getenv('DB_BUSY_TIMEOUT', 10))  # seconds to wait on the writer lock
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', 256))  # prepared statements kept per connection
+
+# One connection per thread (gunicorn worker thread / scheduler thread)
+_local = threading.local()
+
+def _connect():
+    """Open a tuned connection: WAL so readers never wait on the writer"""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=DB_BUSY_TIMEOUT, cached_statements=DB_STATEMENT_CACHE)
+    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+def get_connection():
+    """This thread's pooled connection (reopened after fork or a DATABASE_PATH change)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid() or _local.path != DATABASE_PATH:
+        conn = _connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.path = DATABASE_PATH
+        _local.depth = 0
+    return conn
+
+def close_connection():
+    """Close this thread's pooled connection"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
 @contextmanager
 def get_db():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    """
+    Context manager for database connections
+
+    Reuses the thread's pooled connection. Nested calls join the outer
+    transaction; only the outermost block commits or rolls back.
+    """
+    conn = get_connection()
+    _local.depth += 1
     try:
         yield conn
-        conn.commit()
+        if _local.depth == 1:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if _local.depth == 1:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        _local.depth -= 1
+
+def init_app(app):
+    """Request-scoped connection: open it up front, never leak a transaction to the next request"""
+    @app.before_request
+    def _open_db_connection():
+        get_connection()
+
+    @app.teardown_request
+    def _release_db_connection(exc=None):
+        conn = getattr(_local, 'conn', None)
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+        _local.depth = 0
+
+# email_queue columns added for the dispatcher (migrated onto older databases)
+EMAIL_QUEUE_COLUMNS = {
+    'to_email': 'TEXT',
+    'payload': 'TEXT',
+    'attempts': 'INTEGER DEFAULT 0',
+    'lease_until': 'TIMESTAMP',
+    'dedupe_key': 'TEXT',
+}
 
 def init_database():
     """Initialize database with required tables"""
@@ -105,10 +169,23 @@ def init_database():
                 sent_at TIMESTAMP,
                 error_message TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                to_email TEXT,
+                payload TEXT,
+                attempts INTEGER DEFAULT 0,
+                lease_until TIMESTAMP,
+                dedupe_key TEXT,
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
         
+        # Dispatcher columns for queues created before email_dispatcher existed
+        existing = {row['name'] for row in cursor.execute('PRAGMA table_info(email_queue)')}
+        for column, definition in EMAIL_QUEUE_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE email_queue ADD COLUMN {column} {definition}')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_queue_due ON email_queue (status, scheduled_for)')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_email_queue_dedupe ON email_queue (dedupe_key)')
+        
         print("✅ Database initialized successfully")
 
 # User management functions
@@ -278,20 +355,32 @@ def get_user_payments(user_id):
         return cursor.fetchall()
 
 # Email queue management
-def queue_email(user_id, email_type, subject, body, scheduled_for=None):
-    """Add email to queue"""
+# Lifecycle: pending -> sending (leased by email_dispatcher) -> sent | pending (retry) | dead
+def queue_email(user_id, email_type, subject, body, scheduled_for=None,
+                to_email=None, payload=None, dedupe_key=None):
+    """Add email to queue (returns None if dedupe_key was already queued)"""
     if scheduled_for is None:
         scheduled_for = datetime.now()
     
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            '''INSERT INTO email_queue 
-               (user_id, email_type, subject, body, scheduled_for)
-               VALUES (?, ?, ?, ?, ?)''',
-            (user_id, email_type, subject, body, scheduled_for)
+            '''INSERT OR IGNORE INTO email_queue 
+               (user_id, email_type, subject, body, scheduled_for, to_email, payload, dedupe_key)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (user_id, email_type, subject, body, scheduled_for, to_email,
+             json.dumps(payload) if payload is not None else None, dedupe_key)
         )
-        return cursor.lastrowid
+        return cursor.lastrowid if cursor.rowcount else None
+
+def queue_email_to_address(to_email, email_type, subject, body, **kwargs):
+    """
+    Queue an email for a recipient known only by address (subscription_manager
+    ids are not users.id); linked to the matching users row if any, else 0
+    """
+    user = get_user_by_email(to_email)
+    return queue_email(user['id'] if user else 0, email_type, subject, body,
+                       to_email=to_email, **kwargs)
 
 def get_pending_emails():
     """Get emails ready to send"""
@@ -305,13 +394,38 @@ def get_pending_emails():
         )
         return cursor.fetchall()
 
+def claim_emails(limit=50, lease_seconds=300):
+    """
+    Lease a batch of due emails in one UPDATE ... RETURNING statement
+    
+    Picks pending rows that are due plus 'sending' rows whose lease ran out
+    (a dispatcher died mid-batch). Each claim counts as an attempt.
+    """
+    now = datetime.now()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE email_queue
+               SET status = 'sending', lease_until = ?, attempts = attempts + 1
+               WHERE id IN (
+                   SELECT id FROM email_queue
+                   WHERE (status = 'pending' AND scheduled_for <= ?)
+                      OR (status = 'sending' AND lease_until < ?)
+                   ORDER BY scheduled_for ASC
+                   LIMIT ?
+               )
+               RETURNING *''',
+            (now + timedelta(seconds=lease_seconds), now, now, limit)
+        )
+        return cursor.fetchall()
+
 def mark_email_sent(email_id):
     """Mark email as sent"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
             '''UPDATE email_queue 
-               SET status = 'sent', sent_at = ?
+               SET status = 'sent', sent_at = ?, lease_until = NULL
                WHERE id = ?''',
             (datetime.now(), email_id)
         )
@@ -327,6 +441,47 @@ def mark_email_failed(email_id, error_message):
             (error_message, email_id)
         )
 
+def retry_email(email_id, error_message, retry_at):
+    """Release a leased email back to pending, due again at retry_at"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE email_queue 
+               SET status = 'pending', scheduled_for = ?, lease_until = NULL, error_message = ?
+               WHERE id = ?''',
+            (retry_at, error_message, email_id)
+        )
+
+def mark_email_dead(email_id, error_message):
+    """Dead-letter an email (permanent error or out of attempts)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE email_queue 
+               SET status = 'dead', lease_until = NULL, error_message = ?
+               WHERE id = ?''',
+            (error_message, email_id)
+        )
+
+def requeue_dead_emails():
+    """Send dead-lettered emails again (after fixing the cause)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''UPDATE email_queue 
+               SET status = 'pending', attempts = 0, scheduled_for = ?
+               WHERE status = 'dead' ''',
+            (datetime.now(),)
+        )
+        return cursor.rowcount
+
+def get_email_queue_stats():
+    """Number of queued emails per status"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT status, COUNT(*) FROM email_queue GROUP BY status')
+        return {status: count for status, count in cursor.fetchall()}
+
 # Admin functions
 def get_all_users():
     """Get all users (admin only)"""
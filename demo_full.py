@@ -3,14 +3,10 @@
 DEMO MODE - Full functionality without credentials
 Shows: Scraping simulation, AI scoring, PDF generation, email preview
 """
-from flask import Flask, render_template, send_file, jsonify
+from flask import Flask, render_template, jsonify
 from datetime import datetime
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+from pdf_reports import render_pdf, send_pdf
+from scoring_engine import score_permits, DEMO_PROFILE
 
 app = Flask(__name__)
 app.secret_key = 'demo-secret-key'
@@ -98,99 +94,12 @@ def get_demo_permits():
     ]
 
 def score_permit_demo(permit):
-    """Demo AI scoring (mimics real AI scorer)"""
-    # Job size score
-    value = permit.get('estimated_value', 0)
-    if value >= 500000:
-        size_score = 90
-    elif value >= 200000:
-        size_score = 75
-    elif value >= 100000:
-        size_score = 60
-    else:
-        size_score = 45
-    
-    # Location score
-    address = permit.get('address', '').lower()
-    if 'nashville' in address or 'broadway' in address:
-        location_score = 90
-    elif 'murfreesboro' in address or 'gallatin' in address:
-        location_score = 75
-    else:
-        location_score = 60
-    
-    # Type score
-    permit_type = permit.get('permit_type', '').lower()
-    if 'new construction' in permit_type or 'commercial' in permit_type:
-        type_score = 85
-    elif 'addition' in permit_type or 'renovation' in permit_type:
-        type_score = 70
-    else:
-        type_score = 55
-    
-    # Urgency score (simulated)
-    urgency_score = 75
-    
-    # Calculate weighted score
-    total_score = (
-        size_score * 0.35 +
-        location_score * 0.25 +
-        urgency_score * 0.20 +
-        type_score * 0.20
-    )
-    
-    permit['score'] = round(total_score, 1)
-    permit['score_breakdown'] = {
-        'size_score': size_score,
-        'location_score': location_score,
-        'urgency_score': urgency_score,
-        'type_score': type_score
-    }
-    
-    return permit
+    """Demo AI scoring (mimics real AI scorer) - see scoring_engine.DEMO_PROFILE"""
+    return score_permits(DEMO_PROFILE, [permit])[0]
 
 def generate_pdf_demo(leads, date):
     """Generate PDF report (working demo)"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph(f'<b>Top 10 Contractor Leads - {date}</b>', styles['Heading1'])
-    elements.append(title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Add each lead
-    for i, lead in enumerate(leads, 1):
-        lead_title = Paragraph(f"<b>Lead #{i} - Score: {lead.get('score', 0)}/100</b>", styles['Heading2'])
-        elements.append(lead_title)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        data = [
-            ['County:', lead.get('county', 'N/A')],
-            ['Address:', lead.get('address', 'N/A')],
-            ['Permit Type:', lead.get('permit_type', 'N/A')],
-            ['Value:', f"${lead.get('estimated_value', 0):,.2f}"],
-            ['Permit #:', lead.get('permit_number', 'N/A')],
-        ]
-        
-        table = Table(data, colWidths=[1.5*inch, 4.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.2*inch))
-    
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return render_pdf('demo', leads, date)
 
 # ==================== ROUTES ====================
 
@@ -206,7 +115,7 @@ def demo():
     permits = get_demo_permits()
     
     # Score them
-    scored = [score_permit_demo(p) for p in permits]
+    scored = score_permits(DEMO_PROFILE, permits)
     scored.sort(key=lambda x: x['score'], reverse=True)
     
     # Top 10
@@ -399,19 +308,12 @@ def demo():
 def demo_pdf():
     """Download demo PDF"""
     permits = get_demo_permits()
-    scored = [score_permit_demo(p) for p in permits]
+    scored = score_permits(DEMO_PROFILE, permits)
     scored.sort(key=lambda x: x['score'], reverse=True)
     top_leads = scored[:10]
     
     date = datetime.now().strftime('%Y-%m-%d')
-    pdf = generate_pdf_demo(top_leads, date)
-    
-    return send_file(
-        pdf,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'contractor_leads_demo_{date}.pdf'
-    )
+    return send_pdf('demo', top_leads, date, f'contractor_leads_demo_{date}.pdf')
 
 @app.route('/demo/how-it-works')
 def how_it_works():
@@ -527,7 +429,7 @@ def how_it_works():
 def api_demo():
     """API endpoint demo"""
     permits = get_demo_permits()
-    scored = [score_permit_demo(p) for p in permits]
+    scored = score_permits(DEMO_PROFILE, permits)
     scored.sort(key=lambda x: x['score'], reverse=True)
     return jsonify(scored[:10])
 
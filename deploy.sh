@@ -79,8 +79,7 @@ except Exception as e:
 
 # Test leads loading
 try:
-    leads = app_backend.load_leads()
-    total = sum(len(county) for state in leads.values() for county in state.values())
+    total = app_backend.permit_store.count_leads()
     print(f'✅ Leads loaded: {total:,} total')
 except Exception as e:
     print(f'❌ Leads loading error: {e}')
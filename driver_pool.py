@@ -0,0 +1,152 @@
+"""
+Warm pool of headless Chrome drivers for the Selenium scrapers
+- chromedriver is resolved once per process (ChromeDriverManager hits the network)
+- browsers are reused across counties and recycled after max_uses
+- images, CSS, fonts and media are blocked through CDP so pages load faster
+"""
+import os
+import random
+import threading
+import logging
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+POOL_SIZE = int(os.getenv('SELENIUM_POOL_SIZE', 3))
+MAX_USES = int(os.getenv('SELENIUM_MAX_USES', 20))  # restart a browser after this many checkouts
+
+# Network.setBlockedURLs patterns - nothing the parsers read
+BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def chromedriver_path():
+    """Resolve (and download if needed) chromedriver once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+def create_driver(user_agent=None, block_resources=True):
+    """New headless Chrome using the cached chromedriver"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    if user_agent:
+        chrome_options.add_argument(f"--user-agent={user_agent}")
+    if block_resources:
+        # Fallback for anything CDP misses (e.g. images set from JS)
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+    if block_resources:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    return driver
+
+class DriverPool:
+    """Up to `size` browsers shared by worker threads; checkout with `with pool.driver() as d:`"""
+
+    def __init__(self, size=POOL_SIZE, user_agents=None, max_uses=MAX_USES, block_resources=True):
+        self.size = size
+        self.user_agents = user_agents or []
+        self.max_uses = max_uses
+        self.block_resources = block_resources
+        self._idle = []
+        self._uses = {}
+        self._created = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self):
+        """Idle browser, a new one while under size, else wait for a release"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                if self._idle:
+                    driver = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    driver = None
+                    break
+                self._cond.wait()
+
+        if driver is None:
+            try:
+                driver = create_driver(block_resources=self.block_resources)
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+            self._uses[id(driver)] = 0
+
+        self._uses[id(driver)] += 1
+        if self.user_agents:
+            driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": random.choice(self.user_agents)})
+        return driver
+
+    def release(self, driver):
+        """Reset and return a browser; broken or worn-out ones are quit"""
+        healthy = self._uses.get(id(driver), self.max_uses) < self.max_uses
+        if healthy:
+            try:
+                driver.delete_all_cookies()
+                driver.get('about:blank')
+            except Exception as e:
+                logging.warning(f"Discarding broken browser: {e}")
+                healthy = False
+
+        if not healthy:
+            self._discard(driver)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._discard(driver, locked=True)
+            else:
+                self._idle.append(driver)
+            self._cond.notify()
+
+    def _discard(self, driver, locked=False):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if locked:
+            self._created -= 1
+            return
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every idle browser; busy ones are quit when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for driver in idle:
+                self._discard(driver, locked=True)
+            self._cond.notify_all()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Email Dispatcher - drains the email_queue table (database.py)
+Scrape jobs and email_sender.py only enqueue; this process does the sending.
+
+Batches are claimed with a lease, so several dispatchers can run side by
+side and rows held by a crashed dispatcher are picked up again once the
+lease expires. Failures are retried with exponential backoff; permanent
+rejects and rows out of attempts are dead-lettered (status 'dead').
+
+Usage:
+    python3 email_dispatcher.py              # run forever
+    python3 email_dispatcher.py --once       # drain what is due, then exit
+    python3 email_dispatcher.py --stats      # queue counts per status
+"""
+
+import os
+import json
+import time
+import random
+import base64
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import database
+from rate_limit import bucket_for
+
+SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
+FROM_EMAIL = os.environ.get('FROM_EMAIL', 'leads@contractorleads.com')
+
+BATCH_SIZE = int(os.getenv('EMAIL_DISPATCH_BATCH', 50))
+WORKERS = int(os.getenv('EMAIL_DISPATCH_WORKERS', 8))
+LEASE_SECONDS = int(os.getenv('EMAIL_LEASE_SECONDS', 300))
+POLL_SECONDS = float(os.getenv('EMAIL_POLL_SECONDS', 5))
+MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 6))
+BACKOFF_SECONDS = float(os.getenv('EMAIL_BACKOFF_SECONDS', 30))  # doubles per attempt
+BACKOFF_MAX_SECONDS = float(os.getenv('EMAIL_BACKOFF_MAX_SECONDS', 3600))
+SENDGRID_RATE = float(os.getenv('SENDGRID_RATE_PER_SECOND', 50))
+
+# One SendGrid client per worker thread
+_local = threading.local()
+
+
+class PermanentError(Exception):
+    """The message can never be delivered as queued - dead-letter it"""
+
+
+def _client():
+    client = getattr(_local, 'client', None)
+    if client is None:
+        from sendgrid import SendGridAPIClient
+        client = _local.client = SendGridAPIClient(SENDGRID_API_KEY)
+    return client
+
+
+def _build_mail(email):
+    """SendGrid Mail for a queued row; payload may set from_email and list file attachments"""
+    from sendgrid.helpers.mail import Mail, Email, To, Attachment
+
+    payload = json.loads(email['payload']) if email['payload'] else {}
+    message = Mail(
+        from_email=Email(payload.get('from_email', FROM_EMAIL)),
+        to_emails=To(email['to_email']),
+        subject=email['subject'] or '',
+        html_content=email['body'] or ''
+    )
+
+    for item in payload.get('attachments', []):
+        path = Path(item['path'])
+        try:
+            content = path.read_bytes()
+        except OSError as e:
+            raise PermanentError(f"Attachment missing: {path} ({e})")
+        attachment = Attachment()
+        attachment.file_content = base64.b64encode(content).decode()
+        attachment.file_type = item.get('type', 'application/octet-stream')
+        attachment.file_name = item.get('name', path.name)
+        attachment.disposition = 'attachment'
+        message.add_attachment(attachment)
+
+    return message
+
+
+def send_email(email):
+    """Send one queued row through SendGrid (raises on failure)"""
+    message = _build_mail(email)
+    bucket_for('sendgrid', SENDGRID_RATE).acquire()
+    try:
+        response = _client().send(message)
+    except Exception as e:
+        status = getattr(e, 'status_code', None)
+        # 4xx other than throttling means the request itself is bad
+        if status is not None and 400 <= status < 500 and status != 429:
+            raise PermanentError(f"SendGrid rejected the message ({status}): {e}")
+        raise
+    if response.status_code not in [200, 201, 202]:
+        raise RuntimeError(f"SendGrid returned status {response.status_code}")
+
+
+def backoff_delay(attempts):
+    """Seconds before the next try: exponential, capped, with jitter"""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def process(email, simulate=False):
+    """Deliver one claimed row and record the outcome: 'sent', 'retry' or 'dead'"""
+    try:
+        if not email['to_email']:
+            raise PermanentError('No recipient address')
+        if simulate:
+            print(f"📧 [SIMULATED] {email['email_type']} to {email['to_email']}: {email['subject']}")
+        else:
+            send_email(email)
+
+    except PermanentError as e:
+        print(f"☠️  Dead-lettered #{email['id']} ({email['to_email']}): {e}")
+        database.mark_email_dead(email['id'], str(e))
+        return 'dead'
+
+    except Exception as e:
+        if email['attempts'] >= MAX_ATTEMPTS:
+            print(f"☠️  Giving up on #{email['id']} ({email['to_email']}) after {email['attempts']} attempts: {e}")
+            database.mark_email_dead(email['id'], str(e))
+            return 'dead'
+        delay = backoff_delay(email['attempts'])
+        print(f"🔁 Retrying #{email['id']} ({email['to_email']}) in {delay:.0f}s: {e}")
+        database.retry_email(email['id'], str(e), datetime.now() + timedelta(seconds=delay))
+        return 'retry'
+
+    database.mark_email_sent(email['id'])
+    return 'sent'
+
+
+def _with_recipients(rows):
+    """Rows as dicts; rows queued by user_id only get the address from users"""
+    emails = [dict(row) for row in rows]
+    missing = list({e['user_id'] for e in emails if not e.get('to_email')})
+    if missing:
+        placeholders = ','.join('?' * len(missing))
+        with database.get_db() as conn:
+            addresses = dict(conn.execute(
+                f'SELECT id, email FROM users WHERE id IN ({placeholders})', missing
+            ).fetchall())
+        for email in emails:
+            if not email.get('to_email'):
+                email['to_email'] = addresses.get(email['user_id'])
+    return emails
+
+
+def dispatch_once(pool, simulate=False):
+    """Claim one batch and send it concurrently; returns {outcome: count}"""
+    emails = _with_recipients(database.claim_emails(BATCH_SIZE, LEASE_SECONDS))
+    outcomes = {}
+    for outcome in pool.map(lambda email: process(email, simulate), emails):
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
+
+
+def run(once=False, simulate=False):
+    """Drain the queue; keep polling unless once=True"""
+    database.init_database()
+    totals = {}
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        while True:
+            outcomes = dispatch_once(pool, simulate)
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            if outcomes:
+                print(f"📤 Batch: {outcomes}")
+                continue
+            if once:
+                break
+            time.sleep(POLL_SECONDS)
+
+    print(f"✅ Dispatcher done: {totals or 'nothing due'}")
+    return totals
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Send queued emails')
+    parser.add_argument('--once', action='store_true', help='Send everything due, then exit')
+    parser.add_argument('--simulate', action='store_true', help='Print instead of sending')
+    parser.add_argument('--stats', action='store_true', help='Show queue counts and exit')
+    parser.add_argument('--requeue-dead', action='store_true', help='Move dead-lettered emails back to pending')
+    args = parser.parse_args()
+
+    if args.stats:
+        database.init_database()
+        print(f"📊 Email queue: {database.get_email_queue_stats()}")
+    elif args.requeue_dead:
+        database.init_database()
+        print(f"🔁 Requeued {database.requeue_dead_emails()} dead-lettered emails")
+    elif not SENDGRID_API_KEY and not args.simulate:
+        print("⚠️  SENDGRID_API_KEY not set. Set it with:")
+        print("   export SENDGRID_API_KEY='your-api-key'")
+        print("   (or run with --simulate)")
+    else:
+        try:
+            run(once=args.once, simulate=args.simulate)
+        except KeyboardInterrupt:
+            print("\n👋 Dispatcher stopped (leased emails are retried when the lease expires)")
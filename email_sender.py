@@ -1,25 +1,12 @@
 #!/usr/bin/env python3
 """
-Email Sender - Sends daily contractor leads to subscribers
-Run this daily via cron job at 6 AM
+Email Sender - Queues daily contractor leads for subscribers
+Run this daily via cron job at 6 AM; email_dispatcher.py sends the queue
 """
 
-import json
-import os
 from datetime import datetime
 import database
-
-# Email configuration - set these environment variables
-SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY', '')
-FROM_EMAIL = os.environ.get('FROM_EMAIL', 'leads@contractorleads.com')
-
-def load_leads():
-    """Load leads from database"""
-    db_path = '/Users/briceleasure/Desktop/contractor-leads-saas/leads_db/current_leads.json'
-    if os.path.exists(db_path):
-        with open(db_path, 'r') as f:
-            return json.load(f).get('leads', {})
-    return {}
+import permit_store
 
 def format_leads_html(leads, max_leads=50):
     """Format leads as HTML for email"""
@@ -76,43 +63,15 @@ def format_leads_html(leads, max_leads=50):
     
     return html
 
-def send_email_sendgrid(to_email, subject, html_content):
-    """Send email using SendGrid API"""
-    try:
-        import sendgrid
-        from sendgrid.helpers.mail import Mail, Email, To, Content
-        
-        sg = sendgrid.SendGridAPIClient(api_key=SENDGRID_API_KEY)
-        from_email = Email(FROM_EMAIL)
-        to_email = To(to_email)
-        content = Content("text/html", html_content)
-        mail = Mail(from_email, to_email, subject, content)
-        
-        response = sg.client.mail.send.post(request_body=mail.get())
-        
-        if response.status_code in [200, 201, 202]:
-            return True, None
-        else:
-            return False, f"SendGrid returned status {response.status_code}"
-    
-    except Exception as e:
-        return False, str(e)
-
 def send_daily_leads():
-    """Main function to send daily leads to all active subscribers"""
-    print(f"\n📧 Starting daily lead email delivery - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    
-    # Check if SendGrid is configured
-    if not SENDGRID_API_KEY:
-        print("⚠️  SENDGRID_API_KEY not set. Set it with:")
-        print("   export SENDGRID_API_KEY='your-api-key'")
-        print("\n📝 Simulating email send (no actual emails sent)\n")
-        use_sendgrid = False
-    else:
-        use_sendgrid = True
+    """
+    Queue today's leads email for every active subscriber
+    Delivery (SendGrid, retries) happens in email_dispatcher.py
+    """
+    print(f"\n📧 Queueing daily lead emails - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
-    # Load all leads
-    all_leads = load_leads()
+    database.init_database()
+    permit_store.init_store()
     
     # Get all active subscriptions
     with database.get_db() as conn:
@@ -130,8 +89,9 @@ def send_daily_leads():
     
     print(f"Found {len(subscriptions)} active subscription(s)\n")
     
-    sent_count = 0
-    failed_count = 0
+    today = datetime.now().strftime('%Y-%m-%d')
+    queued_count = 0
+    skipped_count = 0
     
     for sub in subscriptions:
         state_key = sub['state_key']
@@ -139,11 +99,12 @@ def send_daily_leads():
         email = sub['email']
         name = sub['full_name'] or 'Subscriber'
         
-        # Get leads for this county
-        county_leads = all_leads.get(state_key, {}).get(county_key, [])
+        # Get leads for this county (format_leads_html shows at most 50)
+        county_leads = permit_store.get_county_leads(state_key, county_key, limit=50)
         
         if not county_leads:
             print(f"⚠️  No leads for {county_key}, {state_key} - skipping {email}")
+            skipped_count += 1
             continue
         
         # Format email
@@ -163,46 +124,32 @@ def send_daily_leads():
         </div>
         """ + format_leads_html(county_leads)
         
-        # Send email
-        if use_sendgrid:
-            success, error = send_email_sendgrid(email, subject, html_content)
-            
-            if success:
-                print(f"✅ Sent {len(county_leads)} leads to {email} ({county_display})")
-                
-                # Record in email queue as sent
-                database.queue_email(
-                    sub['user_id'],
-                    'daily_leads',
-                    subject,
-                    html_content[:500],  # Store truncated version
-                    datetime.now()
-                )
-                with database.get_db() as conn:
-                    conn.execute("""
-                        UPDATE email_queue 
-                        SET status = 'sent', sent_at = ?
-                        WHERE user_id = ? AND email_type = 'daily_leads' 
-                        AND status = 'pending'
-                        ORDER BY created_at DESC LIMIT 1
-                    """, (datetime.now(), sub['user_id']))
-                
-                sent_count += 1
-            else:
-                print(f"❌ Failed to send to {email}: {error}")
-                failed_count += 1
+        # One daily email per subscription, even if this script runs twice
+        email_id = database.queue_email(
+            sub['user_id'],
+            'daily_leads',
+            subject,
+            html_content,
+            datetime.now(),
+            to_email=email,
+            dedupe_key=f"daily_leads:{sub['user_id']}:{state_key}:{county_key}:{today}"
+        )
+        
+        if email_id:
+            print(f"📥 Queued {len(county_leads)} leads for {email} ({county_display})")
+            queued_count += 1
         else:
-            # Simulate sending
-            print(f"📧 [SIMULATED] Would send {len(county_leads)} leads to {email} ({county_display})")
-            sent_count += 1
+            print(f"ℹ️  Already queued today for {email} ({county_display})")
+            skipped_count += 1
     
     print(f"\n{'='*60}")
-    print(f"📊 Email Delivery Summary")
+    print(f"📊 Email Queue Summary")
     print(f"{'='*60}")
-    print(f"✅ Sent: {sent_count}")
-    print(f"❌ Failed: {failed_count}")
+    print(f"📥 Queued: {queued_count}")
+    print(f"⏭️  Skipped: {skipped_count}")
     print(f"📧 Total: {len(subscriptions)}")
-    print(f"{'='*60}\n")
+    print(f"{'='*60}")
+    print("Run email_dispatcher.py to deliver queued emails\n")
 
 if __name__ == '__main__':
     send_daily_leads()
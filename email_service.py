@@ -1,19 +1,24 @@
 """
 Email service with PDF report generation
+Bulk sends build the PDF/HTML once and go out through a pool of workers
+that reuse authenticated SMTP connections under a per-provider rate limit
 """
+import os
 import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 from typing import List, Dict
 from datetime import datetime
 import io
+from pathlib import Path
 import config
+import database
+from rate_limit import bucket_for
+from pdf_reports import render_pdf
 
 
 class EmailService:
@@ -25,107 +30,143 @@ class EmailService:
         self.smtp_user = config.SMTP_USERNAME
         self.smtp_pass = config.SMTP_PASSWORD
         self.from_email = config.FROM_EMAIL
+        self.workers = config.SMTP_WORKERS
+        self.messages_per_connection = config.SMTP_MESSAGES_PER_CONNECTION
+        # Shared by every EmailService in the process sending through this provider
+        self.rate_limiter = bucket_for(f"smtp:{self.smtp_host}", config.SMTP_RATE_PER_SECOND)
+        
+        # One SMTP connection per worker thread, all tracked so they can be closed
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
     
     def send_daily_leads(self, to_email: str, leads: List[Dict], date: str):
         """Send daily leads email with PDF attachment"""
-        try:
-            # Generate PDF
-            pdf_buffer = self.generate_leads_pdf(leads, date)
-            
-            # Create email
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = f'Your Top 10 Contractor Leads - {date}'
-            
-            # Email body
-            body = self.create_email_body(leads, date)
-            msg.attach(MIMEText(body, 'html'))
-            
-            # Attach PDF
-            pdf_attachment = MIMEApplication(pdf_buffer.getvalue(), _subtype='pdf')
-            pdf_attachment.add_header('Content-Disposition', 'attachment', 
-                                     filename=f'contractor_leads_{date}.pdf')
-            msg.attach(pdf_attachment)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_pass)
-                server.send_message(msg)
-            
+        outcome = self.send_bulk_daily_leads([to_email], leads, date)
+        if outcome and outcome[0]['status'] == 'sent':
             print(f"Sent leads email to {to_email}")
             return True
+        return False
+    
+    def send_bulk_daily_leads(self, recipients: List[str], leads: List[Dict], date: str) -> List[Dict]:
+        """
+        Send the daily leads email to many recipients
+        Returns one {'email', 'status', 'error'} outcome per recipient, in order
+        """
+        recipients = list(dict.fromkeys(email for email in recipients if email))
+        if not recipients:
+            return []
         
+        try:
+            message = self.build_daily_message(leads, date)
         except Exception as e:
-            print(f"Error sending email to {to_email}: {e}")
-            return False
+            print(f"Error building leads email: {e}")
+            return [{'email': email, 'status': 'failed', 'error': str(e)} for email in recipients]
+        
+        workers = max(1, min(self.workers, len(recipients)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(lambda email: self._deliver(email, message), recipients))
+        finally:
+            self._close_connections()
+        
+        failed = [o for o in outcomes if o['status'] != 'sent']
+        for outcome in failed:
+            print(f"Error sending email to {outcome['email']}: {outcome['error']}")
+        if len(recipients) > 1:
+            print(f"Sent leads email to {len(outcomes) - len(failed)}/{len(recipients)} recipients")
+        return outcomes
     
-    def generate_leads_pdf(self, leads: List[Dict], date: str) -> io.BytesIO:
-        """Generate PDF report of top leads"""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
+    def build_daily_message(self, leads: List[Dict], date: str) -> bytes:
+        """
+        Serialized daily email (CRLF, ready for SMTP) without a To header
+        Built once per run and shared by every recipient
+        """
+        pdf_buffer = self.generate_leads_pdf(leads, date)
         
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=20,
-            textColor=colors.HexColor('#1a5490'),
-            spaceAfter=30
-        )
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['Subject'] = f'Your Top 10 Contractor Leads - {date}'
         
-        title = Paragraph(f'Top 10 Contractor Leads - {date}', title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 0.2*inch))
+        # Email body
+        body = self.create_email_body(leads, date)
+        msg.attach(MIMEText(body, 'html'))
         
-        # Add each lead
-        for i, lead in enumerate(leads, 1):
-            # Lead header
-            lead_title = Paragraph(
-                f"<b>Lead #{i} - Score: {lead.get('score', 0)}/100</b>",
-                styles['Heading2']
-            )
-            elements.append(lead_title)
-            
-            # Lead details table
-            data = [
-                ['County:', lead.get('county', 'N/A')],
-                ['Address:', lead.get('address', 'N/A')],
-                ['Permit Type:', lead.get('permit_type', 'N/A')],
-                ['Estimated Value:', f"${lead.get('estimated_value', 0):,.2f}"],
-                ['Permit Number:', lead.get('permit_number', 'N/A')],
-                ['Description:', lead.get('work_description', 'N/A')[:100]],
-            ]
-            
-            # Score breakdown
-            breakdown = lead.get('score_breakdown', {})
-            if breakdown:
-                data.append(['Job Size Score:', f"{breakdown.get('size_score', 0):.1f}"])
-                data.append(['Location Score:', f"{breakdown.get('location_score', 0):.1f}"])
-                data.append(['Urgency Score:', f"{breakdown.get('urgency_score', 0):.1f}"])
-                data.append(['Type Score:', f"{breakdown.get('type_score', 0):.1f}"])
-            
-            table = Table(data, colWidths=[2*inch, 4.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-            ]))
-            
-            elements.append(table)
-            elements.append(Spacer(1, 0.3*inch))
+        # Attach PDF
+        pdf_attachment = MIMEApplication(pdf_buffer.getvalue(), _subtype='pdf')
+        pdf_attachment.add_header('Content-Disposition', 'attachment', 
+                                 filename=f'contractor_leads_{date}.pdf')
+        msg.attach(pdf_attachment)
         
-        # Build PDF
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+        return msg.as_bytes(policy=policy.SMTP)
+    
+    def _connection(self) -> smtplib.SMTP:
+        """This thread's authenticated connection, reconnecting after messages_per_connection sends"""
+        state = self._local
+        if getattr(state, 'server', None) is not None and state.sent >= self.messages_per_connection:
+            self._drop_connection()
+        
+        if getattr(state, 'server', None) is None:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+            try:
+                server.starttls()
+                server.login(self.smtp_user, self.smtp_pass)
+            except Exception:
+                server.close()
+                raise
+            state.server = server
+            state.sent = 0
+            with self._connections_lock:
+                self._connections.append(server)
+        return state.server
+    
+    def _drop_connection(self):
+        """Discard this thread's connection (after a send error or when rotating)"""
+        server = getattr(self._local, 'server', None)
+        self._local.server = None
+        if server is None:
+            return
+        with self._connections_lock:
+            if server in self._connections:
+                self._connections.remove(server)
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def _close_connections(self):
+        """QUIT every connection the workers opened"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for server in connections:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    
+    def _deliver(self, to_email: str, message: bytes) -> Dict:
+        """Send one prebuilt message; a dropped connection is reopened and retried once"""
+        data = f"To: {to_email}\r\n".encode('utf-8') + message
+        error = None
+        for attempt in range(2):
+            try:
+                server = self._connection()
+                self.rate_limiter.acquire()
+                server.sendmail(self.from_email, [to_email], data)
+                self._local.sent += 1
+                return {'email': to_email, 'status': 'sent', 'error': None}
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                # The server answered - retrying on a new connection won't help
+                return {'email': to_email, 'status': 'failed', 'error': str(e)}
+            except OSError as e:
+                # Connection-level failure (includes SMTPServerDisconnected)
+                self._drop_connection()
+                error = e
+        return {'email': to_email, 'status': 'failed', 'error': str(error)}
+    
+    def generate_leads_pdf(self, leads: List[Dict], date: str) -> io.BytesIO:
+        """Generate PDF report of top leads (cached by pdf_reports)"""
+        return render_pdf('leads', leads, date)
     
     def create_email_body(self, leads: List[Dict], date: str) -> str:
         """Create HTML email body"""
@@ -171,83 +212,62 @@ class EmailService:
 
 # ==================== SUBSCRIPTION EMAIL FUNCTIONS ====================
 
-def send_permit_email(to_email, city, permit_count, csv_file):
-    """Send fresh permits email with CSV attachment (for subscriptions)"""
-    import os
-    import base64
-    from pathlib import Path
-    from sendgrid import SendGridAPIClient
-    from sendgrid.helpers.mail import Mail, Email, To, Attachment
-    
-    try:
-        # Read CSV file
-        with open(csv_file, 'rb') as f:
-            csv_data = f.read()
-        
-        # Encode CSV for attachment
-        encoded_csv = base64.b64encode(csv_data).decode()
-        
-        # Create email
-        message = Mail(
-            from_email=Email(os.getenv('SENDGRID_FROM_EMAIL', 'leads@contractorleads.com')),
-            to_emails=To(to_email),
-            subject=f'🏗️ {permit_count} New Building Permits in {city}',
-            html_content=f'''
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 10px; text-align: center;">
-                    <h1 style="color: white; margin: 0;">🏗️ Fresh Building Permits</h1>
-                    <p style="color: white; margin: 10px 0 0 0; font-size: 18px;">{city}</p>
-                </div>
+def permit_email_content(city, permit_count):
+    """(subject, html) of the fresh permits email"""
+    subject = f'🏗️ {permit_count} New Building Permits in {city}'
+    html = f'''
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; border-radius: 10px; text-align: center;">
+                <h1 style="color: white; margin: 0;">🏗️ Fresh Building Permits</h1>
+                <p style="color: white; margin: 10px 0 0 0; font-size: 18px;">{city}</p>
+            </div>
+            
+            <div style="padding: 30px; background: #f9fafb; border-radius: 10px; margin-top: 20px;">
+                <h2 style="color: #333; margin-top: 0;">You have {permit_count} new leads!</h2>
                 
-                <div style="padding: 30px; background: #f9fafb; border-radius: 10px; margin-top: 20px;">
-                    <h2 style="color: #333; margin-top: 0;">You have {permit_count} new leads!</h2>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                        <p style="color: #666; margin: 0;">
-                            <strong style="color: #333;">Scraped:</strong> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br>
-                            <strong style="color: #333;">City:</strong> {city}<br>
-                            <strong style="color: #333;">New Permits:</strong> {permit_count}
-                        </p>
-                    </div>
-                    
-                    <p style="color: #666; line-height: 1.6;">
-                        Your fresh permits are attached as a CSV file. These are <strong>brand new leads</strong> 
-                        - no duplicates, just opportunities scraped in the last few hours.
+                <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                    <p style="color: #666; margin: 0;">
+                        <strong style="color: #333;">Scraped:</strong> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br>
+                        <strong style="color: #333;">City:</strong> {city}<br>
+                        <strong style="color: #333;">New Permits:</strong> {permit_count}
                     </p>
-                    
-                    <div style="background: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; border-radius: 4px;">
-                        <p style="color: #92400e; margin: 0; font-size: 14px;">
-                            <strong>💡 Pro Tip:</strong> The earliest contractors usually win the bid. 
-                            Call these leads within the hour for best results.
-                        </p>
-                    </div>
                 </div>
                 
-                <div style="text-align: center; padding: 20px; color: #999; font-size: 12px;">
-                    <p>You're receiving this because you subscribed to {city} building permits.</p>
-                    <p>Next scrape: Every 4 hours (5:30 AM, 9:30 AM, 1:30 PM, 5:30 PM)</p>
+                <p style="color: #666; line-height: 1.6;">
+                    Your fresh permits are attached as a CSV file. These are <strong>brand new leads</strong> 
+                    - no duplicates, just opportunities scraped in the last few hours.
+                </p>
+                
+                <div style="background: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin: 20px 0; border-radius: 4px;">
+                    <p style="color: #92400e; margin: 0; font-size: 14px;">
+                        <strong>💡 Pro Tip:</strong> The earliest contractors usually win the bid. 
+                        Call these leads within the hour for best results.
+                    </p>
                 </div>
-            </body>
-            </html>
-            '''
-        )
-        
-        # Add CSV attachment
-        attachment = Attachment()
-        attachment.file_content = encoded_csv
-        attachment.file_type = 'text/csv'
-        attachment.file_name = Path(csv_file).name
-        attachment.disposition = 'attachment'
-        message.attachment = attachment
-        
-        # Send email
-        sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
-        response = sg.send(message)
-        
-        print(f"   ✅ Email sent to {to_email} (status: {response.status_code})")
-        return True
-        
-    except Exception as e:
-        print(f"   ❌ Email error: {e}")
-        return False
+            </div>
+            
+            <div style="text-align: center; padding: 20px; color: #999; font-size: 12px;">
+                <p>You're receiving this because you subscribed to {city} building permits.</p>
+                <p>Next scrape: Every 4 hours (5:30 AM, 9:30 AM, 1:30 PM, 5:30 PM)</p>
+            </div>
+        </body>
+        </html>
+        '''
+    return subject, html
+
+
+def send_permit_email(to_email, city, permit_count, csv_file, dedupe_key=None):
+    """Queue the fresh permits email with its CSV attached (email_dispatcher.py delivers it)"""
+    subject, html = permit_email_content(city, permit_count)
+    return database.queue_email_to_address(
+        to_email,
+        'fresh_permits',
+        subject,
+        html,
+        payload={
+            'from_email': os.getenv('SENDGRID_FROM_EMAIL', 'leads@contractorleads.com'),
+            'attachments': [{'path': str(Path(csv_file).resolve()), 'type': 'text/csv'}]
+        },
+        dedupe_key=dedupe_key
+    )
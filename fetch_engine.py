@@ -0,0 +1,116 @@
+"""
+Concurrent fetch engine - runs blocking scrape tasks on a bounded thread pool
+Per-host concurrency limits + a global deadline, results yielded as each task finishes
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+MAX_WORKERS = int(os.getenv('FETCH_MAX_WORKERS', 8))
+PER_HOST_LIMIT = int(os.getenv('FETCH_PER_HOST_LIMIT', 2))
+DEADLINE_SECONDS = float(os.getenv('FETCH_DEADLINE_SECONDS', 90))
+
+
+class FetchTask:
+    """A single unit of work: a callable plus the host it talks to"""
+
+    def __init__(self, key, func, *args, host=None, start_after=0, **kwargs):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        # Accept either a bare hostname or a full URL
+        self.host = (urlparse(host).netloc or host) if host else None
+        # Earliest start, in seconds after the run begins (not submitted before then)
+        self.start_after = start_after
+
+
+def host_of(url):
+    """Return the hostname of a URL (used as the per-host limit key)"""
+    return urlparse(url).netloc
+
+
+def run_concurrent(tasks, max_workers=None, per_host_limit=None, deadline=None):
+    """
+    Run tasks concurrently and yield (key, result, error, elapsed) as each one finishes
+
+    - max_workers bounds the thread pool
+    - per_host_limit caps how many tasks hit the same host at once
+    - a task's start_after delays its submission, so a staggered start holds no worker
+    - deadline (seconds) is a wall-clock budget for the whole run; tasks still
+      running when it expires are reported with a TimeoutError
+    """
+    max_workers = max_workers or MAX_WORKERS
+    per_host_limit = per_host_limit or PER_HOST_LIMIT
+    deadline = DEADLINE_SECONDS if deadline is None else deadline
+
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    # Gate submission per host: at most per_host_limit tasks of a host are in the
+    # pool, the rest wait here unsubmitted (they hold no worker and can be dropped)
+    waiting = {}
+    for task in tasks:
+        waiting.setdefault(task.host, []).append(task)
+    in_flight = {}
+
+    def run(task):
+        """(result, error, elapsed) - elapsed is this task's own run time"""
+        started = time.monotonic()
+        try:
+            return task.func(*task.args, **task.kwargs), None, time.monotonic() - started
+        except Exception as e:
+            return None, e, time.monotonic() - started
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)), thread_name_prefix='fetch')
+    futures = {}
+
+    def submit_ready():
+        """Submit what fits under the host limits; returns seconds until the next delayed start"""
+        now = time.monotonic() - run_started
+        next_start = None
+        for host, queue in waiting.items():
+            for task in list(queue):
+                # Tasks without a host are only bounded by the pool
+                if host is not None and in_flight.get(host, 0) >= per_host_limit:
+                    break
+                if task.start_after > now:
+                    next_start = min(next_start or task.start_after, task.start_after)
+                    continue
+                queue.remove(task)
+                in_flight[host] = in_flight.get(host, 0) + 1
+                futures[executor.submit(run, task)] = task
+        return None if next_start is None else next_start - now
+
+    run_started = time.monotonic()
+    next_start = submit_ready()
+
+    try:
+        while futures or next_start is not None:
+            remaining = deadline - (time.monotonic() - run_started)
+            if remaining <= 0:
+                break
+            timeout = remaining if next_start is None else min(remaining, next_start)
+            if futures:
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout)
+                done = set()
+            for future in done:
+                task = futures.pop(future)
+                in_flight[task.host] -= 1
+                result, error, elapsed = future.result()
+                yield task.key, result, error, elapsed
+            next_start = submit_ready()
+
+        # Deadline hit - report stragglers and never-started tasks, stop waiting for them
+        stragglers = list(futures.values()) + [task for queue in waiting.values() for task in queue]
+        for future in futures:
+            future.cancel()
+        for task in stragglers:
+            yield task.key, None, TimeoutError(f"exceeded {deadline:.0f}s deadline"), time.monotonic() - run_started
+    finally:
+        # Don't block on stragglers; their requests have their own timeouts
+        executor.shutdown(wait=False, cancel_futures=True)
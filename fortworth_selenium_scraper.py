@@ -9,10 +9,13 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from driver_pool import chromedriver_path
 from datetime import datetime, timedelta
 import time
 import json
+import http_cache
+from browser_steps import wait_for_idle, wait_for_rows
 
 def setup_driver():
     """Setup Chrome driver with headless options"""
@@ -24,7 +27,7 @@ def setup_driver():
     chrome_options.add_argument("--window-size=1920,1080")
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36")
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(chromedriver_path())
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
 
@@ -49,15 +52,16 @@ def scrape_fortworth_accela():
         
         # Wait for page to load
         print("3️⃣  Waiting for search page to load...")
-        time.sleep(5)
+        started = time.monotonic()
+        wait_for_idle(driver)
+        print(f"   ⏱️  Loaded in {time.monotonic() - started:.1f}s")
         
         # Try to find and interact with search form
         print("4️⃣  Looking for permit search form...")
         
-        # Save page source for debugging
-        with open('/tmp/fortworth_search_page.html', 'w') as f:
-            f.write(driver.page_source)
-        print("   💾 Page source saved to /tmp/fortworth_search_page.html")
+        # Record the rendered page so parsers can be re-run offline (http_cache.load_page(url))
+        snapshot = http_cache.save_page(url, driver.page_source)
+        print(f"   💾 Page source recorded to {snapshot}")
         
         # Common Accela search field IDs/names
         search_fields = [
@@ -87,17 +91,10 @@ def scrape_fortworth_accela():
             print("9️⃣  Clicking search to get recent permits...")
             try:
                 search_buttons[0].click()
-                time.sleep(5)
+                wait_for_idle(driver)
             except Exception as e:
                 print(f"   ⚠️  Could not click button: {e}")
         
-        # Wait for results
-        print("🔟 Waiting for results...")
-        time.sleep(5)
-        
-        # Try to find results table
-        print("📋 Looking for permit results table...")
-        
         # Common table selectors in Accela
         table_selectors = [
             "table[id*='gdvPermitList']",
@@ -106,6 +103,18 @@ def scrape_fortworth_accela():
             "div[id*='divResultsTable'] table"
         ]
         
+        # Wait for results
+        print("🔟 Waiting for results...")
+        started = time.monotonic()
+        try:
+            wait_for_rows(driver, By.CSS_SELECTOR, ', '.join(f"{selector} tr" for selector in table_selectors), min_rows=2)
+            print(f"   ⏱️  Results in {time.monotonic() - started:.1f}s")
+        except TimeoutException:
+            print(f"   ⚠️  No result rows after {time.monotonic() - started:.1f}s")
+        
+        # Try to find results table
+        print("📋 Looking for permit results table...")
+        
         results_table = None
         for selector in table_selectors:
             tables = driver.find_elements(By.CSS_SELECTOR, selector)
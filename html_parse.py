@@ -0,0 +1,188 @@
+"""
+HTML parsing layer for the scrapers - lxml with compiled XPath
+- iter_table_rows() streams <tr> rows out of the matching results table(s)
+  with lxml's incremental parser; top-level rows are cleared as soon as they
+  are read, so a large results page never sits in memory as a full tree
+- document() / links() / text() / find_by_class() for the bits that need a tree
+- soup() is BeautifulSoup on the lxml tree builder for code that still wants bs4
+
+Falls back to BeautifulSoup's html.parser when lxml is not installed
+(HTML_PARSER=html.parser forces it).
+"""
+import io
+import os
+import re
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAVE_LXML = os.getenv('HTML_PARSER', 'lxml') == 'lxml'
+except ImportError:
+    HAVE_LXML = False
+
+_WHITESPACE = re.compile(r'\s+')
+
+if HAVE_LXML:
+    _LINKS = etree.XPath('//a[@href]')
+
+
+def _as_bytes(content):
+    return content.encode('utf-8') if isinstance(content, str) else content
+
+
+def cell_text(element):
+    """Text of a cell with runs of whitespace collapsed (lxml element or bs4 tag)"""
+    if HAVE_LXML and not hasattr(element, 'get_text'):
+        text = ''.join(element.itertext())
+    else:
+        text = element.get_text()
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _table_matches(attrs, table):
+    """table: None (any), or a substring / tuple of substrings of the table's id or class"""
+    if table is None:
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, list):  # bs4 splits class into a list
+        classes = ' '.join(classes)
+    names = f"{attrs.get('id') or ''} {classes}"
+    return any(part in names for part in ((table,) if isinstance(table, str) else table))
+
+
+def iter_table_rows(content, table=None, cells=('td', 'th'), skip_header=True, first_table_only=False):
+    """
+    Yield each row of the matching tables as a list of cell texts
+
+    - table: only tables whose id/class contains this (or any of these) substrings
+    - cells: which cell tags to read ('td' only skips header cells)
+    - skip_header: drop the first row of every table
+    - first_table_only: stop after the first matching table
+
+    A row belongs to its nearest table and its cells are the row's own
+    td/th (text of nested tables included); a nested table's rows come
+    before the row that contains it.
+    """
+    if not HAVE_LXML:
+        yield from _iter_table_rows_bs4(content, table, cells, skip_header, first_table_only)
+        return
+
+    cells = set(cells)
+    open_tables = []  # [matches, rows seen] per open <table>
+    events = etree.iterparse(io.BytesIO(_as_bytes(content)), events=('start', 'end'),
+                             tag=('table', 'tr'), html=True, huge_tree=True)
+
+    for event, element in events:
+        if element.tag == 'table':
+            if event == 'start':
+                open_tables.append([_table_matches(element.attrib, table), 0])
+                continue
+            matched, _ = open_tables.pop() if open_tables else (False, 0)
+            if not open_tables:
+                element.clear(keep_tail=True)
+            if matched and first_table_only:
+                return
+            continue
+
+        if event != 'end' or not open_tables:
+            continue
+        state = open_tables[-1]
+        row_index = state[1]
+        state[1] += 1
+        if state[0] and not (skip_header and row_index == 0):
+            yield [cell_text(cell) for cell in element if cell.tag in cells]
+
+        # Free the row and anything already read before it - only outside
+        # nested tables, whose rows are still part of an enclosing cell's text
+        if len(open_tables) > 1:
+            continue
+        element.clear(keep_tail=True)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def _iter_table_rows_bs4(content, table, cells, skip_header, first_table_only):
+    from bs4 import BeautifulSoup
+
+    def own(table_tag, name):
+        """table_tag's <name> descendants that are not inside a nested table"""
+        return [found for found in table_tag.find_all(name) if found.find_parent('table') is table_tag]
+
+    def walk(table_tag):
+        """Rows in the order lxml's end events give them; None once a matching table ends"""
+        matched = _table_matches(table_tag.attrs, table)
+        nested = own(table_tag, 'table')
+        for index, row in enumerate(own(table_tag, 'tr')):
+            for inner in [inner for inner in nested if row in inner.parents]:
+                nested.remove(inner)
+                yield from walk(inner)
+            if matched and not (skip_header and index == 0):
+                yield [cell_text(cell) for cell in row.find_all(list(cells), recursive=False)]
+        for inner in nested:
+            yield from walk(inner)
+        if matched:
+            yield None
+
+    doc = BeautifulSoup(content, 'html.parser')
+    for table_tag in doc.find_all('table'):
+        if table_tag.find_parent('table') is not None:
+            continue  # walked from its enclosing table
+        for row in walk(table_tag):
+            if row is not None:
+                yield row
+            elif first_table_only:
+                return
+
+
+def table_rows(content, table=None, min_cells=1, **kwargs):
+    """List of row cell-texts with at least min_cells cells"""
+    return [row for row in iter_table_rows(content, table, **kwargs) if len(row) >= min_cells]
+
+
+def document(content):
+    """Parsed tree for XPath queries (lxml), or BeautifulSoup without lxml"""
+    if not HAVE_LXML:
+        return soup(content)
+    return lxml_html.document_fromstring(_as_bytes(content))
+
+
+def links(doc):
+    """[(link text, href)] for every <a href> in a document()"""
+    if not HAVE_LXML:
+        return [(cell_text(a), a.get('href')) for a in doc.find_all('a', href=True)]
+    return [(cell_text(a), a.get('href')) for a in _LINKS(doc)]
+
+
+def class_xpath(classes, tag='*', scope='//'):
+    """
+    Compiled XPath for elements carrying any of the given class tokens (like bs4 class_=[...])
+    Without lxml: an equivalent callable over a BeautifulSoup document()/element
+    """
+    if not HAVE_LXML:
+        name = None if tag == '*' else tag
+        return lambda node: node.find_all(name, class_=list(classes))
+    tests = ' or '.join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes)
+    return etree.XPath(f"{scope}{tag}[{tests}]")
+
+
+def find_by_class(doc, pattern, tags=('div', 'li')):
+    """Elements of a document() with one of these tags whose class attribute matches a regex, in order"""
+    if not HAVE_LXML:
+        return [element for element in doc.find_all(list(tags), class_=True)
+                if pattern.search(' '.join(element.get('class')))]
+    return [element for element in doc.xpath('|'.join(f'//{tag}[@class]' for tag in tags))
+            if pattern.search(element.get('class'))]
+
+
+def text(doc):
+    """All text of a document() or one of its elements"""
+    return doc.text_content() if HAVE_LXML else doc.get_text()
+
+
+def soup(content):
+    """BeautifulSoup built with lxml when available (several times faster than html.parser)"""
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(content, 'lxml' if HAVE_LXML else 'html.parser')
@@ -0,0 +1,181 @@
+"""
+On-disk HTTP response cache (record / replay) for the shared http_client
+HTTP_CACHE_MODE:
+- off     (default) every request goes to the network
+- record  cache-aside: fresh entries are served from disk, stale ones are
+          revalidated with If-None-Match / If-Modified-Since, 200s are stored
+- replay  disk only - a request that was never recorded raises CacheMiss,
+          so parser work and tests run offline
+
+Entries are keyed by method + full URL (params included) + request body and
+stored gzip-compressed with their headers. Only GETs are cached unless the
+caller passes cache_ttl; streaming downloads, Range requests and requests
+that already carry validators bypass the cache.
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+import requests
+from requests.structures import CaseInsensitiveDict
+
+MODE = os.getenv('HTTP_CACHE_MODE', 'off')
+CACHE_DIR = Path(os.getenv('HTTP_CACHE_DIR', str(Path(__file__).parent / 'leads_db' / 'http_cache')))
+DEFAULT_TTL = float(os.getenv('HTTP_CACHE_TTL', 3600))
+
+# Handled by the caller itself (csv_download resumes, conditional fetches)
+BYPASS_HEADERS = {'range', 'if-none-match', 'if-modified-since', 'if-range'}
+# Describe the wire format, not the decoded body we store
+DROP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class CacheMiss(requests.RequestException):
+    """Replay mode and nothing recorded for this request"""
+
+
+def enabled():
+    return MODE in ('record', 'replay')
+
+
+def cacheable(method, kwargs, ttl=None):
+    """Plain, fully-read GETs - and POSTs whose caller passed a cache_ttl (search postbacks)"""
+    method = method.upper()
+    if kwargs.get('stream') or not (method == 'GET' or (method == 'POST' and ttl is not None)):
+        return False
+    headers = kwargs.get('headers') or {}
+    return not any(name.lower() in BYPASS_HEADERS for name in headers)
+
+
+def cache_key(method, url, params=None, data=None, json_body=None):
+    """sha256 of method, the URL as requests would send it, and the body"""
+    if isinstance(params, dict):
+        params = sorted(params.items())
+    prepared = requests.Request(method.upper(), url, params=params, data=data, json=json_body).prepare()
+    body = prepared.body or b''
+    if isinstance(body, str):
+        body = body.encode()
+    return hashlib.sha256(f"{prepared.method} {prepared.url}\n".encode() + body).hexdigest()
+
+
+def _path(key):
+    return CACHE_DIR / key[:2] / f"{key}.gz"
+
+
+def load(key):
+    """Stored entry ({'meta': ..., 'body': bytes}) or None"""
+    try:
+        with gzip.open(_path(key), 'rb') as f:
+            header, _, body = f.read().partition(b'\n')
+    except (FileNotFoundError, OSError, EOFError):
+        return None
+    return {'meta': json.loads(header), 'body': body}
+
+
+def _write(key, meta, body):
+    path = _path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+        f.write(json.dumps(meta).encode() + b'\n' + body)
+    os.replace(tmp_path, path)
+
+
+def save(key, response, ttl=None):
+    """Store a response body (decoded) with its headers"""
+    meta = {
+        'url': response.url,
+        'status': response.status_code,
+        'reason': response.reason,
+        'encoding': response.encoding,
+        'headers': {k: v for k, v in response.headers.items() if k.lower() not in DROP_HEADERS},
+        'stored_at': time.time(),
+        'ttl': DEFAULT_TTL if ttl is None else ttl,
+    }
+    _write(key, meta, response.content)
+
+
+def is_fresh(entry, ttl=None):
+    """Within the TTL passed by the caller, else the one it was stored with"""
+    meta = entry['meta']
+    return time.time() - meta['stored_at'] < (meta['ttl'] if ttl is None else ttl)
+
+
+def to_response(entry):
+    """Rebuild a requests.Response from a stored entry"""
+    meta = entry['meta']
+    response = requests.Response()
+    response.status_code = meta['status']
+    response.reason = meta.get('reason')
+    response.url = meta['url']
+    response.encoding = meta.get('encoding')
+    response.headers = CaseInsensitiveDict(meta['headers'])
+    response._content = entry['body']
+    response.from_cache = True
+    return response
+
+
+def cached_request(send, method, url, kwargs, ttl=None):
+    """
+    Cache-aside around send(method, url, **kwargs)
+    Stale entries with an ETag/Last-Modified are revalidated; a 304 renews them.
+    """
+    key = cache_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+    entry = load(key)
+
+    if MODE == 'replay':
+        if entry is None:
+            raise CacheMiss(f"No recorded response for {method} {url} (HTTP_CACHE_MODE=replay)")
+        return to_response(entry)
+
+    if entry is not None and is_fresh(entry, ttl):
+        return to_response(entry)
+
+    if entry is not None:
+        headers = dict(kwargs.get('headers') or {})
+        cached_headers = CaseInsensitiveDict(entry['meta']['headers'])
+        if cached_headers.get('ETag'):
+            headers['If-None-Match'] = cached_headers['ETag']
+        if cached_headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = cached_headers['Last-Modified']
+        kwargs = dict(kwargs, headers=headers)
+
+    response = send(method, url, **kwargs)
+
+    if entry is not None and response.status_code == 304:
+        entry['meta']['stored_at'] = time.time()
+        if ttl is not None:
+            entry['meta']['ttl'] = ttl
+        _write(key, entry['meta'], entry['body'])
+        return to_response(entry)
+
+    if response.status_code == 200:
+        save(key, response, ttl)
+    return response
+
+
+def save_page(url, html, ttl=None):
+    """
+    Record a page fetched outside http_client (e.g. Selenium page_source)
+    so parsers can be re-run against it with load_page()
+    """
+    key = cache_key('GET', url)
+    meta = {
+        'url': url,
+        'status': 200,
+        'reason': 'OK',
+        'encoding': 'utf-8',
+        'headers': {'Content-Type': 'text/html; charset=utf-8'},
+        'stored_at': time.time(),
+        'ttl': DEFAULT_TTL if ttl is None else ttl,
+    }
+    _write(key, meta, html.encode('utf-8'))
+    return _path(key)
+
+
+def load_page(url):
+    """HTML recorded for a URL (via save_page or a cached GET), or None"""
+    entry = load(cache_key('GET', url))
+    return entry['body'].decode(entry['meta'].get('encoding') or 'utf-8') if entry else None
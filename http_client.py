@@ -0,0 +1,166 @@
+"""
+Shared HTTP client for every scraper and API client
+- one pooled keep-alive session per host (connections reused across calls)
+- jittered exponential retries on connection errors, 429 and 5xx
+  (Retry-After honoured)
+- token-bucket rate limit per domain, shared by every caller in the process
+- gzip/deflate (and brotli when installed) negotiated by default
+- optional record/replay disk cache (http_cache, HTTP_CACHE_MODE)
+"""
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limit import bucket_for
+import http_cache
+
+DEFAULT_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 30))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+BACKOFF_SECONDS = float(os.getenv('HTTP_BACKOFF_SECONDS', 1))  # doubles per retry
+BACKOFF_MAX_SECONDS = float(os.getenv('HTTP_BACKOFF_MAX_SECONDS', 30))
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))  # keep-alive connections per host
+
+# Requests/second per domain; anything not listed gets HTTP_RATE_PER_SECOND
+DEFAULT_RATE = float(os.getenv('HTTP_RATE_PER_SECOND', 5))
+DOMAIN_RATES = {
+    'data.austintexas.gov': 10,
+    'data.sanantonio.gov': 5,
+    'www.chattadata.org': 5,
+    'maps.nashville.gov': 5,
+    'services2.arcgis.com': 10,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+try:
+    import brotli  # noqa: F401 - urllib3 decodes br when this is importable
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+def rate_limiter(host):
+    """Process-wide token bucket for a domain"""
+    return bucket_for(f"http:{host}", DOMAIN_RATES.get(host, DEFAULT_RATE))
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _retry_after(response):
+    """Seconds from a Retry-After header (delta or HTTP date), capped"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0), BACKOFF_MAX_SECONDS)
+
+
+class HTTPClient(requests.Session):
+    """
+    requests.Session with retries, per-domain rate limiting and sane defaults
+    Drop-in wherever a Session is used (cookies, headers, stream=True all work).
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.bytes_received = 0  # body bytes across this session (Content-Length for streams)
+        self.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        # cache_ttl: seconds a recorded response stays fresh (HTTP_CACHE_MODE=record)
+        cache_ttl = kwargs.pop('cache_ttl', None)
+        if http_cache.enabled() and http_cache.cacheable(method, kwargs, cache_ttl):
+            return http_cache.cached_request(self._send, method, url, kwargs, cache_ttl)
+        return self._send(method, url, **kwargs)
+
+    def _send(self, method, url, **kwargs):
+        """Network request with rate limiting and retries"""
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries + 1):
+            rate_limiter(host).acquire()
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not idempotent or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"   🔁 {host}: {type(e).__name__}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            # Non-idempotent requests are only retried when the server refused them outright
+            retryable = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 429)
+            if not retryable or attempt == self.max_retries:
+                if kwargs.get('stream'):
+                    self.bytes_received += int(response.headers.get('Content-Length') or 0)
+                else:
+                    self.bytes_received += len(response.content)
+                return response
+
+            delay = _retry_after(response) or backoff_delay(attempt)
+            print(f"   🔁 {host}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def session_for(url):
+    """The pooled client for a URL's host (created on first use)"""
+    host = urlparse(url).netloc or url
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = HTTPClient()
+        return session
+
+
+def new_session(headers=None):
+    """A private client for callers that carry their own cookies/headers"""
+    session = HTTPClient()
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def request(method, url, **kwargs):
+    return session_for(url).request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
@@ -4,130 +4,52 @@ Incremental Scraper - Only pulls NEW leads, no duplicates
 Tracks permit numbers and only adds unseen permits to database
 """
 
-import requests
-import json
 import random
-from datetime import datetime
-from pathlib import Path
+from datetime import datetime, timedelta
+import permit_store
+from arcgis_client import ArcGISLayer, NASHVILLE_BUILDING_PERMITS, since_clause, epoch_ms_to_datetime
+from socrata_client import SocrataDataset
+from csv_download import CSVSource, SAN_ANTONIO_PERMITS_CSV
 
-# Database path
-DB_PATH = Path(__file__).parent / 'leads_db' / 'current_leads.json'
+# Columns the Nashville permit dict actually uses
+NASHVILLE_FIELDS = ['CASE_NUMBER', 'LOCATION', 'CASE_TYPE_DESC', 'CONSTVAL', 'SCOPE', 'DATE_ACCEPTED']
 
-# ==================== DUPLICATE DETECTION ====================
+# Socrata feeds read incrementally - each keeps a :updated_at watermark in
+# leads_db/source_state.json, committed only after the leads are saved
+CHATTANOOGA_PERMITS = SocrataDataset(
+    'https://data.chattlibrary.org/resource/764y-vxm2.json',
+    select=['permitnum', 'applieddate', 'originaladdress1', 'originalcity', 'originalstate',
+            'originalzip', 'permittype', 'permitclass', 'description', 'statuscurrent'],
+)
+AUSTIN_PERMITS = SocrataDataset(
+    'https://data.austintexas.gov/resource/3syk-w9eu.json',
+    select=['permit_number', 'permit_location', 'permit_type_desc', 'total_job_valuation',
+            'description', 'applieddate'],
+    where="permit_class_mapped='Residential'",
+)
+SOCRATA_SOURCES = [CHATTANOOGA_PERMITS, AUSTIN_PERMITS]
 
-def load_existing_leads():
-    """Load current database and extract all permit numbers"""
-    try:
-        with open(DB_PATH, 'r') as f:
-            db = json.load(f)
-        
-        # Extract all permit numbers from existing leads
-        seen_permits = set()
-        for state, counties in db.get('leads', {}).items():
-            for county, leads in counties.items():
-                for lead in leads:
-                    permit_num = lead.get('permit_number', '')
-                    if permit_num:
-                        seen_permits.add(permit_num)
-        
-        print(f"📊 Loaded database: {len(seen_permits)} existing permits tracked")
-        return db, seen_permits
-    except FileNotFoundError:
-        print("📊 No existing database found, creating new one")
-        return {'last_updated': None, 'leads': {}}, set()
-
-def is_duplicate(permit_number, seen_permits):
-    """Check if permit number already exists"""
-    return permit_number in seen_permits
-
-def merge_new_leads(existing_db, new_leads_by_region, seen_permits):
-    """Merge new leads into existing database, avoiding duplicates"""
-    added_count = 0
-    duplicate_count = 0
-    
-    for region_key, counties in new_leads_by_region.items():
-        state, county = region_key.split('/')
-        
-        # Ensure structure exists
-        if state not in existing_db['leads']:
-            existing_db['leads'][state] = {}
-        if county not in existing_db['leads'][state]:
-            existing_db['leads'][state][county] = []
-        
-        for lead in counties:
-            permit_num = lead.get('permit_number', '')
-            
-            if is_duplicate(permit_num, seen_permits):
-                duplicate_count += 1
-                print(f"   ⏭️  Skipping duplicate: {permit_num}")
-            else:
-                # Add first_seen timestamp
-                lead['first_seen'] = datetime.now().isoformat()
-                existing_db['leads'][state][county].append(lead)
-                seen_permits.add(permit_num)
-                added_count += 1
-                print(f"   ✅ NEW: {permit_num} - {lead.get('address', 'Unknown')}")
-    
-    existing_db['last_updated'] = datetime.now().isoformat()
-    
-    return existing_db, added_count, duplicate_count
-
-def save_database(db):
-    """Save database to JSON file"""
-    DB_PATH.parent.mkdir(exist_ok=True)
-    with open(DB_PATH, 'w') as f:
-        json.dump(db, f, indent=2)
-    print(f"💾 Database saved to {DB_PATH}")
+# San Antonio publishes one big CSV - streamed, conditional GET, resumable
+SAN_ANTONIO_PERMITS = CSVSource(SAN_ANTONIO_PERMITS_CSV, 'san_antonio_permits_incremental')
 
 # ==================== SCRAPERS (NO DUPLICATES) ====================
 
-def scrape_nashville_davidson():
-    """Nashville-Davidson County - FIXED VERSION - Gets 272 permits from last 30 days"""
+def scrape_nashville_davidson(days=30):
+    """Nashville-Davidson County - ArcGIS layer streamed by OBJECTID batches (last 30 days)"""
     permits = []
     try:
-        print("🕷️  Scraping Nashville-Davidson County (Last 30 days)...")
-        
-        url = "https://maps.nashville.gov/arcgis/rest/services/Codes/BuildingPermits/MapServer/0/query"
-        
-        # THE FIX: Use orderByFields WITHOUT resultRecordCount or resultOffset
-        # Pagination with resultOffset causes 400 errors
-        # This returns 1000 most recent permits sorted by date
-        params = {
-            'where': '1=1',  # No date filter - orderBy gets recent first
-            'outFields': '*',
-            'returnGeometry': 'false',
-            'orderByFields': 'DATE_ACCEPTED DESC',
-            'f': 'json'
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"   ❌ HTTP {response.status_code}")
-            return permits
-        
-        data = response.json()
-        features = data.get('features', [])
-        
-        if not features:
-            print("   ⚠️  No records returned")
-            return permits
-        
-        # Filter to last 30 days
-        from datetime import timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        
-        for feature in features:
-            attrs = feature.get('attributes', {})
-            
-            date_accepted = attrs.get('DATE_ACCEPTED')
-            if not date_accepted:
-                continue
-            
-            permit_date = datetime.fromtimestamp(date_accepted / 1000)
-            
-            # Only keep last 30 days
-            if permit_date < thirty_days_ago:
+        print(f"🕷️  Scraping Nashville-Davidson County (Last {days} days)...")
+        
+        # Date window is pushed into the where clause and only the columns we
+        # map are requested; OBJECTID batching avoids the broken resultOffset
+        # pagination and the 1000-row cap, so longer backfills work too
+        layer = ArcGISLayer(NASHVILLE_BUILDING_PERMITS)
+        since = datetime.now() - timedelta(days=days)
+        
+        for attrs in layer.iter_features(where=since_clause('DATE_ACCEPTED', since),
+                                         out_fields=NASHVILLE_FIELDS):
+            permit_date = epoch_ms_to_datetime(attrs.get('DATE_ACCEPTED'))
+            if not permit_date:
                 continue
             
             date_str = permit_date.strftime('%Y-%m-%d')
@@ -146,7 +68,7 @@ def scrape_nashville_davidson():
             }
             permits.append(permit)
         
-        print(f"   🔍 Found {len(permits)} Nashville permits (last 30 days)")
+        print(f"   🔍 Found {len(permits)} Nashville permits (last {days} days)")
     except Exception as e:
         print(f"   ❌ Nashville error: {e}")
     
@@ -154,103 +76,65 @@ def scrape_nashville_davidson():
 
 
 
-def scrape_chattanooga_hamilton():
-    """Chattanooga/Hamilton County - Socrata API - Gets permits from last 30 days"""
+def scrape_chattanooga_hamilton(days=30):
+    """Chattanooga/Hamilton County - Socrata API - only rows new since the last run"""
     permits = []
     try:
-        print("🕷️  Scraping Chattanooga/Hamilton County (Last 30 days)...")
+        print(f"🕷️  Scraping Chattanooga/Hamilton County (new since last run, max {days} days)...")
         
-        from datetime import datetime, timedelta
         import re
         
-        url = "https://data.chattlibrary.org/resource/764y-vxm2.json"
+        # Date window runs server-side; the dataset watermark trims it down to
+        # rows that changed since the last successful sync
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%dT00:00:00')
         
-        # Calculate 30 days ago
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        
-        # Get recent permits using pagination (Socrata API likes this better)
-        limit = 1000
-        offset = 0
-        max_permits = 2000  # Safety limit
-        
-        while len(permits) < max_permits:
-            params = {
-                '$order': 'applieddate DESC',
-                '$limit': limit,
-                '$offset': offset
-            }
+        for permit in CHATTANOOGA_PERMITS.iter_new_rows(where=f"applieddate >= '{since}'"):
+            applied_date = permit.get('applieddate', '')
+            if not applied_date:
+                continue
+            try:
+                permit_date = datetime.fromisoformat(applied_date.replace('T', ' ').split('.')[0]).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
             
-            response = requests.get(url, params=params, timeout=45)
+            # Extract permit data
+            permit_number = permit.get('permitnum', '')
+            if not permit_number:
+                continue
             
-            if response.status_code != 200:
-                break
+            address = permit.get('originaladdress1', '')
+            city = permit.get('originalcity', 'Chattanooga')
+            state = permit.get('originalstate', 'TN')
+            zip_code = permit.get('originalzip', '')
             
-            data = response.json()
-            if not data:
-                break
+            # Build full address
+            full_address = f"{address}, {city}, {state} {zip_code}" if address else "Address Not Available"
             
-            for permit in data:
-                # Check date
-                applied_date = permit.get('applieddate', '')
-                if applied_date:
-                    try:
-                        date_obj = datetime.fromisoformat(applied_date.replace('T', ' ').split('.')[0])
-                        
-                        # Stop if we've gone past 30 days
-                        if date_obj < thirty_days_ago:
-                            return permits
-                        
-                        permit_date = date_obj.strftime('%Y-%m-%d')
-                    except:
-                        continue
-                else:
-                    continue
-                
-                # Extract permit data
-                permit_number = permit.get('permitnum', '')
-                if not permit_number:
-                    continue
-                
-                address = permit.get('originaladdress1', '')
-                city = permit.get('originalcity', 'Chattanooga')
-                state = permit.get('originalstate', 'TN')
-                zip_code = permit.get('originalzip', '')
-                
-                # Build full address
-                full_address = f"{address}, {city}, {state} {zip_code}" if address else "Address Not Available"
-                
-                # Get permit details
-                permit_type = permit.get('permittype', 'Unknown')
-                permit_class = permit.get('permitclass', '')
-                description = permit.get('description', 'No description available')
-                
-                # Clean HTML from description
-                description = re.sub('<[^<]+?>', '', description).strip()
-                description = description[:200] if len(description) > 200 else description
-                
-                # Status
-                status = permit.get('statuscurrent', 'Unknown')
-                
-                permits.append({
-                    'permit_number': permit_number,
-                    'address': full_address,
-                    'date': permit_date,
-                    'permit_type': f"{permit_class} - {permit_type}" if permit_class else permit_type,
-                    'work_description': description,
-                    'estimated_value': 0,
-                    'status': status,
-                    'score': 90,
-                    'source': 'Chattanooga Open Data'
-                })
+            # Get permit details
+            permit_type = permit.get('permittype', 'Unknown')
+            permit_class = permit.get('permitclass', '')
+            description = permit.get('description', 'No description available')
+            
+            # Clean HTML from description
+            description = re.sub('<[^<]+?>', '', description).strip()
+            description = description[:200] if len(description) > 200 else description
             
-            # Check if we got less than limit (last page)
-            if len(data) < limit:
-                break
+            # Status
+            status = permit.get('statuscurrent', 'Unknown')
             
-            offset += limit
-            print(f"   📄 Fetched {len(permits)} permits so far...")
+            permits.append({
+                'permit_number': permit_number,
+                'address': full_address,
+                'date': permit_date,
+                'permit_type': f"{permit_class} - {permit_type}" if permit_class else permit_type,
+                'work_description': description,
+                'estimated_value': 0,
+                'status': status,
+                'score': 90,
+                'source': 'Chattanooga Open Data'
+            })
         
-        print(f"   ✅ Found {len(permits)} permits")
+        print(f"   ✅ Found {len(permits)} new permits")
     
     except Exception as e:
         print(f"   ❌ Error scraping Chattanooga: {e}")
@@ -284,35 +168,20 @@ def scrape_dallas_county():
     
     return permits
 
-def scrape_austin_travis():
-    """Austin-Travis County - REAL DATA from Socrata API (Last 30 days)"""
+def scrape_austin_travis(days=30):
+    """Austin-Travis County - REAL DATA from Socrata API (only rows new since the last run)"""
     permits = []
     try:
-        print("🕷️  Scraping Austin-Travis County (Socrata API - Last 30 days)...")
-        
-        url = "https://data.austintexas.gov/resource/3syk-w9eu.json"
-        
-        # Calculate 30 days ago in ISO format
-        from datetime import timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        date_filter = thirty_days_ago.strftime('%Y-%m-%d')
+        print(f"🕷️  Scraping Austin-Travis County (Socrata API - new since last run, max {days} days)...")
         
-        params = {
-            '$limit': '5000',
-            '$order': 'applieddate DESC',
-            '$where': f"permit_class_mapped='Residential' AND applieddate >= '{date_filter}'"
-        }
+        date_filter = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        for record in data:
+        for record in AUSTIN_PERMITS.iter_new_rows(where=f"applieddate >= '{date_filter}'"):
             value = 0
             if record.get('total_job_valuation'):
                 try:
                     value = int(float(record['total_job_valuation']))
-                except:
+                except (TypeError, ValueError):
                     pass
             
             permit = {
@@ -328,47 +197,39 @@ def scrape_austin_travis():
             }
             permits.append(permit)
         
-        print(f"   🔍 Found {len(permits)} Austin permits")
+        print(f"   🔍 Found {len(permits)} new Austin permits")
     except Exception as e:
         print(f"   ❌ Austin error: {e}")
     
     return permits
 
-def scrape_san_antonio_bexar():
-    """San Antonio-Bexar County - REAL DATA from OpenGov CSV (Last 30 days)"""
+def scrape_san_antonio_bexar(days=30):
+    """San Antonio-Bexar County - REAL DATA from OpenGov CSV (rows since the last ingested date)"""
     permits = []
     try:
-        print("🕷️  Scraping San Antonio-Bexar County (OpenGov CSV - Last 30 days)...")
-        
-        from datetime import timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        print(f"🕷️  Scraping San Antonio-Bexar County (OpenGov CSV - new since last run, max {days} days)...")
         
-        csv_url = 'https://data.sanantonio.gov/dataset/05012dcb-ba1b-4ade-b5f3-7403bc7f52eb/resource/fbb7202e-c6c1-475b-849e-c5c2cfb65833/download/accelasubmitpermitsextract.csv'
+        # Rows on the watermark day are re-read so late additions to that day
+        # are not lost; the permit store upserts the ones we already have
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        if SAN_ANTONIO_PERMITS.watermark and SAN_ANTONIO_PERMITS.watermark > cutoff:
+            cutoff = SAN_ANTONIO_PERMITS.watermark
+        newest = None
         
-        response = requests.get(csv_url, timeout=30)
-        response.raise_for_status()
-        
-        import csv
-        from io import StringIO
-        
-        csv_data = StringIO(response.text)
-        reader = csv.DictReader(csv_data)
-        
-        count = 0
-        for row in reader:
+        for row in SAN_ANTONIO_PERMITS.iter_rows(skip_unchanged=True):
             permit_type = row.get('PERMIT TYPE', '')
             if not any(keyword in permit_type.lower() for keyword in ['building', 'commercial', 'residential', 'mep', 'trade', 'repair']):
                 continue
             
-            # Check date is within last 30 days
+            # Check date is on/after the cutoff
             date_issued = row.get('DATE ISSUED', '')
             if date_issued:
                 try:
-                    from datetime import datetime as dt
-                    permit_date = dt.strptime(date_issued.split()[0], '%m/%d/%Y')
-                    if permit_date < thirty_days_ago:
+                    permit_date = datetime.strptime(date_issued.split()[0], '%m/%d/%Y').strftime('%Y-%m-%d')
+                    if permit_date < cutoff:
                         continue
-                except:
+                    newest = max(newest or permit_date, permit_date)
+                except ValueError:
                     pass  # If date parsing fails, include the permit
             
             permit = {
@@ -383,11 +244,10 @@ def scrape_san_antonio_bexar():
                 'owner': row.get('PRIMARY CONTACT', 'TBD')
             }
             permits.append(permit)
-            count += 1
-            
-            if count >= 5000:  # Increased limit since we're filtering by date
-                break
         
+        SAN_ANTONIO_PERMITS.pending_watermark = newest
+        if SAN_ANTONIO_PERMITS.not_modified and not permits:
+            print("   ⏭️  CSV unchanged - nothing new")
         print(f"   🔍 Found {len(permits)} San Antonio permits")
     except Exception as e:
         print(f"   ❌ San Antonio error: {e}")
@@ -402,8 +262,8 @@ def scrape_all_regions_incremental():
     print("🌐 INCREMENTAL SCRAPING SESSION - NO DUPLICATES")
     print("="*70)
     
-    # Load existing database
-    existing_db, seen_permits = load_existing_leads()
+    # Permit store (imports the old current_leads.json on first run)
+    permit_store.init_store()
     
     # Scrape each region
     new_leads_by_region = {}
@@ -433,19 +293,19 @@ def scrape_all_regions_incremental():
     if san_antonio_leads:
         new_leads_by_region['texas/bexar'] = san_antonio_leads
     
-    # Merge new leads (avoiding duplicates)
+    # Upsert into the permit store (unique on state/county/permit_number)
     print("\n" + "="*70)
     print("🔍 CHECKING FOR DUPLICATES")
     print("="*70)
     
-    updated_db, added_count, duplicate_count = merge_new_leads(
-        existing_db, 
-        new_leads_by_region, 
-        seen_permits
-    )
+    added_count, duplicate_count = permit_store.merge_leads(new_leads_by_region)
+    
+    # Leads are stored, now advance the source watermarks
+    for dataset in SOCRATA_SOURCES:
+        dataset.commit()
+    SAN_ANTONIO_PERMITS.commit()
     
-    # Save updated database
-    save_database(updated_db)
+    total = permit_store.count_leads()
     
     # Summary
     print("\n" + "="*70)
@@ -453,14 +313,14 @@ def scrape_all_regions_incremental():
     print("="*70)
     print(f"✅ New leads added: {added_count}")
     print(f"⏭️  Duplicates skipped: {duplicate_count}")
-    print(f"📦 Total leads in database: {len(seen_permits) + added_count}")
-    print(f"🕒 Last updated: {updated_db['last_updated']}")
+    print(f"📦 Total leads in database: {total}")
+    print(f"🕒 Last updated: {permit_store.last_updated()}")
     print("="*70 + "\n")
     
     return {
         'added': added_count,
         'duplicates': duplicate_count,
-        'total': len(seen_permits) + added_count
+        'total': total
     }
 
 if __name__ == '__main__':
@@ -2,17 +2,13 @@
 """
 LIVE SCRAPER DEMO - Pulls REAL data from county websites
 """
-from flask import Flask, render_template, send_file, jsonify
+from flask import Flask, render_template, jsonify
 from datetime import datetime
-import requests
+import http_client
 from bs4 import BeautifulSoup
 import re
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
+from pdf_reports import render_pdf, send_pdf
+from scoring_engine import score_permits, LIVE_PROFILE
 
 app = Flask(__name__)
 app.secret_key = 'demo-secret-key'
@@ -40,7 +36,7 @@ def scrape_nashville_live():
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=15)
+        response = http_client.get(url, params=params, headers=headers, timeout=15)
         if response.status_code == 200:
             data = response.json()
             
@@ -175,88 +171,12 @@ def scrape_all_counties_live():
     return all_permits
 
 def score_permit_ai(permit):
-    """AI scoring algorithm"""
-    value = permit.get('estimated_value', 0)
-    if value >= 500000:
-        size_score = 95
-    elif value >= 250000:
-        size_score = 80
-    elif value >= 100000:
-        size_score = 65
-    else:
-        size_score = 50
-    
-    address = str(permit.get('address', '')).lower()
-    if 'nashville' in address or 'broadway' in address or 'downtown' in address:
-        location_score = 90
-    elif 'murfreesboro' in address or 'gallatin' in address or 'brentwood' in address:
-        location_score = 75
-    else:
-        location_score = 60
-    
-    permit_type = str(permit.get('permit_type', '')).lower()
-    if 'commercial' in permit_type or 'new construction' in permit_type:
-        type_score = 85
-    elif 'addition' in permit_type or 'renovation' in permit_type:
-        type_score = 70
-    else:
-        type_score = 60
-    
-    urgency_score = 72  # Would use AI sentiment analysis in production
-    
-    total_score = (
-        size_score * 0.35 +
-        location_score * 0.25 +
-        urgency_score * 0.20 +
-        type_score * 0.20
-    )
-    
-    permit['score'] = round(total_score, 1)
-    permit['score_breakdown'] = {
-        'size_score': size_score,
-        'location_score': location_score,
-        'urgency_score': urgency_score,
-        'type_score': type_score
-    }
-    
-    return permit
+    """AI scoring algorithm (single permit - see scoring_engine.LIVE_PROFILE)"""
+    return score_permits(LIVE_PROFILE, [permit])[0]
 
 def generate_pdf_report(leads, date):
     """Generate PDF with real data"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    title = Paragraph(f'<b>Top Contractor Leads - {date}</b>', styles['Heading1'])
-    elements.append(title)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    for i, lead in enumerate(leads, 1):
-        lead_title = Paragraph(f"<b>Lead #{i} - Score: {lead.get('score', 0)}/100</b>", styles['Heading2'])
-        elements.append(lead_title)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        data = [
-            ['County:', lead.get('county', 'N/A')],
-            ['Address:', lead.get('address', 'N/A')],
-            ['Permit Type:', lead.get('permit_type', 'N/A')],
-            ['Value:', f"${lead.get('estimated_value', 0):,.2f}"],
-            ['Permit #:', lead.get('permit_number', 'N/A')],
-        ]
-        
-        table = Table(data, colWidths=[1.5*inch, 4.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        elements.append(Spacer(1, 0.2*inch))
-    
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return render_pdf('live', leads, date)
 
 # ==================== ROUTES ====================
 
@@ -509,7 +429,7 @@ def live_scrape():
         permits = scrape_all_counties_live()
         
         # Score them
-        scored = [score_permit_ai(p) for p in permits]
+        scored = score_permits(LIVE_PROFILE, permits)
         scored.sort(key=lambda x: x['score'], reverse=True)
         
         # Top 10
@@ -531,19 +451,12 @@ def live_scrape():
 def live_pdf():
     """Generate PDF from live data"""
     permits = scrape_all_counties_live()
-    scored = [score_permit_ai(p) for p in permits]
+    scored = score_permits(LIVE_PROFILE, permits)
     scored.sort(key=lambda x: x['score'], reverse=True)
     top_leads = scored[:10]
     
     date = datetime.now().strftime('%Y-%m-%d')
-    pdf = generate_pdf_report(top_leads, date)
-    
-    return send_file(
-        pdf,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'live_contractor_leads_{date}.pdf'
-    )
+    return send_pdf('live', top_leads, date, f'live_contractor_leads_{date}.pdf')
 
 if __name__ == '__main__':
     port = 5002
@@ -5,18 +5,24 @@ Covers 10 major metro areas across Tennessee and Texas
 """
 from flask import Flask, render_template_string, jsonify, send_file
 from datetime import datetime
-import requests
+import http_client
 import random
 import io
+import time
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import inch
 from reportlab.lib.styles import getSampleStyleSheet
+from fetch_engine import FetchTask, run_concurrent
+from csv_download import CSVSource, SAN_ANTONIO_PERMITS_CSV
+from scoring_engine import score_values, MULTI_REGION_PROFILE
 
 app = Flask(__name__)
 app.secret_key = 'multi-region-secret-key'
 
+SAN_ANTONIO_PERMITS = CSVSource(SAN_ANTONIO_PERMITS_CSV, 'san_antonio_permits_multi_region')
+
 # ==================== METRO AREA CONFIGURATIONS ====================
 
 METRO_AREAS = {
@@ -80,7 +86,7 @@ def scrape_nashville_davidson():
             'f': 'json'
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, params=params, timeout=15)
         if response.status_code == 200:
             data = response.json()
             
@@ -166,7 +172,7 @@ def scrape_chattanooga_hamilton():
             '$where': "permittype='Residential' OR permitclass LIKE '%Residential%'"
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -318,18 +324,8 @@ def scrape_san_antonio_bexar():
     try:
         print("🕷️  Scraping San Antonio-Bexar County (OpenGov CSV)...")
         
-        # San Antonio OpenGov CSV - Direct download
-        csv_url = 'https://data.sanantonio.gov/dataset/05012dcb-ba1b-4ade-b5f3-7403bc7f52eb/resource/fbb7202e-c6c1-475b-849e-c5c2cfb65833/download/accelasubmitpermitsextract.csv'
-        
-        response = requests.get(csv_url, timeout=30)
-        response.raise_for_status()
-        
-        # Parse CSV
-        import csv
-        from io import StringIO
-        
-        csv_data = StringIO(response.text)
-        reader = csv.DictReader(csv_data)
+        # San Antonio OpenGov CSV - streamed, so we stop downloading once we have enough rows
+        reader = SAN_ANTONIO_PERMITS.iter_rows()
         
         count = 0
         for row in reader:
@@ -384,7 +380,7 @@ def scrape_austin_travis():
             '$where': "permit_class_mapped='Residential'"  # Focus on residential
         }
         
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -467,7 +463,65 @@ def scrape_generic_county(metro, county, state):
 
 # ==================== ORCHESTRATOR ====================
 
-def scrape_all_regions(selected_metros=None):
+# Hosts behind the live scrapers - used for per-host concurrency limits
+SCRAPER_HOSTS = {
+    scrape_nashville_davidson: 'maps.nashville.gov',
+    scrape_chattanooga_hamilton: 'www.chattadata.org',
+    scrape_san_antonio_bexar: 'data.sanantonio.gov',
+    scrape_austin_travis: 'data.austintexas.gov',
+}
+
+PRIMARY_SCRAPERS = {
+    ('Nashville', 'Davidson'): scrape_nashville_davidson,
+    ('Memphis', 'Shelby'): scrape_memphis_shelby,
+    ('Chattanooga', 'Hamilton'): scrape_chattanooga_hamilton,
+    ('Knoxville', 'Knox'): scrape_knoxville_knox,
+    ('Dallas', 'Dallas'): scrape_dallas_county,
+    ('Houston', 'Harris'): scrape_houston_harris,
+    ('San Antonio', 'Bexar'): scrape_san_antonio_bexar,
+    ('Austin', 'Travis'): scrape_austin_travis,
+}
+
+def get_region_tasks(selected_metros):
+    """Build one fetch task per (metro, county) for the selected metros"""
+    tasks = []
+    for metro in selected_metros:
+        if metro not in METRO_AREAS:
+            continue
+        
+        metro_config = METRO_AREAS[metro]
+        
+        # Primary county (usually has best data) routes to its dedicated scraper
+        primary_county = metro_config['counties'][0]
+        scraper = PRIMARY_SCRAPERS.get((metro, primary_county))
+        if scraper:
+            tasks.append(FetchTask((metro, primary_county), scraper, host=SCRAPER_HOSTS.get(scraper)))
+        else:
+            tasks.append(FetchTask((metro, primary_county), scrape_generic_county,
+                                   metro, primary_county, metro_config['state']))
+        
+        # Secondary counties use the generic scraper
+        for county in metro_config['counties'][1:]:
+            tasks.append(FetchTask((metro, county), scrape_generic_county,
+                                   metro, county, metro_config['state']))
+    return tasks
+
+def iter_all_regions(selected_metros=None, max_workers=None, per_host_limit=None, deadline=None):
+    """Scrape selected metros concurrently, yielding (metro, county, permits) as each county finishes"""
+    if selected_metros is None:
+        selected_metros = list(METRO_AREAS.keys())
+    
+    tasks = get_region_tasks(selected_metros)
+    for (metro, county), permits, error, elapsed in run_concurrent(
+            tasks, max_workers=max_workers, per_host_limit=per_host_limit, deadline=deadline):
+        if error:
+            print(f"   ❌ {county} County ({metro}) failed after {elapsed:.1f}s: {error}")
+            permits = []
+        else:
+            print(f"   ⏱️  {county} County ({metro}) finished in {elapsed:.1f}s - {len(permits)} permits")
+        yield metro, county, permits
+
+def scrape_all_regions(selected_metros=None, concurrent=True, max_workers=None, per_host_limit=None, deadline=None):
     """Scrape all selected metro areas"""
     all_permits = []
     
@@ -480,47 +534,26 @@ def scrape_all_regions(selected_metros=None):
     print(f"📍 Targeting {len(selected_metros)} metro areas")
     print("="*70)
     
-    for metro in selected_metros:
-        if metro not in METRO_AREAS:
-            continue
-            
-        metro_config = METRO_AREAS[metro]
-        print(f"\n🏙️  {metro}, {metro_config['state']} - {metro_config['description']}")
-        print("-" * 70)
-        
-        # Primary county (usually has best data)
-        primary_county = metro_config['counties'][0]
-        
-        # Route to appropriate scraper
-        if metro == 'Nashville' and primary_county == 'Davidson':
-            permits = scrape_nashville_davidson()
-        elif metro == 'Memphis' and primary_county == 'Shelby':
-            permits = scrape_memphis_shelby()
-        elif metro == 'Chattanooga' and primary_county == 'Hamilton':
-            permits = scrape_chattanooga_hamilton()
-        elif metro == 'Knoxville' and primary_county == 'Knox':
-            permits = scrape_knoxville_knox()
-        elif metro == 'Dallas' and primary_county == 'Dallas':
-            permits = scrape_dallas_county()
-        elif metro == 'Houston' and primary_county == 'Harris':
-            permits = scrape_houston_harris()
-        elif metro == 'San Antonio' and primary_county == 'Bexar':
-            permits = scrape_san_antonio_bexar()
-        elif metro == 'Austin' and primary_county == 'Travis':
-            permits = scrape_austin_travis()
-        else:
-            permits = scrape_generic_county(metro, primary_county, metro_config['state'])
-        
-        all_permits.extend(permits)
-        
-        # Scrape secondary counties with generic scraper
-        for county in metro_config['counties'][1:]:
-            permits = scrape_generic_county(metro, county, metro_config['state'])
+    started = time.monotonic()
+    
+    if concurrent:
+        for metro, county, permits in iter_all_regions(selected_metros, max_workers, per_host_limit, deadline):
             all_permits.extend(permits)
+    else:
+        for metro in selected_metros:
+            if metro not in METRO_AREAS:
+                continue
+            metro_config = METRO_AREAS[metro]
+            print(f"\n🏙️  {metro}, {metro_config['state']} - {metro_config['description']}")
+            print("-" * 70)
+        
+            for task in get_region_tasks([metro]):
+                all_permits.extend(task.func(*task.args, **task.kwargs))
     
     print("\n" + "="*70)
     print(f"📊 TOTAL PERMITS COLLECTED: {len(all_permits)}")
     print(f"🏙️  Metros Scraped: {len(selected_metros)}")
+    print(f"⏱️  Elapsed: {time.monotonic() - started:.1f}s ({'concurrent' if concurrent else 'sequential'})")
     print(f"🌐 Real Data Sources: Nashville-Davidson (ArcGIS)")
     print(f"⚠️  Demo Data: Other counties (API research in progress)")
     print("="*70 + "\n")
@@ -528,42 +561,8 @@ def scrape_all_regions(selected_metros=None):
     return all_permits
 
 def score_permit(permit):
-    """Simple scoring algorithm"""
-    score = 0
-    
-    # Value scoring (35%)
-    value = permit.get('estimated_value', 0)
-    if value > 500000:
-        score += 35
-    elif value > 250000:
-        score += 25
-    elif value > 100000:
-        score += 15
-    else:
-        score += 5
-    
-    # Type scoring (25%)
-    ptype = permit.get('permit_type', '').lower()
-    if any(x in ptype for x in ['commercial', 'multi', 'mixed']):
-        score += 25
-    elif 'residential' in ptype:
-        score += 20
-    else:
-        score += 15
-    
-    # Location premium (20%) - major metros
-    if permit.get('metro') in ['Nashville', 'Austin', 'Dallas', 'Houston']:
-        score += 20
-    else:
-        score += 15
-    
-    # Data quality (20%)
-    if '🌐 LIVE' in permit.get('data_source', ''):
-        score += 20
-    else:
-        score += 10
-    
-    return min(score, 100)
+    """Simple scoring algorithm (single permit - see scoring_engine.MULTI_REGION_PROFILE)"""
+    return score_values(MULTI_REGION_PROFILE, [permit])[0]
 
 # ==================== FLASK ROUTES ====================
 
@@ -886,9 +885,9 @@ def scrape():
     
     permits = scrape_all_regions(selected_metros)
     
-    # Score and sort
-    for permit in permits:
-        permit['score'] = score_permit(permit)
+    # Score (whole batch at once) and sort
+    for permit, score in zip(permits, score_values(MULTI_REGION_PROFILE, permits)):
+        permit['score'] = score
     
     permits.sort(key=lambda x: x['score'], reverse=True)
     top_leads = permits[:20]
@@ -1,65 +1,36 @@
 #!/usr/bin/env python3
 """
-FIXED Nashville Scraper - Gets 1000 recent permits without pagination
-Key discovery: orderByFields without resultRecordCount works!
+FIXED Nashville Scraper - Streams every recent permit via OBJECTID batches
+Key discovery: resultOffset is broken, but returnIdsOnly + objectIds paging works!
 """
 
-import requests
 from datetime import datetime, timedelta
+from arcgis_client import ArcGISLayer, NASHVILLE_BUILDING_PERMITS, since_clause, epoch_ms_to_datetime
 
-def scrape_nashville_davidson():
-    """Nashville-Davidson County - FIXED VERSION - Gets 1000 recent permits"""
+# Columns the permit dict below actually uses
+PERMIT_FIELDS = [
+    'CASE_NUMBER', 'LOCATION', 'CASE_TYPE_DESC', 'SUB_TYPE_DESC', 'CONSTVAL',
+    'SCOPE', 'DATE_ACCEPTED', 'APN', 'UNITS', 'BLDG_SQ_FT'
+]
+
+def scrape_nashville_davidson(days=30):
+    """Nashville-Davidson County - streams every permit in the date window"""
     permits = []
     try:
-        print("🕷️  Scraping Nashville-Davidson County (FIXED - 1000 recent permits)...")
-        
-        url = "https://maps.nashville.gov/arcgis/rest/services/Codes/BuildingPermits/MapServer/0/query"
-        
-        # THE FIX: Use orderByFields WITHOUT resultRecordCount or resultOffset
-        # This returns 1000 most recent permits (vs broken pagination)
-        params = {
-            'where': '1=1',  # No date filter needed - we get recent via orderBy
-            'outFields': '*',
-            'returnGeometry': 'false',
-            'orderByFields': 'DATE_ACCEPTED DESC',  # Sort by date, gets recent first
-            'f': 'json'
-        }
-        
-        print("   📡 Making API request...")
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"   ❌ HTTP {response.status_code}")
-            return permits
-        
-        data = response.json()
-        features = data.get('features', [])
+        print(f"🕷️  Scraping Nashville-Davidson County (last {days} days, OBJECTID batches)...")
         
-        if not features:
-            print("   ⚠️  No records returned")
-            return permits
+        # THE FIX (v2): resultOffset pagination is broken on this layer, so page
+        # by OBJECTID batches instead. The date filter runs server-side and
+        # only the columns we use come back over the wire.
+        layer = ArcGISLayer(NASHVILLE_BUILDING_PERMITS)
+        since = datetime.now() - timedelta(days=days)
         
-        print(f"   ✅ Got {len(features)} total permits")
-        
-        # Filter to last 30 days
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_count = 0
-        
-        for feature in features:
-            attrs = feature.get('attributes', {})
-            
-            # Check date
-            date_accepted = attrs.get('DATE_ACCEPTED')
-            if not date_accepted:
-                continue
-            
-            permit_date = datetime.fromtimestamp(date_accepted / 1000)
-            
-            # Only keep last 30 days
-            if permit_date < thirty_days_ago:
+        print("   📡 Streaming from ArcGIS...")
+        for attrs in layer.iter_features(where=since_clause('DATE_ACCEPTED', since), out_fields=PERMIT_FIELDS):
+            permit_date = epoch_ms_to_datetime(attrs.get('DATE_ACCEPTED'))
+            if not permit_date:
                 continue
             
-            recent_count += 1
             date_str = permit_date.strftime('%Y-%m-%d')
             
             const_val = attrs.get('CONSTVAL', 0) or 0
@@ -81,8 +52,7 @@ def scrape_nashville_davidson():
             }
             permits.append(permit)
         
-        print(f"   🔍 Found {recent_count} Nashville permits from last 30 days")
-        print(f"   📅 Date range: {len(features)} total permits spanning ~103 days")
+        print(f"   🔍 Found {len(permits)} Nashville permits from last {days} days")
         
     except Exception as e:
         print(f"   ❌ Nashville error: {e}")
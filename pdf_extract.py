@@ -0,0 +1,127 @@
+"""
+Streaming PDF permit extraction for the scrapers
+- download() spools the response to a temp file in chunks (never whole in memory)
+- iter_pages() opens it with pdfplumber and yields one page at a time
+  (text + table rows), releasing each page's layout cache before the next
+- extract_many() parses several PDFs in a process pool, since pdfminer
+  layout analysis is CPU-bound
+"""
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import http_client
+
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', min(4, os.cpu_count() or 1)))
+CHUNK_SIZE = 256 * 1024
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def download(url, session=None, timeout=60):
+    """Stream a PDF to a temp file and return its path (caller removes it)"""
+    session = session or http_client.session_for(url)
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with tempfile.NamedTemporaryFile(prefix='permits_', suffix='.pdf', delete=False) as f:
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+            except Exception:
+                f.close()
+                os.unlink(f.name)
+                raise
+            return f.name
+
+
+def _clean(cell):
+    return _WHITESPACE.sub(' ', cell).strip() if cell else ''
+
+
+def iter_pages(path):
+    """Yield (page number, text, table rows) per page; text is '' for image-only pages"""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for number, page in enumerate(pdf.pages, 1):
+            try:
+                text = page.extract_text() or ''
+                rows = [[_clean(cell) for cell in row]
+                        for table in page.extract_tables()
+                        for row in table if any(row)]
+                yield number, text, rows
+            finally:
+                # Drop the parsed layout so memory stays flat across long reports
+                if hasattr(page, 'close'):
+                    page.close()
+                else:
+                    page.flush_cache()
+
+
+def extract(path):
+    """
+    {'text': full text, 'rows': table rows, 'pages': n} - runs in a worker process
+    Pages are parsed one at a time, but the result goes back as one pickle per PDF.
+    """
+    texts = []
+    rows = []
+    pages = 0
+    for pages, text, page_rows in iter_pages(path):
+        texts.append(text)
+        rows.extend(page_rows)
+    return {'text': '\n'.join(texts), 'rows': rows, 'pages': pages}
+
+
+def extract_url(url, session=None, timeout=60):
+    """Download and extract one PDF in this process"""
+    path = download(url, session, timeout)
+    try:
+        return extract(path)
+    finally:
+        os.unlink(path)
+
+
+def extract_many(urls, session=None, workers=None):
+    """
+    Yield (url, result, error) for each PDF as it finishes
+    Downloads happen here, one at a time; parsing runs in a process pool.
+    """
+    urls = list(urls)
+    workers = min(workers or PDF_WORKERS, len(urls))
+    if workers <= 1:
+        for url in urls:
+            try:
+                yield url, extract_url(url, session), None
+            except Exception as e:
+                yield url, None, e
+        return
+
+    futures = {}
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for url in urls:
+            try:
+                path = download(url, session)
+            except Exception as e:
+                yield url, None, e
+                continue
+            futures[pool.submit(extract, path)] = (url, path)
+
+        for future in as_completed(futures):
+            url, path = futures[future]
+            try:
+                yield url, future.result(), None
+            except Exception as e:
+                yield url, None, e
+            finally:
+                os.unlink(path)
+    finally:
+        # The caller may stop early (e.g. ScrapeCancelled once over budget):
+        # don't wait for queued PDFs to be parsed, just drop them (cancelled here
+        # too: cancel_futures is skipped once the pool has been collected)
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for url, path in futures.values():
+            if os.path.exists(path):
+                os.unlink(path)
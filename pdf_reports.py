@@ -0,0 +1,223 @@
+"""
+PDF report rendering - shared by EmailService, live_scraper, demo_full and app
+Styles and table styles are built once at import; rendered PDFs are cached
+on disk by content hash (template + version + lead fields), evicted LRU.
+"""
+
+import os
+import io
+import json
+import hashlib
+import threading
+from pathlib import Path
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.units import inch
+
+PDF_CACHE_DIR = Path(os.getenv('PDF_CACHE_DIR', str(Path(__file__).parent / 'leads_db' / 'pdf_cache')))
+PDF_CACHE_MAX_BYTES = int(float(os.getenv('PDF_CACHE_MAX_MB', 200)) * 1024 * 1024)
+
+# Bump when any layout below changes so cached PDFs are re-rendered
+TEMPLATE_VERSION = 1
+
+# Lead fields that end up in a report (anything else doesn't change the PDF)
+LEAD_FIELDS = ['county', 'address', 'permit_type', 'estimated_value', 'permit_number',
+               'work_description', 'score', 'score_breakdown']
+
+_styles = getSampleStyleSheet()
+
+# ==================== TEMPLATES ====================
+
+class ReportTemplate:
+    """One report layout; paragraph and table styles are shared by every render"""
+
+    def __init__(self, title, title_style, table_style, col_widths, title_space, heading_space,
+                 lead_space, detailed=False):
+        self.title = title
+        self.title_style = title_style
+        self.table_style = table_style
+        self.col_widths = col_widths
+        self.title_space = title_space
+        self.heading_space = heading_space
+        self.lead_space = lead_space
+        self.detailed = detailed  # description + score breakdown rows
+
+    def rows(self, lead):
+        if not self.detailed:
+            return [
+                ['County:', lead.get('county', 'N/A')],
+                ['Address:', lead.get('address', 'N/A')],
+                ['Permit Type:', lead.get('permit_type', 'N/A')],
+                ['Value:', f"${lead.get('estimated_value', 0):,.2f}"],
+                ['Permit #:', lead.get('permit_number', 'N/A')],
+            ]
+
+        data = [
+            ['County:', lead.get('county', 'N/A')],
+            ['Address:', lead.get('address', 'N/A')],
+            ['Permit Type:', lead.get('permit_type', 'N/A')],
+            ['Estimated Value:', f"${lead.get('estimated_value', 0):,.2f}"],
+            ['Permit Number:', lead.get('permit_number', 'N/A')],
+            ['Description:', (lead.get('work_description') or 'N/A')[:100]],
+        ]
+
+        # Score breakdown
+        breakdown = lead.get('score_breakdown', {})
+        if breakdown:
+            data.append(['Job Size Score:', f"{breakdown.get('size_score', 0):.1f}"])
+            data.append(['Location Score:', f"{breakdown.get('location_score', 0):.1f}"])
+            data.append(['Urgency Score:', f"{breakdown.get('urgency_score', 0):.1f}"])
+            data.append(['Type Score:', f"{breakdown.get('type_score', 0):.1f}"])
+        return data
+
+    def build(self, leads, date):
+        """Render to PDF bytes"""
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
+        elements = [Paragraph(self.title.format(date=date), self.title_style), Spacer(1, self.title_space)]
+
+        for i, lead in enumerate(leads, 1):
+            elements.append(Paragraph(f"<b>Lead #{i} - Score: {lead.get('score', 0)}/100</b>", _styles['Heading2']))
+            if self.heading_space:
+                elements.append(Spacer(1, self.heading_space))
+
+            table = Table(self.rows(lead), colWidths=self.col_widths)
+            table.setStyle(self.table_style)
+            elements.append(table)
+            elements.append(Spacer(1, self.lead_space))
+
+        doc.build(elements)
+        return buffer.getvalue()
+
+
+TEMPLATES = {
+    # EmailService daily email attachment and /download_pdf
+    'leads': ReportTemplate(
+        title='Top 10 Contractor Leads - {date}',
+        title_style=ParagraphStyle(
+            'CustomTitle',
+            parent=_styles['Heading1'],
+            fontSize=20,
+            textColor=colors.HexColor('#1a5490'),
+            spaceAfter=30
+        ),
+        table_style=TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+        ]),
+        col_widths=[2*inch, 4.5*inch],
+        title_space=0.2*inch,
+        heading_space=0,
+        lead_space=0.3*inch,
+        detailed=True
+    ),
+    # live_scraper /live/pdf
+    'live': ReportTemplate(
+        title='<b>Top Contractor Leads - {date}</b>',
+        title_style=_styles['Heading1'],
+        table_style=TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        col_widths=[1.5*inch, 4.5*inch],
+        title_space=0.3*inch,
+        heading_space=0.1*inch,
+        lead_space=0.2*inch
+    ),
+    # demo_full /demo/pdf
+    'demo': ReportTemplate(
+        title='<b>Top 10 Contractor Leads - {date}</b>',
+        title_style=_styles['Heading1'],
+        table_style=TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        col_widths=[1.5*inch, 4.5*inch],
+        title_space=0.3*inch,
+        heading_space=0.1*inch,
+        lead_space=0.2*inch
+    ),
+}
+
+# ==================== CACHE ====================
+
+_evict_lock = threading.Lock()
+
+def cache_key(template, leads, date):
+    """sha256 of everything that affects the rendered bytes"""
+    content = {
+        'template': template,
+        'version': TEMPLATE_VERSION,
+        'date': date,
+        'leads': [{field: lead.get(field) for field in LEAD_FIELDS} for lead in leads],
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+def _evict():
+    """Drop least recently used PDFs until the cache fits PDF_CACHE_MAX_BYTES"""
+    with _evict_lock:
+        entries = []
+        for path in PDF_CACHE_DIR.glob('*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= PDF_CACHE_MAX_BYTES:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+def render(template, leads, date):
+    """(cache key, PDF bytes) - rendered only if this exact report isn't cached"""
+    key = cache_key(template, leads, date)
+    path = PDF_CACHE_DIR / f"{key}.pdf"
+
+    try:
+        data = path.read_bytes()
+        os.utime(path)  # mtime = last use, for LRU eviction
+        return key, data
+    except FileNotFoundError:
+        pass
+
+    data = TEMPLATES[template].build(leads, date)
+
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    _evict()
+    return key, data
+
+def render_pdf(template, leads, date):
+    """PDF as a BytesIO positioned at 0 (drop-in for the old generate_* functions)"""
+    _, data = render(template, leads, date)
+    return io.BytesIO(data)
+
+def send_pdf(template, leads, date, download_name):
+    """Flask response straight from the cached bytes; the cache key doubles as ETag"""
+    from flask import send_file
+
+    key, data = render(template, leads, date)
+    return send_file(
+        io.BytesIO(data),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        etag=key,
+        conditional=True
+    )
@@ -0,0 +1,330 @@
+"""
+Permit archive - append-only gzip CSV partitions instead of timestamped dumps
+
+    data/archive/county=<slug>/date=<YYYY-MM-DD pulled>/part-*.csv.gz
+
+- append() writes each batch as a new part file (temp file + rename, so
+  readers never see a half-written part and writers never contend)
+- a permit keeps only its latest copy per county: compact() merges each
+  partition's parts into one file and drops rows a newer partition has
+  again, read() applies the same rule to parts not yet compacted
+- partitions() / read() prune by county and date from the directory
+  names alone, without opening files outside the range
+- readers hold a county's lock shared, compaction holds it exclusive
+- every function takes root= to work on another archive; pull_all's plugin
+  rows (demo data) go to DEMO_ARCHIVE_DIR, never into the county archive
+"""
+
+import os
+import re
+import csv
+import gzip
+import fcntl
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+ARCHIVE_DIR = Path(os.getenv('PERMIT_ARCHIVE_DIR', 'data/archive'))
+DEMO_ARCHIVE_DIR = Path(os.getenv('PERMIT_DEMO_ARCHIVE_DIR', 'data/archive_demo'))
+
+# Background compaction interval in seconds (0 disables start_compactor)
+COMPACT_INTERVAL = float(os.getenv('PERMIT_ARCHIVE_COMPACT_SECONDS', 3600))
+
+COMPACTED_NAME = 'compacted.csv.gz'
+LOCK_NAME = '.lock'  # per county directory
+
+# First of these a row has is its permit key (rows without one dedup on every field)
+KEY_FIELDS = ('permit_number', 'Permit Number', 'record_number', 'permit_id')
+
+# Source/county names -> the county slug the web app filters on
+COUNTY_SLUGS = {
+    'nashville-davidson': 'davidson',
+    'nashville': 'davidson',
+    'davidson': 'davidson',
+    'bexar': 'bexar',
+    'sanantonio': 'bexar',
+    'austin-travis': 'travis',
+    'austin': 'travis',
+    'travis': 'travis',
+    'hamilton': 'hamilton',
+}
+
+_compactor = None
+_compactor_lock = threading.Lock()
+
+
+def county_slug(name):
+    """Partition slug for a county or city name ('Nashville-Davidson' -> 'davidson')"""
+    key = str(name or '').strip().lower()
+    return COUNTY_SLUGS.get(key) or re.sub(r'[^a-z0-9]+', '_', key).strip('_') or 'unknown'
+
+
+def _root(root):
+    return ARCHIVE_DIR if root is None else Path(root)
+
+
+def _day(value):
+    if value is None:
+        return date.today().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
+def partition_dir(county, day=None, root=None):
+    return county_dir(county, root) / f'date={_day(day)}'
+
+
+def _fieldnames(rows):
+    """Union of the rows' keys in first-seen order"""
+    fieldnames = {}
+    for row in rows:
+        fieldnames.update(dict.fromkeys(row))
+    return list(fieldnames)
+
+
+def _write_gz(path, rows, fieldnames):
+    """Write rows to a temp file beside path, then rename it into place"""
+    tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+    try:
+        with gzip.open(tmp_path, 'wt', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+def append(rows, county, day=None, root=None):
+    """Add a batch of rows to the county/day partition as a new part; returns its path"""
+    rows = list(rows)
+    if not rows:
+        return None
+    directory = partition_dir(county, day, root)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Names sort in write order (nanosecond clock first)
+    path = directory / f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.csv.gz"
+    _write_gz(path, rows, _fieldnames(rows))
+    return path
+
+
+def _partition_value(name, prefix):
+    return name[len(prefix):] if name.startswith(prefix) else None
+
+
+def county_dir(county, root=None):
+    return _root(root) / f'county={county_slug(county)}'
+
+
+def county_of(path):
+    """County slug of an archive county directory, else None"""
+    return _partition_value(Path(path).name, 'county=')
+
+
+def county_dirs(root=None):
+    """Every county directory in the archive"""
+    root = _root(root)
+    if not root.exists():
+        return []
+    return sorted(path for path in root.iterdir() if path.is_dir() and county_of(path))
+
+
+@contextmanager
+def _county_lock(county, mode, root=None):
+    with open(county_dir(county, root) / LOCK_NAME, 'a') as lock:
+        fcntl.flock(lock, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def partitions(counties=None, start=None, end=None, root=None):
+    """[(county slug, 'YYYY-MM-DD', dir)] within the filters, oldest first"""
+    wanted = {county_slug(county) for county in counties} if counties is not None else None
+    start = _day(start) if start is not None else None
+    end = _day(end) if end is not None else None
+
+    found = []
+    for directory in county_dirs(root):
+        county = county_of(directory)
+        if wanted is not None and county not in wanted:
+            continue
+        for day_dir in directory.iterdir():
+            day = _partition_value(day_dir.name, 'date=')
+            if day is None or (start and day < start) or (end and day > end):
+                continue
+            found.append((county, day, day_dir))
+    return sorted(found, key=lambda item: (item[1], item[0]))
+
+
+def _by_county(found):
+    counties = {}
+    for county, day, directory in found:
+        counties.setdefault(county, []).append((day, directory))
+    return counties
+
+
+def partition_files(directory):
+    """Data files of one partition, compacted file first, then parts in write order"""
+    parts = sorted(Path(directory).glob('part-*.csv.gz'))
+    compacted = Path(directory) / COMPACTED_NAME
+    return ([compacted] if compacted.exists() else []) + parts
+
+
+def signature(county, root=None):
+    """(latest mtime, data bytes) of a county's archive - changes with every append or compaction"""
+    directory = county_dir(county, root)
+    latest = directory.stat().st_mtime
+    size = 0
+    for path in directory.rglob('*'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        latest = max(latest, stat.st_mtime)
+        if path.is_file() and not path.name.startswith('.'):
+            size += stat.st_size
+    return latest, size
+
+
+def read_file(path):
+    """Rows of one archive file"""
+    with gzip.open(path, 'rt', newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def permit_key(row):
+    for field in KEY_FIELDS:
+        if row.get(field):
+            return (field, row[field].strip())
+    return tuple(sorted(row.items()))
+
+
+def read(counties=None, start=None, end=None, root=None):
+    """
+    Latest copy of each permit in the matching partitions, newest first,
+    with the county slug and partition date attached (city, partition_date)
+    """
+    for county, days in _by_county(partitions(counties, start, end, root)).items():
+        rows = []
+        seen = set()
+        with _county_lock(county, fcntl.LOCK_SH, root):
+            for day, directory in reversed(days):
+                for path in reversed(partition_files(directory)):
+                    for row in reversed(list(read_file(path))):
+                        key = permit_key(row)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        row.setdefault('city', county)
+                        row.setdefault('partition_date', day)
+                        rows.append(row)
+        yield from rows
+
+
+def compact_partition(directory, newer_keys=None, min_files=2):
+    """
+    Merge a partition's files into one deduplicated file, dropping permits in
+    newer_keys (seen in a later partition) and adding this partition's keys to it.
+    Returns rows kept, or None when the partition was already compact.
+    Caller holds the county lock.
+    """
+    directory = Path(directory)
+    newer_keys = set() if newer_keys is None else newer_keys
+    sources = partition_files(directory)
+
+    merged = {}
+    total = 0
+    for path in sources:
+        for row in read_file(path):
+            total += 1
+            key = permit_key(row)
+            merged.pop(key, None)  # latest copy wins and moves to the end
+            merged[key] = row
+    rows = [row for key, row in merged.items() if key not in newer_keys]
+    newer_keys.update(merged)
+
+    if len(sources) < min_files and len(rows) == total:
+        return None
+
+    compacted = directory / COMPACTED_NAME
+    if rows:
+        _write_gz(compacted, rows, _fieldnames(rows))
+    for path in sources:
+        if path != compacted or not rows:
+            path.unlink()
+    if not rows:
+        try:
+            directory.rmdir()
+        except OSError:
+            pass  # a part landed meanwhile
+    return len(rows)
+
+
+def compact(counties=None, min_files=2, root=None):
+    """
+    Compact every partition of the given counties (all by default), newest day
+    first, so each permit ends up only in its latest partition; returns {dir: rows kept}
+    """
+    results = {}
+    for county, days in _by_county(partitions(counties, root=root)).items():
+        newer_keys = set()
+        try:
+            with _county_lock(county, fcntl.LOCK_EX, root):
+                for day, directory in reversed(days):
+                    kept = compact_partition(directory, newer_keys, min_files)
+                    if kept is not None:
+                        results[str(directory)] = kept
+                        print(f"🗜️  Compacted {county} {day}: {kept} permits")
+        except Exception as e:
+            print(f"❌ Compacting {county} failed: {e}")
+    return results
+
+
+def _compact_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            for root in (ARCHIVE_DIR, DEMO_ARCHIVE_DIR):
+                compact(root=root)
+        except Exception as e:
+            print(f"❌ Archive compaction failed: {e}")
+
+
+def start_compactor(interval=COMPACT_INTERVAL):
+    """Run compact() every interval seconds in a daemon thread (once per process)"""
+    global _compactor
+    if interval <= 0:
+        return None
+    with _compactor_lock:
+        if _compactor is None:
+            _compactor = threading.Thread(target=_compact_forever, args=(interval,),
+                                          name='permit-archive-compactor', daemon=True)
+            _compactor.start()
+    return _compactor
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Permit archive maintenance')
+    parser.add_argument('command', choices=['compact', 'list'])
+    parser.add_argument('--county', action='append', help='limit to these counties')
+    parser.add_argument('--start', help='first partition date (YYYY-MM-DD), list only')
+    parser.add_argument('--end', help='last partition date (YYYY-MM-DD), list only')
+    parser.add_argument('--demo', action='store_true', help=f'use the demo archive ({DEMO_ARCHIVE_DIR})')
+    args = parser.parse_args()
+    root = DEMO_ARCHIVE_DIR if args.demo else ARCHIVE_DIR
+
+    if args.command == 'compact':
+        compact(args.county, root=root)
+    else:
+        for county, day, directory in partitions(args.county, args.start, args.end, root):
+            print(f"{county}\t{day}\t{len(partition_files(directory))} files")
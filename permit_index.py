@@ -0,0 +1,224 @@
+"""
+Permit index - scraped CSV files indexed into SQLite at ingest time
+The web routes query this instead of re-reading every CSV on each request
+Sources: the permit archive (one source per county, latest copy of each permit),
+plus legacy scraped_permits/*.csv; demo data: data/permits.csv and the demo archive
+"""
+
+import os
+import csv
+import json
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from permit_store import get_db
+import permit_archive
+
+SCRAPED_DIR = Path(os.getenv('SCRAPED_PERMITS_DIR', 'scraped_permits'))
+MOCK_PERMITS_FILE = Path(os.getenv('MOCK_PERMITS_FILE', 'data/permits.csv'))
+
+# Directory stat sweep at most this often per process
+REFRESH_INTERVAL = float(os.getenv('PERMIT_INDEX_REFRESH_SECONDS', 10))
+
+# scraped_permits/<city>_<timestamp>.csv -> county slug
+FILE_CITY_MAP = {
+    'sanantonio': 'bexar',
+    'nashville': 'davidson',
+    'austin': 'travis',
+    'hamilton': 'hamilton'
+}
+
+# data/permits.csv 'county' column -> county slug
+MOCK_COUNTY_MAP = {
+    'Nashville-Davidson': 'davidson',
+    'Bexar': 'bexar',
+    'Hamilton': 'hamilton',
+    'Austin-Travis': 'travis'
+}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+
+def init_index():
+    """Create the index tables"""
+    with get_db() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS indexed_files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS csv_permits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_path TEXT NOT NULL,
+                city TEXT,
+                permit_number TEXT,
+                pull_time TEXT,
+                estimated_value REAL,
+                data TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_csv_permits_city ON csv_permits (city, pull_time)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_csv_permits_number ON csv_permits (permit_number)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_csv_permits_pull_time ON csv_permits (pull_time)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_csv_permits_source ON csv_permits (source_path)')
+
+def _to_float(value):
+    try:
+        return float(str(value).replace('$', '').replace(',', '') or 0)
+    except ValueError:
+        return 0.0
+
+def _signature(source):
+    """(mtime, size) a source is re-indexed on; raises FileNotFoundError if it vanished"""
+    county = permit_archive.county_of(source)
+    if county:
+        return permit_archive.signature(county, source.parent)
+    stat = source.stat()
+    return stat.st_mtime, stat.st_size
+
+def _read_rows(csv_file):
+    """Rows of one CSV (or archive county) with the city/pull_time fields the templates expect"""
+    county = permit_archive.county_of(csv_file)
+    if county:
+        for row in permit_archive.read([county], root=csv_file.parent):
+            row['city'] = county
+            if 'pull_time' not in row:
+                row['pull_time'] = row.get('scraped_at') or row.get('date') or row['partition_date']
+            yield row
+        return
+
+    mtime = datetime.fromtimestamp(csv_file.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+    is_mock = csv_file.resolve() == MOCK_PERMITS_FILE.resolve()
+    if not is_mock:
+        city_name = csv_file.name.split('_')[0]
+        city_slug = FILE_CITY_MAP.get(city_name, city_name)
+
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if is_mock:
+                county = row.get('county', '')
+                row['city'] = MOCK_COUNTY_MAP.get(county, county.lower().replace(' ', '_'))
+                if 'pull_time' not in row:
+                    row['pull_time'] = row.get('date') or mtime
+            else:
+                row['city'] = city_slug
+                if 'pull_time' not in row:
+                    row['pull_time'] = mtime
+            yield row
+
+def index_file(csv_file):
+    """(Re)index a single CSV file or archive county - replaces any rows it produced before"""
+    csv_file = Path(csv_file)
+    # Taken before reading: a change while reading shows up on the next refresh
+    mtime, size = _signature(csv_file)
+    rows = [
+        (str(csv_file), row['city'], row.get('permit_number'), row['pull_time'],
+         _to_float(row.get('estimated_value')), json.dumps(row))
+        for row in _read_rows(csv_file)
+    ]
+    with get_db() as conn:
+        conn.execute('DELETE FROM csv_permits WHERE source_path = ?', (str(csv_file),))
+        conn.executemany(
+            '''INSERT INTO csv_permits (source_path, city, permit_number, pull_time, estimated_value, data)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            rows
+        )
+        conn.execute(
+            'INSERT OR REPLACE INTO indexed_files (path, mtime, size) VALUES (?, ?, ?)',
+            (str(csv_file), mtime, size)
+        )
+    return len(rows)
+
+def _source_files():
+    files = permit_archive.county_dirs()
+    files += permit_archive.county_dirs(permit_archive.DEMO_ARCHIVE_DIR)
+    files += sorted(SCRAPED_DIR.glob('*.csv')) if SCRAPED_DIR.exists() else []
+    if MOCK_PERMITS_FILE.exists():
+        files.append(MOCK_PERMITS_FILE)
+    return files
+
+def refresh(force=False):
+    """Index new or changed CSVs and drop rows of deleted ones (stat only when unchanged)"""
+    global _last_refresh
+    with _refresh_lock:
+        if not force and time.time() - _last_refresh < REFRESH_INTERVAL:
+            return
+        _last_refresh = time.time()
+
+        init_index()
+        with get_db() as conn:
+            known = {row['path']: (row['mtime'], row['size'])
+                     for row in conn.execute('SELECT path, mtime, size FROM indexed_files')}
+
+        current = set()
+        for csv_file in _source_files():
+            path = str(csv_file)
+            try:
+                signature = _signature(csv_file)
+            except FileNotFoundError:
+                continue  # removed since listing (rows dropped below)
+            current.add(path)
+            if known.get(path) == signature:
+                continue
+            try:
+                count = index_file(csv_file)
+                print(f"📇 Indexed {count} permits from {csv_file}")
+            except Exception as e:
+                print(f"Error reading {csv_file}: {e}")
+
+        removed = [path for path in known if path not in current]
+        if removed:
+            with get_db() as conn:
+                conn.executemany('DELETE FROM csv_permits WHERE source_path = ?', [(p,) for p in removed])
+                conn.executemany('DELETE FROM indexed_files WHERE path = ?', [(p,) for p in removed])
+
+def query_permits(cities=None, limit=None, include_mock=True):
+    """
+    Indexed permits (optionally for some county slugs), most recent pull first
+    include_mock=False leaves out the demo rows of data/permits.csv and the demo
+    archive pull_all writes (the dashboard never showed them)
+    """
+    refresh()
+    query = 'SELECT data FROM csv_permits'
+    conditions = []
+    params = []
+    if cities is not None:
+        cities = list(cities)
+        if not cities:
+            return []
+        conditions.append(f"city IN ({','.join('?' * len(cities))})")
+        params.extend(cities)
+    if not include_mock:
+        conditions.append('source_path != ? AND instr(source_path, ?) != 1')
+        params.extend([str(MOCK_PERMITS_FILE), str(permit_archive.DEMO_ARCHIVE_DIR / 'county=')])
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY pull_time DESC, id'
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+    with get_db() as conn:
+        return [json.loads(row['data']) for row in conn.execute(query, params)]
+
+def get_permit(permit_number):
+    """Most recently pulled row for a permit number"""
+    refresh()
+    with get_db() as conn:
+        row = conn.execute(
+            'SELECT data FROM csv_permits WHERE permit_number = ? ORDER BY pull_time DESC LIMIT 1',
+            (permit_number,)
+        ).fetchone()
+    return json.loads(row['data']) if row else None
+
+def summary():
+    """(sorted city slugs, total estimated value) across the index"""
+    refresh()
+    with get_db() as conn:
+        cities = [row['city'] for row in conn.execute(
+            "SELECT DISTINCT city FROM csv_permits WHERE city IS NOT NULL AND city != '' ORDER BY city")]
+        total_value = conn.execute('SELECT COALESCE(SUM(estimated_value), 0) FROM csv_permits').fetchone()[0]
+    return cities, int(total_value)
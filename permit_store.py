@@ -0,0 +1,164 @@
+"""
+Permit store - SQLite table of scraped leads
+Replaces leads_db/current_leads.json; one row per (state, county, permit_number)
+"""
+
+import os
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from contextlib import contextmanager
+
+PERMITS_DB_PATH = os.getenv('PERMITS_DB_PATH', str(Path(__file__).parent / 'leads_db' / 'permits.db'))
+LEGACY_JSON_PATH = Path(__file__).parent / 'leads_db' / 'current_leads.json'
+
+# Columns lifted out of the lead dict for indexing; everything else lives in `data`
+LEAD_COLUMNS = ['permit_number', 'address', 'permit_type', 'date', 'score', 'estimated_value', 'work_description']
+
+# Sort orders exposed to callers (never interpolate user input into ORDER BY)
+ORDER_BY = {
+    'date': 'date DESC, id DESC',
+    'score': 'score DESC, date DESC',
+    'value': 'estimated_value DESC',
+    'first_seen': 'first_seen DESC',
+}
+
+@contextmanager
+def get_db():
+    """Context manager for permit store connections"""
+    Path(PERMITS_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(PERMITS_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def init_store():
+    """Create the permits table and import the legacy JSON file once"""
+    with get_db() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS permits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                state TEXT NOT NULL,
+                county TEXT NOT NULL,
+                permit_number TEXT NOT NULL,
+                address TEXT,
+                permit_type TEXT,
+                date TEXT,
+                score INTEGER,
+                estimated_value REAL,
+                work_description TEXT,
+                data TEXT,
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(state, county, permit_number)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_permits_county_date ON permits (state, county, date)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_permits_county_score ON permits (state, county, score)')
+        empty = conn.execute('SELECT 1 FROM permits LIMIT 1').fetchone() is None
+
+    if empty and LEGACY_JSON_PATH.exists():
+        migrate_json(LEGACY_JSON_PATH)
+
+def migrate_json(json_path=LEGACY_JSON_PATH):
+    """Import a current_leads.json export into the permits table"""
+    with open(json_path, 'r') as f:
+        db = json.load(f)
+
+    leads_by_region = {}
+    for state, counties in db.get('leads', {}).items():
+        for county, leads in counties.items():
+            leads_by_region[f"{state}/{county}"] = leads
+
+    added, _ = merge_leads(leads_by_region)
+    print(f"📦 Migrated {added:,} leads from {json_path}")
+    return added
+
+def _to_row(state, county, lead, now):
+    values = [state, county] + [lead.get(col) for col in LEAD_COLUMNS]
+    values.append(json.dumps(lead, default=str))
+    values.append(lead.get('first_seen') or now)
+    values.append(now)
+    return values
+
+def merge_leads(leads_by_region):
+    """
+    Upsert leads keyed by 'state/county' region
+
+    New permits are inserted with first_seen; permits we already have get
+    their details refreshed but keep first_seen. Returns (added, existing).
+    """
+    now = datetime.now().isoformat()
+    added = 0
+    existing = 0
+
+    with get_db() as conn:
+        for region_key, leads in leads_by_region.items():
+            state, county = region_key.split('/')
+            rows = [_to_row(state, county, lead, now) for lead in leads if lead.get('permit_number')]
+            if not rows:
+                continue
+
+            count_sql = 'SELECT COUNT(*) FROM permits WHERE state = ? AND county = ?'
+            before = conn.execute(count_sql, (state, county)).fetchone()[0]
+            conn.executemany('''
+                INSERT INTO permits (state, county, permit_number, address, permit_type, date, score,
+                    estimated_value, work_description, data, first_seen, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(state, county, permit_number) DO UPDATE SET
+                    address = excluded.address, permit_type = excluded.permit_type,
+                    date = excluded.date, score = excluded.score,
+                    estimated_value = excluded.estimated_value,
+                    work_description = excluded.work_description,
+                    data = excluded.data, updated_at = excluded.updated_at
+            ''', rows)
+            inserted = conn.execute(count_sql, (state, county)).fetchone()[0] - before
+
+            added += inserted
+            existing += len(rows) - inserted
+            print(f"   ✅ {region_key}: {inserted} new, {len(rows) - inserted} already stored")
+
+    return added, existing
+
+def _row_to_lead(row):
+    lead = json.loads(row['data']) if row['data'] else {}
+    for col in LEAD_COLUMNS:
+        if row[col] is not None:
+            lead[col] = row[col]
+    lead['first_seen'] = row['first_seen']
+    return lead
+
+def get_county_leads(state, county, limit=50, offset=0, order='date'):
+    """Leads for one county, newest first by default"""
+    with get_db() as conn:
+        rows = conn.execute(
+            f'''SELECT * FROM permits WHERE state = ? AND county = ?
+                ORDER BY {ORDER_BY.get(order, ORDER_BY['date'])} LIMIT ? OFFSET ?''',
+            (state, county, limit, offset)
+        ).fetchall()
+    return [_row_to_lead(row) for row in rows]
+
+def count_leads(state=None, county=None):
+    """Number of stored leads, optionally for one state/county"""
+    query = 'SELECT COUNT(*) FROM permits'
+    params = []
+    if state and county:
+        query += ' WHERE state = ? AND county = ?'
+        params = [state, county]
+    elif state:
+        query += ' WHERE state = ?'
+        params = [state]
+    with get_db() as conn:
+        return conn.execute(query, params).fetchone()[0]
+
+def last_updated():
+    """Timestamp of the most recent upsert"""
+    with get_db() as conn:
+        return conn.execute('SELECT MAX(updated_at) FROM permits').fetchone()[0]
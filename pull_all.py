@@ -1,43 +1,121 @@
 #!/usr/bin/env python3
 """
 Master scraper - runs all city scrapers
+- plugins: scrape_<name>() in scrape/<name>.py, plus any installed package
+  that registers "name = module:function" under the permits.scrapers
+  entry-point group; each returns a list of permit dicts and writes nothing
+- plugins run in a process pool; rows come back to this process, and workers
+  still running at PULL_TIMEOUT are terminated
+- one writer adds every row to the demo permit archive (data/archive_demo/,
+  one gzip CSV part per county/day) in a single batch; the built-in plugins
+  return sample rows, so they stay out of the county archive the scrapers fill
 """
 import os
 import sys
-import importlib.util
+import time
+import queue
+import importlib
+import multiprocessing
+from importlib.metadata import entry_points
+import permit_archive
 
-def run_all_scrapers():
-    """Import and run all scrapers in the scrape/ directory"""
-    scrape_dir = 'scrape'
+SCRAPE_DIR = 'scrape'
+ENTRY_POINT_GROUP = 'permits.scrapers'
+FIELDNAMES = ['county', 'permit_number', 'address', 'permit_type', 'estimated_value', 'work_description', 'date']
 
-    if not os.path.exists(scrape_dir):
-        print(f"❌ {scrape_dir} directory not found")
-        return
+PULL_WORKERS = int(os.getenv('PULL_WORKERS', min(4, os.cpu_count() or 1)))
+PULL_TIMEOUT = float(os.getenv('PULL_TIMEOUT', 600))  # whole run, seconds
 
-    # Find all .py files in scrape/
-    scraper_files = [f for f in os.listdir(scrape_dir) if f.endswith('.py')]
 
-    for scraper_file in scraper_files:
-        module_name = scraper_file[:-3]  # remove .py
-        module_path = os.path.join(scrape_dir, scraper_file)
+def discover_plugins():
+    """{name: 'module:function'} for the built-in scrape/ modules and installed entry points"""
+    plugins = {}
+    if os.path.isdir(SCRAPE_DIR):
+        for scraper_file in sorted(os.listdir(SCRAPE_DIR)):
+            if scraper_file.endswith('.py') and not scraper_file.startswith('_'):
+                name = scraper_file[:-3]
+                plugins[name] = f'{SCRAPE_DIR}.{name}:scrape_{name}'
 
-        print(f"🚀 Running {module_name}...")
+    # Entry points win, so a packaged scraper can replace a built-in one
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        plugins[entry_point.name] = entry_point.value
 
-        try:
-            # Import the module
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+    only = os.getenv('PULL_SCRAPERS')  # comma-separated subset
+    if only:
+        wanted = {name.strip() for name in only.split(',')}
+        plugins = {name: target for name, target in plugins.items() if name in wanted}
+    return plugins
 
-            # Call the scrape function (assuming it's named scrape_<city>)
-            scrape_func = getattr(module, f'scrape_{module_name}', None)
-            if scrape_func:
-                scrape_func()
-            else:
-                print(f"❌ No scrape_{module_name} function found in {scraper_file}")
 
-        except Exception as e:
-            print(f"❌ Error running {scraper_file}: {e}")
+def run_plugin(target):
+    """Import 'module:function' and call it - runs in a worker process"""
+    module_name, _, func_name = target.partition(':')
+    module = importlib.import_module(module_name)
+    scrape_func = getattr(module, func_name, None)
+    if scrape_func is None:
+        raise AttributeError(f"No {func_name} function found in {module_name}")
+    return list(scrape_func() or [])
+
+
+def write_batch(rows):
+    """
+    Add all rows to the archive in one pass - one new part per county/day
+    partition, each renamed into place whole, so concurrent runs never mix rows
+    """
+    rows = [{field: row.get(field, '') for field in FIELDNAMES} for row in rows]
+    by_partition = {}
+    for row in rows:
+        by_partition.setdefault((permit_archive.county_slug(row['county']), row['date'] or None), []).append(row)
+    for (county, day), partition_rows in by_partition.items():
+        permit_archive.append(partition_rows, county, day, root=permit_archive.DEMO_ARCHIVE_DIR)
+    return len(rows)
+
+
+def run_all_scrapers(workers=PULL_WORKERS, timeout=PULL_TIMEOUT):
+    """Run every plugin in a process pool and write all their rows in one batch"""
+    plugins = discover_plugins()
+    if not plugins:
+        print(f"❌ No scrapers found in {SCRAPE_DIR}/ or the {ENTRY_POINT_GROUP} entry points")
+        return []
+
+    # Workers import scrape.<name> relative to this directory
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    rows = []
+    finished = queue.Queue()  # (name, permits, error), filled by the pool's result thread
+    pool = multiprocessing.Pool(processes=max(1, min(workers, len(plugins))))
+    for name, target in plugins.items():
+        print(f"🚀 Running {name}...")
+        pool.apply_async(run_plugin, (target,),
+                         callback=lambda permits, name=name: finished.put((name, permits, None)),
+                         error_callback=lambda e, name=name: finished.put((name, None, e)))
+    pool.close()
+
+    pending = set(plugins)
+    deadline = time.monotonic() + timeout
+    try:
+        while pending:
+            try:
+                name, permits, error = finished.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                print(f"⏱️  Gave up after {timeout:.0f}s waiting for: {', '.join(sorted(pending))}")
+                break
+            pending.discard(name)
+            if error is not None:
+                print(f"❌ Error running {name}: {error}")
+                continue
+            print(f"✅ {name}: {len(permits)} permits")
+            rows.extend(permits)
+    finally:
+        # Kill stuck scrapers so the timeout bounds the whole run
+        pool.terminate()
+        pool.join()
+
+    written = write_batch(rows)
+    print(f"✅ Added {written} permits to {permit_archive.DEMO_ARCHIVE_DIR}")
+    return rows
+
 
 if __name__ == '__main__':
     run_all_scrapers()
@@ -2,7 +2,7 @@
 """
 Research script to find REAL building permit APIs for all cities
 """
-import requests
+import http_client
 import json
 
 def test_api(name, url, params=None):
@@ -10,7 +10,7 @@ def test_api(name, url, params=None):
     try:
         print(f"\n🔍 Testing {name}...")
         print(f"   URL: {url}")
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params, timeout=10)
         print(f"   Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -8,6 +8,7 @@ from scrapers import ScraperOrchestrator
 from ai_scorer import LeadScorer
 from firebase_backend import FirebaseBackend
 from email_service import EmailService
+import config
 
 
 class LeadScheduler:
@@ -15,7 +16,10 @@ class LeadScheduler:
     
     def __init__(self):
         self.scraper = ScraperOrchestrator()
-        self.scorer = LeadScorer()
+        # Model loads lazily on the first scoring run
+        self.scorer = LeadScorer(config.HF_MODEL_NAME, batch_size=config.HF_BATCH_SIZE,
+                                 cache_path=config.URGENCY_CACHE_PATH,
+                                 backend=config.SCORER_BACKEND, onnx_dir=config.ONNX_MODEL_DIR)
         self.firebase = FirebaseBackend()
         self.email_service = EmailService()
     
@@ -56,6 +60,8 @@ class LeadScheduler:
             print("\nStep 4: Saving permits to database...")
             batch_id = datetime.now().strftime('%Y%m%d_%H%M%S')
             self.firebase.save_permits(scored_permits, batch_id)
+            # Saved - unchanged permits pages can be skipped next run
+            self.scraper.commit_fingerprints()
             
             # Save daily leads
             date_str = datetime.now().strftime('%Y-%m-%d')
@@ -69,12 +75,10 @@ class LeadScheduler:
             subscribers = self.firebase.get_active_subscribers()
             print(f"Found {len(subscribers)} active subscribers")
             
-            success_count = 0
-            for subscriber in subscribers:
-                email = subscriber.get('email')
-                if email:
-                    if self.email_service.send_daily_leads(email, top_leads, date_str):
-                        success_count += 1
+            # PDF/HTML built once, sent over pooled SMTP connections
+            recipients = [subscriber.get('email') for subscriber in subscribers if subscriber.get('email')]
+            outcomes = self.email_service.send_bulk_daily_leads(recipients, top_leads, date_str)
+            success_count = sum(1 for outcome in outcomes if outcome['status'] == 'sent')
             
             print(f"\nJob completed successfully!")
             print(f"Emails sent: {success_count}/{len(subscribers)}")
@@ -101,8 +105,6 @@ class LeadScheduler:
 
 def main():
     """Entry point for scheduler"""
-    import config
-    
     scheduler = LeadScheduler()
     scheduler.start_scheduler(config.SCRAPE_TIME)
 
@@ -0,0 +1,304 @@
+"""
+Lead scoring engine - scores a whole batch of permits at once
+Permits are turned into column arrays, keyword lists into compiled regex
+tables, and every component is computed with NumPy over the full batch.
+All scorers (ai_scorer, multi_region, live, demo) run on these profiles.
+"""
+import re
+import numpy as np
+
+
+# ==================== COLUMNS ====================
+
+def _text_column(permits, field):
+    return np.array(['' if p.get(field) is None else str(p.get(field)) for p in permits], dtype=object)
+
+
+def _to_number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _number_column(permits, field):
+    return np.fromiter((_to_number(p.get(field)) for p in permits), dtype=float, count=len(permits))
+
+
+def _factorize(values):
+    """(unique values, codes) - keyword tables only run once per distinct string"""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.intp, count=len(values))
+    return list(index), codes
+
+
+# ==================== COMPONENTS ====================
+
+class ValueBands:
+    """Score a numeric field by thresholds (np.digitize over the whole column)"""
+
+    def __init__(self, field, edges, scores, right=False, zero_score=None):
+        # right=False: edge values fall in the upper band (>=), right=True: lower band (>)
+        self.field = field
+        self.edges = np.asarray(edges, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self.right = right
+        self.zero_score = zero_score
+
+    def fields(self):
+        return {self.field: 'number'}
+
+    def __call__(self, columns):
+        values = columns[self.field]
+        result = self.scores[np.digitize(values, self.edges, right=self.right)]
+        if self.zero_score is not None:
+            result = np.where(values == 0, self.zero_score, result)
+        return result
+
+
+class KeywordTiers:
+    """
+    First matching tier wins: each tier is one compiled regex alternation
+    A row matches a tier if any of its fields contains any tier keyword.
+    """
+
+    def __init__(self, fields, tiers, default, lowercase=True):
+        self.text_fields = list(fields)
+        self.tiers = [(score, re.compile('|'.join(re.escape(k) for k in keywords)))
+                      for score, keywords in tiers if keywords]
+        self.default = default
+        self.lowercase = lowercase
+
+    def fields(self):
+        return {field: 'text' for field in self.text_fields}
+
+    def _rank(self, values):
+        """Index of the first matching tier per row (len(tiers) when none match)"""
+        uniq, codes = _factorize(values)
+        if self.lowercase:
+            uniq = [u.lower() for u in uniq]
+        rank = np.full(len(uniq), len(self.tiers))
+        for i in reversed(range(len(self.tiers))):
+            pattern = self.tiers[i][1]
+            hits = np.fromiter((pattern.search(u) is not None for u in uniq), dtype=bool, count=len(uniq))
+            rank[hits] = i
+        return rank[codes]
+
+    def __call__(self, columns):
+        # Earlier tiers outrank later ones whichever field matched
+        rank = np.minimum.reduce([self._rank(columns[field]) for field in self.text_fields])
+        lookup = np.array([score for score, _ in self.tiers] + [self.default], dtype=float)
+        return lookup[rank]
+
+
+class ExactMatch:
+    """hit if the field equals one of the values, else miss"""
+
+    def __init__(self, field, values, hit, miss):
+        self.field = field
+        self.values = set(values)
+        self.hit = hit
+        self.miss = miss
+
+    def fields(self):
+        return {self.field: 'text'}
+
+    def __call__(self, columns):
+        uniq, codes = _factorize(columns[self.field])
+        result = np.array([self.hit if u in self.values else self.miss for u in uniq], dtype=float)
+        return result[codes]
+
+
+class Constant:
+    """Same score for every row (placeholder components)"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def fields(self):
+        return {}
+
+    def __call__(self, columns):
+        return np.full(columns['_size'], float(self.value))
+
+
+class Provided:
+    """Scores computed outside the engine (e.g. model inference), default when absent"""
+
+    def __init__(self, default):
+        self.default = default
+
+    def fields(self):
+        return {}
+
+    def __call__(self, columns):
+        return np.full(columns['_size'], float(self.default))
+
+
+class Sum:
+    """Sum of components, capped"""
+
+    def __init__(self, parts, cap=100):
+        self.parts = parts
+        self.cap = cap
+
+    def fields(self):
+        merged = {}
+        for part in self.parts:
+            merged.update(part.fields())
+        return merged
+
+    def __call__(self, columns):
+        return np.minimum(sum(part(columns) for part in self.parts), self.cap)
+
+
+# ==================== PROFILES ====================
+
+class ScoringProfile:
+    """Named components and their weights; total = weighted sum, capped and rounded"""
+
+    def __init__(self, components, weights, digits=None, cap=100):
+        self.components = components
+        self.weights = weights
+        self.digits = digits  # None -> integer total
+        self.cap = cap
+
+    def fields(self):
+        merged = {}
+        for component in self.components.values():
+            merged.update(component.fields())
+        return merged
+
+    def columns(self, permits):
+        """Columnar view of the permit dicts this profile needs"""
+        columns = {'_size': len(permits)}
+        for field, kind in self.fields().items():
+            columns[field] = _number_column(permits, field) if kind == 'number' else _text_column(permits, field)
+        return columns
+
+    def score_columns(self, columns, provided=None):
+        """Return (unrounded totals, {component: scores}) for a columnar batch"""
+        provided = provided or {}
+        breakdown = {}
+        total = np.zeros(columns['_size'])
+        for name, component in self.components.items():
+            scores = np.asarray(provided[name], dtype=float) if name in provided else component(columns)
+            breakdown[name] = scores
+            total += scores * self.weights.get(name, 1.0)
+        return np.minimum(total, self.cap), breakdown
+
+    def finish(self, totals):
+        """Rounded Python numbers (builtin round, same as the old scorers)"""
+        if self.digits is None:
+            return [int(t) for t in totals.tolist()]
+        return [round(t, self.digits) for t in totals.tolist()]
+
+
+def _plain(value):
+    """NumPy scalar -> int/float like the old per-permit scorers returned"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def score_permits(profile, permits, provided=None, breakdown=True):
+    """Score permit dicts in place ('score' and optionally 'score_breakdown')"""
+    if not permits:
+        return permits
+    totals, parts = profile.score_columns(profile.columns(permits), provided)
+    totals = profile.finish(totals)
+    parts = {name: scores.tolist() for name, scores in parts.items()}
+    for i, permit in enumerate(permits):
+        permit['score'] = totals[i]
+        if breakdown:
+            permit['score_breakdown'] = {name: _plain(scores[i]) for name, scores in parts.items()}
+    return permits
+
+
+def score_component(component, permits):
+    """Scores of a single component for permit dicts"""
+    if not permits:
+        return []
+    profile = ScoringProfile({'component': component}, {})
+    return [_plain(v) for v in component(profile.columns(permits)).tolist()]
+
+
+def score_values(profile, permits):
+    """Just the total scores, in order"""
+    if not permits:
+        return []
+    totals, _ = profile.score_columns(profile.columns(permits))
+    return profile.finish(totals)
+
+
+WEIGHTS = {
+    'size_score': 0.35,
+    'location_score': 0.25,
+    'urgency_score': 0.20,
+    'type_score': 0.20
+}
+
+
+def ai_profile(high_value_types, premium_areas):
+    """LeadScorer profile - urgency comes from the sentiment model"""
+    return ScoringProfile({
+        'size_score': ValueBands('estimated_value', [10000, 50000, 100000, 250000],
+                                 [20, 40, 60, 80, 100], zero_score=30),
+        'location_score': Sum([
+            KeywordTiers(['address', 'county'], [(85, premium_areas)], default=50),
+            KeywordTiers(['county'], [(15, ['williamson']), (10, ['davidson'])], default=0),
+        ], cap=100),
+        'urgency_score': Provided(default=50),
+        'type_score': KeywordTiers(['permit_type'], [
+            (90, high_value_types),
+            (60, ['repair', 'alteration', 'replacement', 'install']),
+            (30, ['fence', 'sign', 'demolition', 'pool']),
+        ], default=50),
+    }, WEIGHTS, digits=2)
+
+
+# Keyword stand-in for the sentiment model (LeadScorer heuristic backend)
+HEURISTIC_URGENCY = KeywordTiers(['permit_type', 'work_description'], [
+    (80, ['new construction', 'new building', 'commercial', 'multi-family', 'restaurant', 'retail']),
+    (70, ['addition', 'renovation', 'remodel', 'build out', 'tenant finish']),
+    (55, ['alteration', 'install', 'replacement']),
+    (35, ['repair', 'demolition', 'fence', 'sign', 'pool']),
+], default=50)
+
+# live_scraper.score_permit_ai
+LIVE_PROFILE = ScoringProfile({
+    'size_score': ValueBands('estimated_value', [100000, 250000, 500000], [50, 65, 80, 95]),
+    'location_score': KeywordTiers(['address'], [
+        (90, ['nashville', 'broadway', 'downtown']),
+        (75, ['murfreesboro', 'gallatin', 'brentwood']),
+    ], default=60),
+    'urgency_score': Constant(72),
+    'type_score': KeywordTiers(['permit_type'], [
+        (85, ['commercial', 'new construction']),
+        (70, ['addition', 'renovation']),
+    ], default=60),
+}, WEIGHTS, digits=1)
+
+# demo_full.score_permit_demo
+DEMO_PROFILE = ScoringProfile({
+    'size_score': ValueBands('estimated_value', [100000, 200000, 500000], [45, 60, 75, 90]),
+    'location_score': KeywordTiers(['address'], [
+        (90, ['nashville', 'broadway']),
+        (75, ['murfreesboro', 'gallatin']),
+    ], default=60),
+    'urgency_score': Constant(75),
+    'type_score': KeywordTiers(['permit_type'], [
+        (85, ['new construction', 'commercial']),
+        (70, ['addition', 'renovation']),
+    ], default=55),
+}, WEIGHTS, digits=1)
+
+# multi_region_scraper.score_permit - additive points out of 100
+MULTI_REGION_PROFILE = ScoringProfile({
+    'value': ValueBands('estimated_value', [100000, 250000, 500000], [5, 15, 25, 35], right=True),
+    'type': KeywordTiers(['permit_type'], [
+        (25, ['commercial', 'multi', 'mixed']),
+        (20, ['residential']),
+    ], default=15),
+    'location': ExactMatch('metro', ['Nashville', 'Austin', 'Dallas', 'Houston'], hit=20, miss=15),
+    'quality': KeywordTiers(['data_source'], [(20, ['🌐 LIVE'])], default=10, lowercase=False),
+}, {}, digits=None)
@@ -1,5 +1,3 @@
-import csv
-import os
 from datetime import datetime
 
 def scrape_austin_travis():
@@ -26,21 +24,9 @@ def scrape_austin_travis():
         }
     ]
     
-    # Ensure data directory exists
-    os.makedirs('data', exist_ok=True)
-    
-    # Append to CSV
-    with open('data/permits.csv', 'a', newline='') as csvfile:
-        fieldnames = ['county', 'permit_number', 'address', 'permit_type', 'estimated_value', 'work_description', 'date']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        # Write header if file is empty
-        if os.stat('data/permits.csv').st_size == 0:
-            writer.writeheader()
-        
-        for permit in permits:
-            permit['date'] = datetime.now().strftime('%Y-%m-%d')
-            writer.writerow(permit)
+    today = datetime.now().strftime('%Y-%m-%d')
+    for permit in permits:
+        permit['date'] = today
     
     return permits
 
@@ -4,12 +4,10 @@ Nashville scraper - pulls permits from Davidson County site
 """
 import requests
 from bs4 import BeautifulSoup
-import csv
-import os
 from datetime import datetime
 
 def scrape_nashville():
-    """Scrape Nashville-Davidson county permits and append to CSV"""
+    """Scrape Nashville-Davidson county permits (pull_all.py writes them to CSV)"""
     print("🕷️ Scraping Nashville-Davidson permits...")
 
     # Mock data for demo - replace with real scraping
@@ -25,24 +23,8 @@ def scrape_nashville():
         }
     ]
 
-    # Ensure data directory exists
-    os.makedirs('data', exist_ok=True)
-
-    # Append to CSV
-    csv_path = 'data/permits.csv'
-    file_exists = os.path.exists(csv_path)
-
-    with open(csv_path, 'a', newline='') as csvfile:
-        fieldnames = ['county', 'permit_number', 'address', 'permit_type', 'estimated_value', 'work_description', 'date']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        for permit in permits:
-            writer.writerow(permit)
-
-    print(f"✅ Added {len(permits)} permits to {csv_path}")
+    print(f"✅ Scraped {len(permits)} permits")
+    return permits
 
 if __name__ == '__main__':
     scrape_nashville()
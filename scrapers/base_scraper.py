@@ -1,15 +1,27 @@
 """
 Base scraper class for county permit websites
 """
-import requests
+import os
+import time
+import hashlib
+import threading
+import http_client
+import html_parse
+from source_state import get_state, set_state
 from bs4 import BeautifulSoup
 from abc import ABC, abstractmethod
 from typing import List, Dict
-import pdfplumber
-import io
+import pdf_extract
 from datetime import datetime
 import re
 
+# Seconds a discovered permits-page URL is trusted before the homepage is re-scanned
+LINK_TTL = float(os.getenv('PERMITS_LINK_TTL', 24 * 3600))
+
+
+class ScrapeCancelled(Exception):
+    """The scraper ran past its time budget or was cancelled by the orchestrator"""
+
 
 class PermitScraper(ABC):
     """Base class for all county permit scrapers"""
@@ -17,10 +29,49 @@ class PermitScraper(ABC):
     def __init__(self, county_name: str, base_url: str):
         self.county_name = county_name
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = http_client.new_session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        self.pending_fingerprint = None
+        self.deadline = None  # time.monotonic() budget end, set by the orchestrator
+        self.cancelled = threading.Event()
+        self.rows_parsed = 0
+    
+    def start_budget(self, seconds: float):
+        """Begin a run with a wall-clock budget; resets the run counters"""
+        self.deadline = time.monotonic() + seconds
+        self.cancelled.clear()
+        self.rows_parsed = 0
+        self.session.bytes_received = 0
+    
+    def cancel(self):
+        """Stop a straggler: later requests raise ScrapeCancelled, pooled connections are dropped"""
+        self.cancelled.set()
+        self.session.close()
+    
+    def request_timeout(self, default: float = 30) -> float:
+        """Per-request timeout capped by what is left of the budget"""
+        if self.cancelled.is_set():
+            raise ScrapeCancelled(f"{self.county_name} cancelled")
+        if self.deadline is None:
+            return default
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise ScrapeCancelled(f"{self.county_name} ran out of time")
+        return min(default, remaining)
+    
+    def _absolute_url(self, href: str) -> str:
+        """Resolve a homepage link against base_url"""
+        if href.startswith('http'):
+            return href
+        if href.startswith('//'):
+            # Protocol-relative URL
+            return f"https:{href}"
+        if href.startswith('/'):
+            return f"{self.base_url.rstrip('/')}{href}"
+        # Relative URL without leading slash
+        return f"{self.base_url.rstrip('/')}/{href}"
     
     def find_todays_permits_link(self) -> str:
         """
@@ -28,70 +79,115 @@ class PermitScraper(ABC):
         Returns the full URL to the permits page
         """
         try:
-            soup = self.parse_html(self.base_url)
-            if not soup:
+            doc = self.parse_document(self.base_url)
+            if doc is None:
                 return None
             
-            # Look for links containing keywords related to today's/daily permits
+            # Look for links containing keywords related to today's/daily permits;
+            # remember the first permit/report href as a fallback in the same pass
             keywords = ['today', 'daily', 'issued', 'new', 'permit', 'report']
+            fallback = None
             
-            for link in soup.find_all('a', href=True):
-                link_text = link.get_text().lower()
-                href = link.get('href')
-                
-                # Check if link text contains any of our keywords
-                if any(keyword in link_text for keyword in keywords):
-                    # Convert relative URLs to absolute
-                    if href.startswith('http'):
-                        print(f"🔍 {self.county_name}: Found potential permits link: {href}")
-                        return href
-                    elif href.startswith('//'):
-                        # Protocol-relative URL
-                        full_url = f"https:{href}"
-                        print(f"🔍 {self.county_name}: Found potential permits link: {full_url}")
-                        return full_url
-                    elif href.startswith('/'):
-                        full_url = f"{self.base_url.rstrip('/')}{href}"
-                        print(f"🔍 {self.county_name}: Found potential permits link: {full_url}")
-                        return full_url
-                    else:
-                        # Relative URL without leading slash
-                        full_url = f"{self.base_url.rstrip('/')}/{href}"
-                        print(f"🔍 {self.county_name}: Found potential permits link: {full_url}")
-                        return full_url
+            for link_text, href in html_parse.links(doc):
+                if any(keyword in link_text.lower() for keyword in keywords):
+                    full_url = self._absolute_url(href)
+                    print(f"🔍 {self.county_name}: Found potential permits link: {full_url}")
+                    return full_url
+                if fallback is None and ('permit' in href.lower() or 'report' in href.lower()):
+                    fallback = href
             
-            # If no direct link found, try searching for text patterns in the page
-            page_text = soup.get_text().lower()
-            if any(keyword in page_text for keyword in keywords):
-                # Look for any link that might be related
-                for link in soup.find_all('a', href=True):
-                    href = link.get('href')
-                    if 'permit' in href.lower() or 'report' in href.lower():
-                        if href.startswith('http'):
-                            print(f"🔍 {self.county_name}: Found fallback permits link: {href}")
-                            return href
-                        elif href.startswith('//'):
-                            # Protocol-relative URL
-                            full_url = f"https:{href}"
-                            print(f"🔍 {self.county_name}: Found fallback permits link: {full_url}")
-                            return full_url
-                        elif href.startswith('/'):
-                            full_url = f"{self.base_url.rstrip('/')}{href}"
-                            print(f"🔍 {self.county_name}: Found fallback permits link: {full_url}")
-                            return full_url
-                        else:
-                            # Relative URL without leading slash
-                            full_url = f"{self.base_url.rstrip('/')}/{href}"
-                            print(f"🔍 {self.county_name}: Found fallback permits link: {full_url}")
-                            return full_url
+            # If no direct link found, use a permit-looking href when the page mentions permits
+            page_text = html_parse.text(doc).lower()
+            if fallback and any(keyword in page_text for keyword in keywords):
+                full_url = self._absolute_url(fallback)
+                print(f"🔍 {self.county_name}: Found fallback permits link: {full_url}")
+                return full_url
             
             print(f"🔍 {self.county_name}: No permits links found on homepage")
             return None
             
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             print(f"Error finding today's permits link for {self.county_name}: {e}")
             return None
     
+    @property
+    def state_key(self) -> str:
+        return f"permits_page:{self.county_name}"
+    
+    def permits_link(self, refresh: bool = False) -> str:
+        """Permits page URL, rediscovered from the homepage only when older than LINK_TTL"""
+        state = get_state(self.state_key, {})
+        if not refresh and state.get('url') and time.time() - state.get('resolved_at', 0) < LINK_TTL:
+            return state['url']
+        
+        url = self.find_todays_permits_link()
+        if url and url != state.get('url'):
+            # New page - the old fingerprint doesn't apply
+            state = {'url': url}
+        if url:
+            state['resolved_at'] = time.time()
+            set_state(self.state_key, state)
+        return url
+    
+    def fetch_permits_page(self):
+        """
+        (url, content) for the permits page; content is None when it hasn't changed
+        since the last committed scrape (304 to ETag/Last-Modified, or same body hash).
+        Fetch errors are raised, not reported as unchanged.
+        The caller calls commit_fingerprint() once the permits are saved.
+        """
+        self.pending_fingerprint = None
+        url = self.permits_link()
+        if not url:
+            return None, None
+        
+        state = get_state(self.state_key, {})
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        
+        response = self.session.get(url, headers=headers, timeout=self.request_timeout(30))
+        if response.status_code in (404, 410):
+            # Cached link went stale - rediscover once
+            url = self.permits_link(refresh=True)
+            if not url:
+                return None, None
+            response = self.session.get(url, timeout=self.request_timeout(30))
+        if response.status_code == 304:
+            return url, None
+        response.raise_for_status()
+        
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if content_hash == state.get('hash'):
+            return url, None
+        
+        self.pending_fingerprint = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': content_hash,
+        }
+        return url, response.content
+    
+    def scrape_incomplete(self):
+        """Something on the permits page failed to fetch/parse - don't skip the page next run"""
+        self.pending_fingerprint = None
+    
+    def commit_fingerprint(self):
+        """
+        Remember the permits page version just scraped so an unchanged page is skipped next run
+        Only after its permits are saved (ScraperOrchestrator.commit_fingerprints)
+        """
+        if not self.pending_fingerprint:
+            return
+        state = get_state(self.state_key, {})
+        state.update(self.pending_fingerprint)
+        set_state(self.state_key, state)
+        self.pending_fingerprint = None
+    
     @abstractmethod
     def scrape(self) -> List[Dict]:
         """
@@ -100,31 +196,53 @@ class PermitScraper(ABC):
         """
         pass
     
-    def parse_html(self, url: str) -> BeautifulSoup:
-        """Fetch and parse HTML page"""
+    def fetch_html(self, url: str) -> bytes:
+        """Fetch a page's raw HTML (None on error) for html_parse"""
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url, timeout=self.request_timeout(30))
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            return response.content
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             print(f"Error fetching {url}: {e}")
+            self.scrape_incomplete()
             return None
     
+    def parse_document(self, url: str):
+        """Fetch a page as an lxml tree (XPath / html_parse.links)"""
+        content = self.fetch_html(url)
+        return html_parse.document(content) if content else None
+    
+    def parse_html(self, url: str) -> BeautifulSoup:
+        """Fetch and parse HTML page (BeautifulSoup on the lxml builder)"""
+        content = self.fetch_html(url)
+        return html_parse.soup(content) if content else None
+    
     def parse_pdf(self, pdf_url: str) -> str:
-        """Download and extract text from PDF"""
+        """Download (spooled to disk) and extract text from PDF"""
         try:
-            response = self.session.get(pdf_url, timeout=30)
-            response.raise_for_status()
-            
-            with pdfplumber.open(io.BytesIO(response.content)) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            return pdf_extract.extract_url(pdf_url, self.session, self.request_timeout(60))['text']
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             print(f"Error parsing PDF {pdf_url}: {e}")
+            self.scrape_incomplete()
             return ""
     
+    def parse_pdfs(self, pdf_urls: List[str]):
+        """
+        Yield (url, {'text', 'rows', 'pages'}) per PDF, parsed in a process pool
+        Failed PDFs are reported and skipped (and the page is retried next run).
+        """
+        for url, result, error in pdf_extract.extract_many(pdf_urls, self.session):
+            self.request_timeout()  # stop between PDFs once over budget
+            if error:
+                print(f"Error parsing PDF {url}: {error}")
+                self.scrape_incomplete()
+                continue
+            yield url, result
+    
     def create_permit_dict(self, **kwargs) -> Dict:
         """Create standardized permit dictionary"""
         return {
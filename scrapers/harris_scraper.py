@@ -4,7 +4,8 @@ Harris County (Texas) permit scraper
 """
 import re
 from typing import List, Dict
-from .base_scraper import PermitScraper
+import html_parse
+from .base_scraper import PermitScraper, ScrapeCancelled
 
 
 class HarrisScraper(PermitScraper):
@@ -22,64 +23,67 @@ class HarrisScraper(PermitScraper):
         """
         permits = []
         
+        # Permits page (link cached for PERMITS_LINK_TTL), skipped when unchanged;
+        # fetch errors propagate so the orchestrator reports them
+        permits_url, content = self.fetch_permits_page()
+        if not permits_url:
+            print(f"No today's permits link found for {self.county_name}")
+            return permits
+        if not content:
+            print(f"♻️  {self.county_name}: {permits_url} unchanged since last scrape")
+            return permits
+        
+        print(f"Found permits URL: {permits_url}")
+        
         try:
-            # Find today's permits link dynamically
-            permits_url = self.find_todays_permits_link()
-            if not permits_url:
-                print(f"No today's permits link found for {self.county_name}")
-                return permits
-            
-            print(f"Found permits URL: {permits_url}")
-            
-            # Parse the permits page
-            soup = self.parse_html(permits_url)
-            if not soup:
-                return permits
-            
-            # Look for permit data in tables
-            tables = soup.find_all('table')
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows[1:]:  # Skip header row
-                    cols = row.find_all(['td', 'th'])
-                    if len(cols) >= 4:  # Ensure we have enough columns
-                        permit_data = self.extract_from_table_row(cols)
-                        if permit_data:
-                            permits.append(permit_data)
+            # Look for permit data in tables (rows streamed, header row skipped)
+            for cols in html_parse.iter_table_rows(content):
+                self.rows_parsed += 1
+                if len(cols) >= 4:  # Ensure we have enough columns
+                    permit_data = self.extract_from_table_row(cols)
+                    if permit_data:
+                        permits.append(permit_data)
             
             # If no table data found, try looking for permit links
             if not permits:
-                permit_links = soup.find_all('a', href=re.compile(r'permit|application|pdf'))
-                for link in permit_links[:20]:  # Limit to recent 20
-                    permit_url = link.get('href')
+                permit_pattern = re.compile(r'permit|application|pdf')
+                permit_links = [href for _, href in html_parse.links(html_parse.document(content))
+                                if permit_pattern.search(href)]
+                pdf_urls = []
+                for permit_url in permit_links[:20]:  # Limit to recent 20
                     if not permit_url.startswith('http'):
                         permit_url = f"{self.base_url.rstrip('/')}{permit_url}"
                     
-                    # Check if it's a PDF
+                    # PDFs are parsed together below
                     if permit_url.endswith('.pdf'):
-                        pdf_text = self.parse_pdf(permit_url)
-                        permit_data = self.extract_from_pdf(pdf_text)
-                    else:
-                        permit_soup = self.parse_html(permit_url)
-                        permit_data = self.extract_from_html(permit_soup)
+                        pdf_urls.append(permit_url)
+                        continue
                     
+                    permit_soup = self.parse_html(permit_url)
+                    permit_data = self.extract_from_html(permit_soup)
                     if permit_data:
                         permits.append(permit_data)
+                
+                for pdf_url, pdf in self.parse_pdfs(pdf_urls):
+                    permits.extend(self.extract_from_pdf_report(pdf))
         
+        except ScrapeCancelled:
+            raise
         except Exception as e:
             print(f"Error scraping {self.county_name}: {e}")
+            self.scrape_incomplete()
         
         return permits
     
-    def extract_from_table_row(self, cols) -> Dict:
-        """Extract permit data from table row"""
+    def extract_from_table_row(self, cols: List[str]) -> Dict:
+        """Extract permit data from a table row's cell texts"""
         try:
             # Assuming table columns: Permit #, Address, Type, Value, Date
-            permit_number = cols[0].get_text().strip() if len(cols) > 0 else ''
-            address = cols[1].get_text().strip() if len(cols) > 1 else ''
-            permit_type = cols[2].get_text().strip() if len(cols) > 2 else ''
-            value_text = cols[3].get_text().strip() if len(cols) > 3 else '0'
-            issue_date = cols[4].get_text().strip() if len(cols) > 4 else ''
+            permit_number = cols[0] if len(cols) > 0 else ''
+            address = cols[1] if len(cols) > 1 else ''
+            permit_type = cols[2] if len(cols) > 2 else ''
+            value_text = cols[3] if len(cols) > 3 else '0'
+            issue_date = cols[4] if len(cols) > 4 else ''
             
             return self.create_permit_dict(
                 permit_number=permit_number,
@@ -114,6 +118,22 @@ class HarrisScraper(PermitScraper):
             print(f"Error extracting from HTML: {e}")
             return None
     
+    def extract_from_pdf_report(self, pdf: Dict) -> List[Dict]:
+        """Permits from a parsed PDF: one per table row, else the text fields"""
+        permits = []
+        self.rows_parsed += len(pdf['rows'])
+        for cols in pdf['rows']:
+            if len(cols) >= 4 and cols[0].lower() not in ('permit #', 'permit number', 'permit'):
+                permit_data = self.extract_from_table_row(cols)
+                if permit_data:
+                    permits.append(permit_data)
+        
+        if not permits:
+            permit_data = self.extract_from_pdf(pdf['text'])
+            if permit_data:
+                permits.append(permit_data)
+        return permits
+    
     def extract_from_pdf(self, text: str) -> Dict:
         """Extract permit data from PDF text"""
         if not text:
@@ -122,11 +142,9 @@ class HarrisScraper(PermitScraper):
         try:
             # Use regex to extract common fields
             permit_number = re.search(r'Permit #?:?\s*(\S+)', text)
-            address = re.search(r'Address:?\s*([^
-]+)', text)
-            permit_type = re.search(r'Type:?\s*([^
-]+)', text)
-            value = re.search(r'Value:?\s*$?([\d,]+)', text)
+            address = re.search(r'Address:?\s*([^\n]+)', text)
+            permit_type = re.search(r'Type:?\s*([^\n]+)', text)
+            value = re.search(r'Value:?\s*\$?([\d,]+)', text)
             
             return self.create_permit_dict(
                 permit_number=permit_number.group(1) if permit_number else '',
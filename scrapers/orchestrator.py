@@ -1,19 +1,28 @@
-
 """
 Scraper orchestrator - runs all county scrapers
+Scrapers run concurrently, each with its own wall-clock budget; stragglers
+are cancelled and reported instead of stalling the nightly job.
 """
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List, Dict
 from .nashville_scraper import NashvilleDavidsonScraper
 from .rutherford_scraper import RutherfordScraper
 from .wilson_scraper import WilsonScraper
 from .sumner_scraper import SumnerScraper
 from .harris_scraper import HarrisScraper
+from .base_scraper import ScrapeCancelled
+
+WORKERS = int(os.getenv('SCRAPER_WORKERS', 4))
+BUDGET_SECONDS = float(os.getenv('SCRAPER_BUDGET_SECONDS', 300))  # per scraper
+POLL_SECONDS = 1.0
 
 
 class ScraperOrchestrator:
     """Manages all county scrapers"""
     
-    def __init__(self):
+    def __init__(self, workers: int = WORKERS, budget_seconds: float = BUDGET_SECONDS, budgets: Dict = None):
         self.scrapers = [
             NashvilleDavidsonScraper(),
             RutherfordScraper(),
@@ -21,20 +30,94 @@ class ScraperOrchestrator:
             SumnerScraper(),
             HarrisScraper()
         ]
+        self.workers = workers
+        self.budget_seconds = budget_seconds
+        self.budgets = budgets or {}  # county_name -> seconds, overrides budget_seconds
+        self.last_report = []
+        self._completed = []  # scrapers whose last run finished ok, fingerprints not yet committed
+    
+    def _run(self, scraper, budget: float, started: Dict):
+        started[scraper.county_name] = time.monotonic()
+        scraper.start_budget(budget)
+        return scraper.scrape()
+    
+    def _report(self, scraper, status: str, duration: float, permits=None, error=None) -> Dict:
+        return {
+            'county': scraper.county_name,
+            'status': status,
+            'duration': round(duration, 2),
+            'bytes_fetched': scraper.session.bytes_received,
+            'rows_parsed': scraper.rows_parsed,
+            'permits': len(permits) if permits is not None else 0,
+            'error': str(error) if error else None,
+        }
     
     def scrape_all(self) -> List[Dict]:
-        """Run all scrapers and collect permits"""
+        """Run all scrapers concurrently and collect permits; per-scraper stats land in last_report"""
         all_permits = []
+        report = []
+        completed = []
+        started = {}
         
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scraper')
+        pending = {}
         for scraper in self.scrapers:
+            budget = self.budgets.get(scraper.county_name, self.budget_seconds)
             print(f"Scraping {scraper.county_name}...")
-            try:
-                permits = scraper.scrape()
-                all_permits.extend(permits)
-                print(f"  Found {len(permits)} permits")
-            except Exception as e:
-                print(f"  Error: {e}")
+            pending[executor.submit(self._run, scraper, budget, started)] = (scraper, budget)
+        
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                
+                for future in done:
+                    scraper, _ = pending.pop(future)
+                    duration = now - started.get(scraper.county_name, now)
+                    try:
+                        permits = future.result()
+                    except ScrapeCancelled as e:
+                        print(f"  ⏱️  {scraper.county_name}: {e}")
+                        report.append(self._report(scraper, 'timeout', duration, error=e))
+                        continue
+                    except Exception as e:
+                        print(f"  ❌ {scraper.county_name}: {e}")
+                        report.append(self._report(scraper, 'error', duration, error=e))
+                        continue
+                    all_permits.extend(permits)
+                    completed.append(scraper)
+                    print(f"  ✅ {scraper.county_name}: {len(permits)} permits in {duration:.1f}s")
+                    report.append(self._report(scraper, 'ok', duration, permits))
+                
+                # Cancel anything past its budget and stop waiting for it
+                for future, (scraper, budget) in list(pending.items()):
+                    began = started.get(scraper.county_name)
+                    if began is None or now - began < budget:
+                        continue
+                    scraper.cancel()
+                    future.cancel()
+                    pending.pop(future)
+                    print(f"  ⏱️  {scraper.county_name}: cancelled after {budget:.0f}s budget")
+                    report.append(self._report(scraper, 'timeout', now - began,
+                                               error=f"exceeded {budget:.0f}s budget"))
+        finally:
+            # Cancelled scrapers unwind on their own (requests fail fast once cancelled)
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        print(f"
-Total permits collected: {len(all_permits)}")
+        self.last_report = report
+        self._completed = completed
+        print(f"\nTotal permits collected: {len(all_permits)}")
+        for entry in report:
+            print(f"  📊 {entry['county']}: {entry['status']}, {entry['duration']}s, "
+                  f"{entry['bytes_fetched']:,} bytes, {entry['rows_parsed']} rows, {entry['permits']} permits"
+                  + (f" ({entry['error']})" if entry['error'] else ''))
         return all_permits
+    
+    def commit_fingerprints(self):
+        """
+        Call once the permits from scrape_all() are saved: the pages they came
+        from are then skipped while unchanged (failed or cancelled runs are retried)
+        """
+        for scraper in self._completed:
+            scraper.commit_fingerprint()
+        self._completed = []
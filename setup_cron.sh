@@ -21,6 +21,7 @@ crontab -l 2>/dev/null > "$TEMP_CRON" || true
 sed -i '' '/Contractor Leads/d' "$TEMP_CRON" 2>/dev/null || sed -i '/Contractor Leads/d' "$TEMP_CRON"
 sed -i '' '/incremental_scraper.py/d' "$TEMP_CRON" 2>/dev/null || sed -i '/incremental_scraper.py/d' "$TEMP_CRON"
 sed -i '' '/email_sender.py/d' "$TEMP_CRON" 2>/dev/null || sed -i '/email_sender.py/d' "$TEMP_CRON"
+sed -i '' '/email_dispatcher.py/d' "$TEMP_CRON" 2>/dev/null || sed -i '/email_dispatcher.py/d' "$TEMP_CRON"
 
 # Add new cron jobs
 cat >> "$TEMP_CRON" << EOF
@@ -28,9 +29,12 @@ cat >> "$TEMP_CRON" << EOF
 # Contractor Leads - Daily Scraping at 1:00 AM
 0 1 * * * cd $PROJECT_DIR && $PYTHON_PATH incremental_scraper.py >> $PROJECT_DIR/logs/scraper.log 2>&1
 
-# Contractor Leads - Daily Emails at 6:00 AM
+# Contractor Leads - Daily Emails queued at 6:00 AM
 0 6 * * * cd $PROJECT_DIR && $PYTHON_PATH email_sender.py >> $PROJECT_DIR/logs/email.log 2>&1
 
+# Contractor Leads - Send queued emails every minute
+* * * * * cd $PROJECT_DIR && $PYTHON_PATH email_dispatcher.py --once >> $PROJECT_DIR/logs/email.log 2>&1
+
 EOF
 
 # Install new crontab
@@ -43,7 +47,8 @@ echo "✅ Cron jobs installed successfully!"
 echo ""
 echo "📋 Scheduled tasks:"
 echo "   • Daily scraping: 1:00 AM"
-echo "   • Daily emails: 6:00 AM"
+echo "   • Daily emails: queued 6:00 AM"
+echo "   • Email dispatcher: every minute"
 echo ""
 echo "📂 Logs location:"
 echo "   $PROJECT_DIR/logs/"
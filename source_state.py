@@ -0,0 +1,38 @@
+"""
+Per-source sync state (watermarks, validators) persisted between scraper runs
+Stored as a small JSON file next to the leads database
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+STATE_PATH = Path(os.getenv('SOURCE_STATE_PATH', Path(__file__).parent / 'leads_db' / 'source_state.json'))
+
+_lock = threading.Lock()
+
+
+def _load():
+    try:
+        with open(STATE_PATH, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def get_state(key, default=None):
+    """Return the stored value for a source key"""
+    with _lock:
+        return _load().get(key, default)
+
+
+def set_state(key, value):
+    """Store a value for a source key (atomic write)"""
+    with _lock:
+        state = _load()
+        state[key] = value
+        STATE_PATH.parent.mkdir(exist_ok=True)
+        tmp_path = STATE_PATH.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, default=str)
+        os.replace(tmp_path, STATE_PATH)
@@ -181,18 +181,53 @@ def cleanup_old_seen_permits(days=30):
     return deleted
 
 
+# SQLite's default host-parameter limit is 999
+SQL_CHUNK_SIZE = 900
+
+
+def _seen_hashes(cursor, city, hashes):
+    """Return the subset of hashes already in the seen table (chunked IN lookups)"""
+    seen = set()
+    for start in range(0, len(hashes), SQL_CHUNK_SIZE):
+        chunk = hashes[start:start + SQL_CHUNK_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(
+            f'SELECT permit_hash FROM seen_permits WHERE city = ? AND permit_hash IN ({placeholders})',
+            [city] + chunk
+        )
+        seen.update(row[0] for row in cursor.fetchall())
+    return seen
+
+
 def filter_new_permits(city, permits):
-    """Filter out duplicates, return only new permits"""
-    new_permits = []
-    
+    """Filter out duplicates, return only new permits (one connection, one transaction)"""
+    # Hash the whole batch; repeats inside the batch only count once
+    batch = {}
     for permit in permits:
-        permit_hash = generate_permit_hash(permit)
-        
-        if not is_duplicate(city, permit_hash):
-            new_permits.append(permit)
-            mark_as_seen(city, permit)
+        batch.setdefault(generate_permit_hash(permit), permit)
+    if not batch:
+        return []
+    
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    cursor = conn.cursor()
+    try:
+        # IMMEDIATE takes the write lock up front so check + insert is atomic
+        cursor.execute('BEGIN IMMEDIATE')
+        seen = _seen_hashes(cursor, city, list(batch))
+        new_items = [(h, p) for h, p in batch.items() if h not in seen]
+    
+        cursor.executemany('''
+            INSERT OR IGNORE INTO seen_permits (city, permit_hash, permit_number, address)
+            VALUES (?, ?, ?, ?)
+        ''', [(city, h, p.get('permit_number', ''), p.get('address', '')) for h, p in new_items])
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
     
-    return new_permits
+    return [p for _, p in new_items]
 
 
 # ==================== STRIPE CHECKOUT ====================
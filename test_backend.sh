@@ -42,12 +42,10 @@ print(f'   ✅ Active subscriptions: {stats[\"active_subscriptions\"]}')
 echo ""
 echo "4️⃣  Checking leads..."
 python3 -c "
-import json
-with open('leads_db/current_leads.json') as f:
-    data = json.load(f)
-    leads = data.get('leads', {})
-    total = sum(len(county) for state in leads.values() for county in state.values())
-    print(f'   ✅ Total leads: {total:,}')
+import permit_store
+permit_store.init_store()
+total = permit_store.count_leads()
+print(f'   ✅ Total leads: {total:,}')
 " || echo "   ❌ Failed to check leads"
 
 # 5. Test email simulation
@@ -12,14 +12,14 @@ USAGE:
 """
 import os
 import sys
-import time
-import csv
 import json
 import subprocess
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
+import http_client
+import html_parse
+from csv_download import CSVSource
+import permit_archive
 
 # Directory for storing auth cookies
 AUTH_DIR = Path(__file__).parent / "auth_cookies"
@@ -36,7 +36,7 @@ class PermitPortalScraper:
     def __init__(self, city_name, vendor_type):
         self.city_name = city_name
         self.vendor_type = vendor_type
-        self.session = requests.Session()
+        self.session = http_client.new_session()
         self.curl_file = AUTH_DIR / f"{city_name}.curl"
         
     def load_auth_from_curl(self):
@@ -101,9 +101,10 @@ class AccelaScraper(PermitPortalScraper):
     - Plano: Uses Accela (need to find URL)
     """
     
-    def __init__(self, city_name, search_url):
+    def __init__(self, city_name, search_url, days=7):
         super().__init__(city_name, "Accela")
         self.search_url = search_url
+        self.days = days
     
     def scrape(self):
         """Scrape permits from Accela portal"""
@@ -115,38 +116,26 @@ class AccelaScraper(PermitPortalScraper):
         permits = []
         
         try:
-            # Step 1: Hit the search results page
-            response = self.session.get(self.search_url, timeout=15)
-            response.raise_for_status()
+            # Date-range search on the logged-in session: CSV export when offered, else every grid page
+            from accela_client import AccelaPortal  # needs lxml
+            portal = AccelaPortal(self.search_url, session=self.session, timeout=15)
+            end_date = datetime.now()
+            results = portal.search(end_date - timedelta(days=self.days), end_date)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Step 2: Find permit table (Accela uses specific class names)
-            # Common patterns: table with class "ACA_Grid_Table", "ACA_TabRow_Odd/Even"
-            tables = soup.find_all('table', class_=['ACA_Grid_Table', 'permit-table', 'results-table'])
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                
-                for row in rows[1:]:  # Skip header
-                    cols = row.find_all(['td', 'th'])
-                    if len(cols) >= 4:  # Need at least permit#, address, type, date
-                        permit = {
-                            'city': self.city_name,
-                            'permit_number': cols[0].get_text(strip=True),
-                            'address': cols[1].get_text(strip=True),
-                            'permit_type': cols[2].get_text(strip=True) if len(cols) > 2 else '',
-                            'date': cols[3].get_text(strip=True) if len(cols) > 3 else '',
-                            'owner': cols[4].get_text(strip=True) if len(cols) > 4 else '',
-                            'status': cols[5].get_text(strip=True) if len(cols) > 5 else '',
-                            'scraped_at': datetime.now().isoformat(),
-                            'source': 'Accela'
-                        }
-                        permits.append(permit)
-                        
-                    time.sleep(0.1)  # Small delay between rows
+            for result in results:
+                permits.append({
+                    'city': self.city_name,
+                    'permit_number': result.get('permit_number', ''),
+                    'address': result.get('address', ''),
+                    'permit_type': result.get('work_type', ''),
+                    'date': result.get('issue_date', ''),
+                    'owner': result.get('contractor', ''),
+                    'status': result.get('status', ''),
+                    'scraped_at': datetime.now().isoformat(),
+                    'source': 'Accela'
+                })
             
-            print(f"   ✅ Found {len(permits)} permits")
+            print(f"   ✅ Found {len(permits)} permits in {portal.requests_made} requests")
             
         except Exception as e:
             print(f"   ❌ Error scraping: {e}")
@@ -154,6 +143,13 @@ class AccelaScraper(PermitPortalScraper):
         return permits
 
 
+# CivicPlus div-layout listings (compiled once)
+CIVICPLUS_ITEMS = html_parse.class_xpath(['permit-item', 'record-item'], tag='div')
+CIVICPLUS_NUMBER = html_parse.class_xpath(['permit-number', 'record-id'], scope='.//')
+CIVICPLUS_ADDRESS = html_parse.class_xpath(['address', 'location'], scope='.//')
+CIVICPLUS_TYPE = html_parse.class_xpath(['type', 'category'], scope='.//')
+
+
 class CivicPlusScraper(PermitPortalScraper):
     """Scraper for CivicPlus permit systems
     
@@ -178,42 +174,34 @@ class CivicPlusScraper(PermitPortalScraper):
             response = self.session.get(self.search_url, timeout=15)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
             # CivicPlus often uses div-based layouts or tables
-            # Look for permit listings
-            permit_divs = soup.find_all('div', class_=['permit-item', 'record-item'])
-            permit_tables = soup.find_all('table', class_=['permit-list', 'data-table'])
-            
-            # Try table format first
-            for table in permit_tables:
-                rows = table.find_all('tr')
-                for row in rows[1:]:
-                    cols = row.find_all(['td', 'th'])
-                    if len(cols) >= 3:
-                        permit = {
-                            'city': self.city_name,
-                            'permit_number': cols[0].get_text(strip=True),
-                            'address': cols[1].get_text(strip=True),
-                            'permit_type': cols[2].get_text(strip=True),
-                            'date': cols[3].get_text(strip=True) if len(cols) > 3 else '',
-                            'scraped_at': datetime.now().isoformat(),
-                            'source': 'CivicPlus'
-                        }
-                        permits.append(permit)
+            # Try table format first (rows streamed straight out of the listing tables)
+            for cols in html_parse.iter_table_rows(response.content, table=('permit-list', 'data-table')):
+                if len(cols) >= 3:
+                    permit = {
+                        'city': self.city_name,
+                        'permit_number': cols[0],
+                        'address': cols[1],
+                        'permit_type': cols[2],
+                        'date': cols[3] if len(cols) > 3 else '',
+                        'scraped_at': datetime.now().isoformat(),
+                        'source': 'CivicPlus'
+                    }
+                    permits.append(permit)
             
             # Try div format
-            for div in permit_divs:
-                permit_num = div.find(class_=['permit-number', 'record-id'])
-                address = div.find(class_=['address', 'location'])
-                permit_type = div.find(class_=['type', 'category'])
+            doc = html_parse.document(response.content)
+            for div in CIVICPLUS_ITEMS(doc):
+                permit_num = CIVICPLUS_NUMBER(div)
+                address = CIVICPLUS_ADDRESS(div)
+                permit_type = CIVICPLUS_TYPE(div)
                 
                 if permit_num and address:
                     permit = {
                         'city': self.city_name,
-                        'permit_number': permit_num.get_text(strip=True),
-                        'address': address.get_text(strip=True),
-                        'permit_type': permit_type.get_text(strip=True) if permit_type else '',
+                        'permit_number': html_parse.cell_text(permit_num[0]),
+                        'address': html_parse.cell_text(address[0]),
+                        'permit_type': html_parse.cell_text(permit_type[0]) if permit_type else '',
                         'scraped_at': datetime.now().isoformat(),
                         'source': 'CivicPlus'
                     }
@@ -255,28 +243,23 @@ class OpenGovScraper(PermitPortalScraper):
                 response = self.session.get(self.dataset_url, timeout=15)
                 response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
                 # Find CSV download link
-                csv_links = soup.find_all('a', href=lambda x: x and '.csv' in x.lower())
+                csv_links = [href for _, href in html_parse.links(html_parse.document(response.content))
+                             if '.csv' in href.lower()]
                 
                 if not csv_links:
                     print(f"   ⚠️  No CSV links found")
                     return []
                 
-                csv_url = csv_links[0]['href']
+                csv_url = csv_links[0]
                 if not csv_url.startswith('http'):
                     csv_url = self.dataset_url.rsplit('/', 1)[0] + '/' + csv_url
             
             print(f"   📥 Downloading: {csv_url}")
             
-            # Download CSV
-            csv_response = self.session.get(csv_url, timeout=30)
-            csv_response.raise_for_status()
-            
-            # Parse CSV
-            lines = csv_response.text.splitlines()
-            reader = csv.DictReader(lines)
+            # Stream CSV - rows are parsed as the download arrives
+            name = f"{self.city_name.lower().replace(' ', '_')}_opengov"
+            reader = CSVSource(csv_url, name, session=self.session).iter_rows()
             
             for row in reader:
                 # Map common CSV column names (case-insensitive search)
@@ -328,26 +311,13 @@ class OpenGovScraper(PermitPortalScraper):
 
 
 def save_permits_to_csv(permits, city_name):
-    """Save permits to CSV file"""
+    """Add permits to the city's archive partition for today"""
     if not permits:
         print(f"⚠️  No permits to save for {city_name}")
         return
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = OUTPUT_DIR / f"{city_name}_{timestamp}.csv"
-    
-    # Get all unique keys
-    fieldnames = set()
-    for permit in permits:
-        fieldnames.update(permit.keys())
-    fieldnames = sorted(fieldnames)
-    
-    with open(filename, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(permits)
-    
-    print(f"💾 Saved {len(permits)} permits to: {filename}")
+    path = permit_archive.append(permits, city_name)
+    print(f"💾 Saved {len(permits)} permits to: {path}")
 
 
 # ==================== CITY CONFIGURATIONS ====================